@@ -0,0 +1,250 @@
+"""
+Benchmarks for the analysis hot paths on synthetic NetCDF fixtures
+
+    python benchmark.py                                  # 1°, 0.5° and 0.1° fixtures
+    python benchmark.py --resolutions 0.1 --output results.json
+    python benchmark.py --compare benchmark_results/previous.json
+
+Fixtures use the production file and variable names, so the registry reads them exactly like the real
+data. Each resolution runs in its own subprocess with SUNRIZE_DATA_DIR pointed at its fixtures, because
+the registry, point cache and analyzers are process-wide singletons.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+DEFAULT_RESOLUTIONS = [1.0, 0.5, 0.1]
+
+# Extent of the production files (Southern Asia plus surroundings)
+FIXTURE_BOUNDS = {'lat_min': -7.5, 'lat_max': 40.0, 'lon_min': 44.0, 'lon_max': 100.0}
+
+# Medians slower than this fraction against --compare are reported as regressions
+REGRESSION_THRESHOLD = 0.2
+
+
+def write_fixtures(data_dir, resolution, seed=0):
+    """Write precipitation.nc, temp.nc and wind.nc on a regular grid of the given resolution"""
+    import xarray as xr
+    from dataset_registry import DATASET_SOURCES
+
+    rng = np.random.default_rng(seed)
+    lat = np.arange(FIXTURE_BOUNDS['lat_min'], FIXTURE_BOUNDS['lat_max'] + resolution / 2, resolution, dtype=np.float32)
+    lon = np.arange(FIXTURE_BOUNDS['lon_min'], FIXTURE_BOUNDS['lon_max'] + resolution / 2, resolution, dtype=np.float32)
+    lat2d, lon2d = np.meshgrid(lat, lon, indexing='ij')
+    shape = lat2d.shape
+
+    # Smooth large-scale fields plus noise, in the units of the production products
+    fields = {
+        'precipitation': (np.clip(0.15 + 0.1 * np.sin(np.radians(lon2d * 4)) * np.cos(np.radians(lat2d * 3))
+                                  + rng.gamma(1.5, 0.05, shape), 0, None), 'mm/hr'),
+        'temperature': (303.0 - 0.45 * np.abs(lat2d - 12) + rng.normal(0, 1.5, shape), 'K'),
+        'wind': (np.clip(3 + 2 * np.cos(np.radians(lat2d * 6)) + rng.normal(0, 0.8, shape), 0.1, None), 'm s-1')
+    }
+
+    os.makedirs(data_dir, exist_ok=True)
+    for name, (values, units) in fields.items():
+        source = DATASET_SOURCES[name]
+        data = xr.DataArray(values.astype(np.float32), coords={'lat': lat, 'lon': lon}, dims=['lat', 'lon'],
+                            name=source['variable'], attrs={'units': units})
+        data['lat'].attrs = {'units': 'degrees_north', 'standard_name': 'latitude'}
+        data['lon'].attrs = {'units': 'degrees_east', 'standard_name': 'longitude'}
+        data.to_dataset().to_netcdf(os.path.join(data_dir, source['file']))
+
+    return {'resolution': resolution, 'shape': list(shape), 'cells': int(lat2d.size)}
+
+
+def time_call(func, repeat):
+    """Wall-clock statistics of repeated calls, in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'runs': repeat,
+        'min_ms': round(samples[0], 4),
+        'median_ms': round(statistics.median(samples), 4),
+        'mean_ms': round(statistics.fmean(samples), 4),
+        'p95_ms': round(samples[min(repeat - 1, int(repeat * 0.95))], 4),
+        'max_ms': round(samples[-1], 4)
+    }
+
+
+def run_benchmarks(repeat, seed=0):
+    """Time the hot paths against whatever SUNRIZE_DATA_DIR points at (runs inside the worker)"""
+    rng = np.random.default_rng(seed)
+    results = {}
+
+    start = time.perf_counter()
+    from dataset_registry import COVERAGE_BOUNDS, get_registry
+    failed = get_registry().load_all()
+    results['dataset_load'] = {'seconds': round(time.perf_counter() - start, 4), 'failed': failed}
+
+    from real_nasa_analyzer import RealNASAAnalyzer
+    from vacation_recommender import VacationRecommender
+
+    start = time.perf_counter()
+    analyzer = RealNASAAnalyzer()
+    analyzer.warm_up()
+    results['analyzer_warm_up'] = {'seconds': round(time.perf_counter() - start, 4)}
+
+    recommender = VacationRecommender()
+    results['datasets'] = {name: d['shape'] for name, d in get_registry().stats()['datasets'].items()}
+
+    lats = rng.uniform(COVERAGE_BOUNDS['lat_min'], COVERAGE_BOUNDS['lat_max'], repeat)
+    lons = rng.uniform(COVERAGE_BOUNDS['lon_min'], COVERAGE_BOUNDS['lon_max'], repeat)
+    points = iter(zip(lats.tolist(), lons.tolist()))
+    criteria = {'maxWetRisk': 60, 'maxHotRisk': 60, 'maxColdRisk': 60, 'maxWindyRisk': 60, 'activityType': 'outdoor'}
+
+    benchmarks = {
+        'analyze_weather_risks_random': lambda: analyzer.analyze_weather_risks(*next(points), verbose=False),
+        'analyze_weather_risks_repeat': lambda: analyzer.analyze_weather_risks(28.7041, 77.1025, verbose=False),
+        'find_best_destinations': lambda: analyzer.find_best_destinations(criteria),
+        'find_best_destinations_top15': lambda: analyzer.find_best_destinations(criteria, limit=15),
+        'recommend_destinations': lambda: recommender.recommend_destinations(criteria)
+    }
+    for name, func in benchmarks.items():
+        results[name] = time_call(func, repeat)
+
+    # Last: leaving the test client runs the app's shutdown, which releases the grids
+    results.update(run_endpoint_benchmarks(rng, repeat))
+
+    from point_cache import get_point_cache
+    results['point_cache'] = get_point_cache().stats()
+    return results
+
+
+def run_endpoint_benchmarks(rng, repeat):
+    """In-process requests against main.app; skipped when the test client is unavailable"""
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError as e:  # TestClient needs httpx
+        return {'endpoints_skipped': str(e)}
+
+    import main
+    from dataset_registry import COVERAGE_BOUNDS
+
+    batch = [{'latitude': float(lat), 'longitude': float(lon), 'event_date': '2024-12-25'}
+             for lat, lon in zip(rng.uniform(COVERAGE_BOUNDS['lat_min'], COVERAGE_BOUNDS['lat_max'], 1000),
+                                 rng.uniform(COVERAGE_BOUNDS['lon_min'], COVERAGE_BOUNDS['lon_max'], 1000))]
+    predict = {'latitude': 28.7041, 'longitude': 77.1025, 'event_date': '2024-12-25', 'location_name': 'Delhi'}
+    vacation = {'month': 'December', 'maxWetRisk': 60, 'maxHotRisk': 60, 'maxColdRisk': 60, 'maxWindyRisk': 60}
+
+    def request(method, url, expect=200, **kwargs):
+        def call():
+            response = client.request(method, url, **kwargs)
+            if response.status_code != expect:
+                raise Exception(f"{method} {url} returned {response.status_code}: {response.text[:200]}")
+        return call
+
+    results = {}
+    with TestClient(main.app) as client:
+        endpoints = {
+            'POST /predict': request('POST', '/predict', json=predict),
+            'POST /predict/batch (1000)': request('POST', '/predict/batch', json={'items': batch}),
+            'POST /recommend-destinations': request('POST', '/recommend-destinations', json=vacation),
+            'GET /export-analysis/json': request('GET', '/export-analysis/json', params={'lat': 19.07, 'lon': 72.87}),
+            'POST /export-analysis/bulk (csv grid)': request('POST', '/export-analysis/bulk', json={'format': 'csv'})
+        }
+        for name, call in endpoints.items():
+            # Batch and whole-grid requests are slow at 0.1°, keep their run count small
+            results[name] = time_call(call, max(3, repeat // 20) if 'batch' in name or 'bulk' in name else repeat)
+    return results
+
+
+def run_resolution(resolution, repeat, workdir):
+    """Generate fixtures for one resolution and benchmark them in a fresh interpreter"""
+    data_dir = os.path.join(workdir, f"res_{resolution}")
+    fixture = write_fixtures(data_dir, resolution)
+
+    env = dict(os.environ, SUNRIZE_DATA_DIR=data_dir, SUNRIZE_USE_STORE='0', SUNRIZE_BACKGROUND_WARMUP='0')
+    env.pop('SUNRIZE_SHM_MANIFEST', None)
+    result_path = os.path.join(workdir, f"result_{resolution}.json")
+
+    subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', result_path, '--repeat', str(repeat)],
+                   env=env, cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+
+    with open(result_path) as f:
+        return {'fixture': fixture, 'results': json.load(f)}
+
+
+def compare(current, previous, threshold=REGRESSION_THRESHOLD):
+    """Benchmarks whose median got slower than the threshold, per resolution"""
+    regressions = []
+    for resolution, run in current['resolutions'].items():
+        before = previous.get('resolutions', {}).get(resolution, {}).get('results', {})
+        for name, stats in run['results'].items():
+            old = before.get(name)
+            if not isinstance(stats, dict) or 'median_ms' not in stats or not old or 'median_ms' not in old:
+                continue
+            change = (stats['median_ms'] - old['median_ms']) / old['median_ms'] if old['median_ms'] else 0
+            if change > threshold:
+                regressions.append({'resolution': resolution, 'benchmark': name, 'previous_ms': old['median_ms'],
+                                    'current_ms': stats['median_ms'], 'change': round(change, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis hot paths on synthetic NetCDF fixtures")
+    parser.add_argument('--resolutions', type=float, nargs='+', default=DEFAULT_RESOLUTIONS)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--compare', default=None, help="previous results JSON to check for regressions")
+    parser.add_argument('--worker', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            results = run_benchmarks(args.repeat)
+        with open(args.worker, 'w') as f:
+            json.dump(results, f)
+        return
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'resolutions': {}
+    }
+
+    with tempfile.TemporaryDirectory(prefix='sunrize_bench_') as workdir:
+        for resolution in args.resolutions:
+            print(f"Benchmarking {resolution}° fixtures...")
+            run = run_resolution(resolution, args.repeat, workdir)
+            report['resolutions'][str(resolution)] = run
+            for name, stats in run['results'].items():
+                if isinstance(stats, dict) and 'median_ms' in stats:
+                    print(f"  {name:<40} median {stats['median_ms']:>10.3f} ms   p95 {stats['p95_ms']:>10.3f} ms")
+
+    if args.compare:
+        with open(args.compare) as f:
+            report['regressions'] = compare(report, json.load(f))
+        for r in report['regressions']:
+            print(f"REGRESSION {r['resolution']}° {r['benchmark']}: "
+                  f"{r['previous_ms']:.3f} -> {r['current_ms']:.3f} ms ({r['change']:+.0%})")
+
+    output = args.output or os.path.join('benchmark_results', f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if report.get('regressions'):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Bounded thread pool for the blocking data-access and scoring work behind the async handlers
+Handlers await run() so grid reads and city scoring never stall the event loop
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads running blocking work, and how many more calls may wait for one before new ones are refused
+EXECUTOR_THREADS = int(os.environ.get('SUNRIZE_EXECUTOR_THREADS', str(min(4, os.cpu_count() or 1))))
+EXECUTOR_QUEUE = int(os.environ.get('SUNRIZE_EXECUTOR_QUEUE', '64'))
+
+
+class ExecutorBusy(Exception):
+    """Raised instead of queueing when every thread is busy and the queue is full"""
+
+
+class BlockingExecutor:
+    """ThreadPoolExecutor with a queue limit and queue depth / wait time counters"""
+
+    def __init__(self, max_workers=EXECUTOR_THREADS, max_queue=EXECUTOR_QUEUE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.peak_queued = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+        self.run_seconds_max = 0.0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sunrize-blocking')
+
+    async def run(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) on the pool and await its result"""
+        return await self._run(func, args, kwargs)
+
+    async def stream(self, iterable):
+        """Async iterator producing the items of a blocking iterable on the pool, for StreamingResponse
+
+        The first item is produced before this returns, so ExecutorBusy surfaces as an error response
+        rather than a truncated body; once a stream has started, its later items wait for a thread
+        instead of being refused
+        """
+        iterator = iter(iterable)
+        done = object()
+        first = await self._run(next, (iterator, done), {})
+
+        async def items():
+            item = first
+            while item is not done:
+                yield item
+                item = await self._run(next, (iterator, done), {}, limit=False)
+
+        return items()
+
+    async def _run(self, func, args, kwargs, limit=True):
+        with self._lock:
+            if limit and self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorBusy(f"Server busy: {self.pending} requests already waiting for data access")
+            self.pending += 1
+            self.peak_queued = max(self.peak_queued, self.pending - self.running)
+
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self.running += 1
+                wait = started - submitted
+                self.wait_seconds_total += wait
+                self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.running -= 1
+                    self.run_seconds_total += elapsed
+                    self.run_seconds_max = max(self.run_seconds_max, elapsed)
+
+        # Counted down when the task finishes or is cancelled before starting (client went away)
+        future = self._pool.submit(task)
+        future.add_done_callback(self._finished)
+        return await asyncio.wrap_future(future)
+
+    def _finished(self, future):
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            started = self.completed + self.failed + self.running
+            return {
+                'threads': self.max_workers,
+                'max_queue': self.max_queue,
+                'running': self.running,
+                'queued': self.pending - self.running,
+                'peak_queued': self.peak_queued,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(self.wait_seconds_total / started * 1000, 3) if started else None,
+                'max_wait_ms': round(self.wait_seconds_max * 1000, 3),
+                'avg_run_ms': round(self.run_seconds_total / (self.completed + self.failed) * 1000, 3)
+                              if self.completed + self.failed else None,
+                'max_run_ms': round(self.run_seconds_max * 1000, 3)
+            }
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process-wide executor shared by every handler in main.py and simple_backend.py, created on first use"""
+    global _executor
+    executor = _executor
+    if executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = BlockingExecutor()
+            executor = _executor
+    return executor
+
+
+def shutdown_executor():
+    """Shut the process-wide executor down (app shutdown); the next get_executor() starts a fresh pool"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
@@ -0,0 +1,243 @@
+"""
+Bulk risk export for many locations or for every grid cell of the coverage box
+Rows are scored a chunk at a time with the vectorized risk engine and streamed as CSV, NDJSON,
+Arrow IPC or Parquet, so memory stays flat however many rows are exported
+"""
+import csv
+import json
+import os
+from io import StringIO
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Arrow and Parquet exports are unavailable without pyarrow
+    pa = pq = None
+
+from data_validator import coverage_mask, get_nasa_data_batch
+from dataset_registry import COVERAGE_BOUNDS, get_registry
+from risk_engine import score_risks
+from metrics import POINTS_SCORED, stage
+
+EXPORT_CHUNK_ROWS = int(os.environ.get('SUNRIZE_EXPORT_CHUNK_ROWS', '5000'))
+
+# Same risks and rounding as the single-point /export-analysis
+EXPORT_RISKS = ['very_wet', 'very_hot', 'very_cold', 'very_windy']
+EXPORT_COLUMNS = ['location_name', 'latitude', 'longitude',
+                  'precipitation_mm', 'temperature_c', 'wind_speed_ms'] + EXPORT_RISKS + ['dataset_version']
+MEASUREMENT_DECIMALS = {'precipitation_mm': 3, 'temperature_c': 1, 'wind_speed_ms': 2}
+RISK_DECIMALS = 2
+
+# /predict/batch as a table: its comfort-model probabilities (0-1) and per-item errors
+BATCH_RISKS = EXPORT_RISKS + ['very_uncomfortable']
+BATCH_COLUMNS = (['index', 'location_name', 'latitude', 'longitude', 'date',
+                  'precipitation_mm', 'temperature_c', 'wind_speed_ms'] + BATCH_RISKS +
+                 ['years_of_record', 'dataset_version', 'error'])
+
+MEDIA_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet'
+}
+ARROW_FORMATS = ['arrow', 'parquet']
+
+
+def point_chunks(points, chunk_rows=EXPORT_CHUNK_ROWS):
+    """(names, lats, lons) chunks for a list of (name, lat, lon) tuples"""
+    for start in range(0, len(points), chunk_rows):
+        names, lats, lons = zip(*points[start:start + chunk_rows])
+        yield list(names), np.array(lats, dtype=np.float64), np.array(lons, dtype=np.float64)
+
+
+def grid_chunks(bounds=COVERAGE_BOUNDS, grid='precipitation', chunk_rows=EXPORT_CHUNK_ROWS):
+    """(names, lats, lons) chunks covering every cell of one dataset's grid inside bounds"""
+    data = get_registry().get(grid).data
+    # float32 coordinates, rounded so 5.05 is not written as 5.050000190734863
+    lat = np.round(data['lat'].values.astype(np.float64), 4)
+    lon = np.round(data['lon'].values.astype(np.float64), 4)
+    lat = lat[(lat >= bounds['lat_min']) & (lat <= bounds['lat_max'])]
+    lon = lon[(lon >= bounds['lon_min']) & (lon <= bounds['lon_max'])]
+    if lon.size == 0:
+        return
+
+    # Whole grid rows per chunk, at least one
+    rows_per_chunk = max(1, chunk_rows // lon.size)
+    for start in range(0, lat.size, rows_per_chunk):
+        lats, lons = np.meshgrid(lat[start:start + rows_per_chunk], lon, indexing='ij')
+        yield None, lats.ravel(), lons.ravel()
+
+
+def score_chunk(names, lats, lons, skip_missing=False):
+    """Columns of one export chunk; cells without data (or outside coverage) get NaN measurements"""
+    covered = coverage_mask(lats, lons)
+    measurements = {k: np.full(lats.shape, np.nan) for k in MEASUREMENT_DECIMALS}
+
+    if covered.any():
+        nasa_data = get_nasa_data_batch(lats[covered], lons[covered])
+        measurements['precipitation_mm'][covered] = nasa_data['precipitation_mm']
+        measurements['temperature_c'][covered] = nasa_data['temperature_k'] - 273.15
+        measurements['wind_speed_ms'][covered] = nasa_data['wind_speed_ms']
+
+    has_data = ~np.isnan(measurements['precipitation_mm'])
+    for values in measurements.values():
+        has_data &= ~np.isnan(values)
+
+    with stage('risk_scoring'):
+        risks = score_risks(measurements['precipitation_mm'], measurements['temperature_c'],
+                            measurements['wind_speed_ms'], model='export')
+    POINTS_SCORED.inc(lats.size, 'export_bulk')
+
+    columns = {
+        'location_name': names if names is not None else [''] * lats.size,
+        'latitude': lats,
+        'longitude': lons,
+        'dataset_version': np.full(lats.shape, get_registry().version, dtype=np.int64)
+    }
+    for k, decimals in MEASUREMENT_DECIMALS.items():
+        columns[k] = np.round(measurements[k], decimals)
+    for k in EXPORT_RISKS:
+        columns[k] = np.where(has_data, np.round(risks[k], RISK_DECIMALS), np.nan)
+
+    if skip_missing:
+        columns = {k: [v for v, keep in zip(col, has_data) if keep] if isinstance(col, list) else col[has_data]
+                   for k, col in columns.items()}
+    return columns
+
+
+def _rows(columns, names=EXPORT_COLUMNS):
+    """Row tuples of a scored chunk, NaN as None"""
+    lists = [columns[k] if isinstance(columns[k], list) else columns[k].tolist() for k in names]
+    for row in zip(*lists):
+        yield [None if v != v else v for v in row]
+
+
+def write_csv(batches, names, schema):
+    yield ','.join(names) + '\n'
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    for columns in batches:
+        with stage('serialization'):
+            writer.writerows(_rows(columns, names))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def write_ndjson(batches, names, schema):
+    for columns in batches:
+        with stage('serialization'):
+            lines = [json.dumps(dict(zip(names, row))) for row in _rows(columns, names)]
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+
+class _ChunkSink:
+    """Write-only file object whose written bytes are handed on after every batch"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        # Parquet footers record absolute offsets, so this counts every byte ever written
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def arrow_schema():
+    fields = [pa.field('location_name', pa.string()),
+              pa.field('latitude', pa.float64()),
+              pa.field('longitude', pa.float64())]
+    fields += [pa.field(k, pa.float64()) for k in MEASUREMENT_DECIMALS]
+    fields += [pa.field(k, pa.float64()) for k in EXPORT_RISKS]
+    fields.append(pa.field('dataset_version', pa.int64()))
+    return pa.schema(fields, metadata={'risk_model': 'export', 'risk_units': 'percent',
+                                       'temperature_units': 'degC', 'precipitation_units': 'mm'})
+
+
+def batch_schema():
+    fields = [pa.field('index', pa.int64()),
+              pa.field('location_name', pa.string()),
+              pa.field('latitude', pa.float64()),
+              pa.field('longitude', pa.float64()),
+              pa.field('date', pa.string())]
+    fields += [pa.field(k, pa.float64()) for k in MEASUREMENT_DECIMALS]
+    fields += [pa.field(k, pa.float64()) for k in BATCH_RISKS]
+    fields += [pa.field('years_of_record', pa.int64()),
+               pa.field('dataset_version', pa.int64()),
+               pa.field('error', pa.string())]
+    return pa.schema(fields, metadata={'risk_model': 'comfort', 'risk_units': 'probability',
+                                       'temperature_units': 'degC', 'precipitation_units': 'mm'})
+
+
+def _record_batch(columns, schema):
+    # Missing measurements become nulls rather than NaN
+    arrays = []
+    for field in schema:
+        values = columns[field.name]
+        if isinstance(values, list):
+            arrays.append(pa.array(values, type=field.type))
+        else:
+            values = np.asarray(values)
+            mask = np.isnan(values) if values.dtype.kind == 'f' else None
+            arrays.append(pa.array(values, type=field.type, mask=mask))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def write_arrow(batches, names, schema):
+    schema = schema()
+    sink = _ChunkSink()
+    options = pa.ipc.IpcWriteOptions(compression='zstd')
+    with pa.ipc.new_stream(pa.PythonFile(sink, mode='w'), schema, options=options) as writer:
+        for columns in batches:
+            writer.write_batch(_record_batch(columns, schema))
+            yield sink.take()
+    yield sink.take()
+
+
+def write_parquet(batches, names, schema):
+    schema = schema()
+    sink = _ChunkSink()
+    # One row group per chunk, flushed to the client as soon as it is written
+    with pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema, compression='zstd') as writer:
+        for columns in batches:
+            writer.write_batch(_record_batch(columns, schema))
+            yield sink.take()
+    yield sink.take()
+
+
+WRITERS = {'csv': write_csv, 'ndjson': write_ndjson, 'arrow': write_arrow, 'parquet': write_parquet}
+
+
+def write_export(format, batches, names, schema):
+    """Lazily encoded body for batches of column dicts; schema is a callable returning the Arrow schema"""
+    if format not in WRITERS:
+        raise ValueError(f"Bulk export format must be one of {', '.join(WRITERS)}")
+    if format in ARROW_FORMATS and pa is None:
+        raise ValueError(f"{format} export requires pyarrow")
+    return WRITERS[format](batches, names, schema)
+
+
+def stream_export(format, chunks, skip_missing=False):
+    """Lazily encoded export body for StreamingResponse"""
+    batches = (score_chunk(names, lats, lons, skip_missing) for names, lats, lons in chunks)
+    return write_export(format, batches, EXPORT_COLUMNS, arrow_schema)
@@ -0,0 +1,310 @@
+"""
+Monthly climatology cubes built offline from the monthly NASA time series
+Each variable's monthly GPM/FLDAS/MERRA-2 series is reduced, one calendar month and block of rows at a time,
+into a (statistic, month, lat, lon) float32 cube of mean, standard deviation and quantiles, plus a
+(risk, month, lat, lon) raster of exceedance probabilities: the fraction of years whose monthly mean is
+beyond each risk threshold
+
+    python climatology.py build      # reduce <name>_monthly.nc into climatology/<name>.nc
+    python climatology.py describe   # years per month and shape of each built cube
+
+At run time a month lookup (climatology or exceedance) is the same nearest-cell index as the time-averaged grids, on one cube slice.
+"""
+import argparse
+import os
+import threading
+import time
+import warnings
+
+import numpy as np
+import xarray as xr
+
+from dataset_registry import (CROP_BOUNDS, CROP_MARGIN, CROP_TO_COVERAGE, DATA_DIR, DATASET_SOURCES, NETCDF_LOCK,
+                              DatasetRegistry, crop_to_bounds, get_registry)
+
+CLIMATOLOGY_DIR = os.environ.get('SUNRIZE_CLIMATOLOGY_DIR', os.path.join(DATA_DIR, 'climatology'))
+
+# Monthly time series of the same variables as the time-averaged maps (Giovanni subsets or concatenated granules)
+MONTHLY_SOURCES = {
+    name: dict(source, file=f"{name}_monthly.nc") for name, source in DATASET_SOURCES.items()
+}
+
+STATISTICS = ('mean', 'std', 'p10', 'p50', 'p90')
+QUANTILES = (0.1, 0.5, 0.9)
+
+# Risk -> (variable, comparison, threshold) on monthly means, in the units of the source grids
+EXCEEDANCE_THRESHOLDS = {
+    'very_wet': ('precipitation', '>', 0.5),         # mm/hr, about 360 mm in a month
+    'very_hot': ('temperature', '>', 273.15 + 32),   # K
+    'very_cold': ('temperature', '<', 273.15 + 10),  # K
+    'very_windy': ('wind', '>', 6.0)                 # m/s
+}
+
+# Upper bound on the float64 block of (years, rows, lon) values reduced at once
+CHUNK_MB = float(os.environ.get('SUNRIZE_CLIMATOLOGY_CHUNK_MB', '64'))
+
+# Cubes that failed to open are looked for again after this many seconds, so a build picks up without a restart
+RETRY_SECONDS = float(os.environ.get('SUNRIZE_CLIMATOLOGY_RETRY_SECONDS', '60'))
+
+MONTH_NAMES = ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september',
+               'october', 'november', 'december']
+
+
+def parse_month(value):
+    """Month number 1-12 from 'December', 'dec', '12' or 12; None when missing or not a month"""
+    if value is None:
+        return None
+    text = str(value).strip().lower()
+    if text.isdigit():
+        month = int(text)
+        return month if 1 <= month <= 12 else None
+    for number, name in enumerate(MONTH_NAMES, 1):
+        if len(text) >= 3 and name.startswith(text):
+            return number
+    return None
+
+
+def raster_name(name, kind='climatology'):
+    """Registry name of a variable's climatology or exceedance raster, kept apart from SUNRIZE_<NAME>_FILE"""
+    return f"{name}_{kind}"
+
+
+def nan_quantiles(block, quantiles):
+    """np.nanquantile(block, quantiles, axis=0) (linear interpolation) with one sort instead of a per-cell loop"""
+    ordered = np.sort(block, axis=0)  # NaN sorts last
+    valid = np.count_nonzero(~np.isnan(block), axis=0)
+    result = np.full((len(quantiles),) + block.shape[1:], np.nan)
+    for i, q in enumerate(quantiles):
+        position = q * np.maximum(valid - 1, 0)
+        lower = np.floor(position).astype(np.intp)
+        upper = np.minimum(lower + 1, np.maximum(valid - 1, 0))
+        low = np.take_along_axis(ordered, lower[None], axis=0)[0]
+        high = np.take_along_axis(ordered, upper[None], axis=0)[0]
+        result[i] = np.where(valid > 0, low + (high - low) * (position - lower), np.nan)
+    return result
+
+
+def reduce_monthly(data, chunk_mb=CHUNK_MB, thresholds=()):
+    """Reduce a lazy (time, lat, lon) DataArray in one pass
+
+    Returns the (statistic, month, lat, lon) cube, the (threshold, month, lat, lon) exceedance probabilities
+    for [(comparison, value), ...] thresholds (both float32) and the years of record per month
+    """
+    months = data['time'].dt.month.values
+    n_lat, n_lon = data.sizes['lat'], data.sizes['lon']
+    cube = np.full((len(STATISTICS), 12, n_lat, n_lon), np.nan, dtype=np.float32)
+    exceedance = np.full((len(thresholds), 12, n_lat, n_lon), np.nan, dtype=np.float32)
+    years = np.zeros(12, dtype=np.int64)
+
+    for month in range(1, 13):
+        times = np.flatnonzero(months == month)
+        years[month - 1] = times.size
+        if times.size == 0:
+            continue
+
+        rows_per_chunk = max(1, int(chunk_mb * 1024 ** 2 // (times.size * n_lon * 8)))
+        for start in range(0, n_lat, rows_per_chunk):
+            rows = slice(start, min(start + rows_per_chunk, n_lat))
+            with NETCDF_LOCK:
+                block = data.isel(time=times, lat=rows).values.astype(np.float64)
+
+            # Cells that are NaN in every year stay NaN
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                cube[0, month - 1, rows] = np.nanmean(block, axis=0)
+                cube[1, month - 1, rows] = np.nanstd(block, axis=0)
+                cube[2:, month - 1, rows] = nan_quantiles(block, QUANTILES)
+
+                # Missing years compare False and are left out of the denominator
+                valid = np.count_nonzero(~np.isnan(block), axis=0)
+                for i, (comparison, value) in enumerate(thresholds):
+                    beyond = block > value if comparison == '>' else block < value
+                    exceedance[i, month - 1, rows] = np.count_nonzero(beyond, axis=0) / valid
+
+    return cube, exceedance, years
+
+
+def build_variable(name, path, output_dir, chunk_mb=CHUNK_MB, crop=CROP_TO_COVERAGE):
+    """Reduce one monthly series file into output_dir/<name>.nc, returning a short summary"""
+    source = MONTHLY_SOURCES[name]
+    start = time.perf_counter()
+
+    with NETCDF_LOCK:
+        ds = xr.open_dataset(path)
+    try:
+        var_name = source['variable']
+        if var_name not in ds.data_vars:
+            candidates = [v for v in ds.data_vars if {'time', 'lat', 'lon'} <= set(ds[v].dims)]
+            if not candidates:
+                raise Exception(f"No time/lat/lon variable found in {os.path.basename(path)}")
+            var_name = candidates[0]
+
+        data = ds[var_name].transpose('time', 'lat', 'lon')
+        if crop:
+            data = crop_to_bounds(data, CROP_BOUNDS, CROP_MARGIN)
+        risks = [(risk, comparison, value) for risk, (variable, comparison, value) in EXCEEDANCE_THRESHOLDS.items()
+                 if variable == name]
+        cube, exceedance, years = reduce_monthly(data, chunk_mb, [(c, v) for _, c, v in risks])
+
+        result = xr.Dataset(
+            {
+                'climatology': (('statistic', 'month', 'lat', 'lon'), cube, dict(data.attrs)),
+                'exceedance': (('risk', 'month', 'lat', 'lon'), exceedance,
+                               {'long_name': "Fraction of years whose monthly mean is beyond the risk threshold",
+                                'units': '1'})
+            },
+            coords={'statistic': list(STATISTICS), 'month': np.arange(1, 13), 'lat': data['lat'].values,
+                    'lon': data['lon'].values, 'years': ('month', years),
+                    'risk': [r for r, _, _ in risks], 'comparison': ('risk', [c for _, c, _ in risks]),
+                    'threshold': ('risk', np.array([v for _, _, v in risks], dtype=np.float64))},
+            attrs={
+                'title': f"SUNRIZE monthly climatology of {source['product']} {var_name}",
+                'source': os.path.basename(path),
+                'period': f"{str(data['time'].values.min())[:7]} to {str(data['time'].values.max())[:7]}",
+                'history': f"{time.strftime('%Y-%m-%dT%H:%M:%S')} climatology.py build"
+            }
+        )
+    finally:
+        with NETCDF_LOCK:
+            ds.close()
+
+    # Write to a temporary name and swap in, so a running server never opens a half-written file
+    os.makedirs(output_dir, exist_ok=True)
+    output = os.path.join(output_dir, f"{name}.nc")
+    result.to_netcdf(output + '.tmp', format='NETCDF4')
+    os.replace(output + '.tmp', output)
+
+    return {'file': output, 'shape': list(cube.shape), 'years_per_month': years.tolist(),
+            'seconds': round(time.perf_counter() - start, 2)}
+
+
+def build_climatology(data_dir=None, output_dir=None, chunk_mb=CHUNK_MB):
+    """Build the cube of every variable whose monthly series is present in data_dir"""
+    data_dir = data_dir or DATA_DIR
+    output_dir = output_dir or CLIMATOLOGY_DIR
+    built = {}
+
+    for name, source in MONTHLY_SOURCES.items():
+        path = os.path.join(data_dir, os.environ.get(f"SUNRIZE_{name.upper()}_MONTHLY_FILE", source['file']))
+        if not os.path.exists(path):
+            print(f"Skipping {name}: {path} not found")
+            continue
+        built[name] = build_variable(name, path, output_dir, chunk_mb)
+        print(f"Built {name}: shape {built[name]['shape']}, years per month {built[name]['years_per_month']} "
+              f"in {built[name]['seconds']}s")
+
+    print(f"Climatology written to {output_dir}")
+    return built
+
+
+class MonthlyClimatology:
+    """Month lookups into the climatology cubes, opened lazily through a DatasetRegistry"""
+
+    def __init__(self, climatology_dir=None, retry_seconds=None):
+        self.climatology_dir = climatology_dir or CLIMATOLOGY_DIR
+        self.retry_seconds = RETRY_SECONDS if retry_seconds is None else retry_seconds
+        self.registry = DatasetRegistry(
+            data_dir=self.climatology_dir,
+            sources={raster_name(name, kind): {'file': f"{name}.nc", 'variable': kind, 'product': source['product'],
+                                               'fallback': False}
+                     for name, source in DATASET_SOURCES.items() for kind in ('climatology', 'exceedance')},
+            use_store=False, shared_manifest=''
+        )
+        self.dataset_version = get_registry().version
+        self.last_retry = time.monotonic()
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self):
+        """Reopen the cubes when the main registry reloads, and retry failed ones every retry_seconds"""
+        version = get_registry().version
+        now = time.monotonic()
+        if version == self.dataset_version and now - self.last_retry < self.retry_seconds:
+            return
+        with self._refresh_lock:
+            if version != self.dataset_version:
+                self.registry.reload()
+                self.dataset_version = version
+            elif now - self.last_retry >= self.retry_seconds:
+                self.registry.retry_failed()
+            self.last_retry = now
+
+    def has(self, name, kind='climatology'):
+        """True when a variable's raster has been built"""
+        self.refresh()
+        try:
+            self.registry.get(raster_name(name, kind))
+            return True
+        except Exception:
+            return False
+
+    def sample(self, name, month, lat, lon, statistic='mean', method=None):
+        """Climatology statistic of a variable in a month (1-12) at the point(s), see GridVariable.sample"""
+        self.refresh()
+        variable = self.registry.get(raster_name(name))
+        statistics = list(variable.data['statistic'].values)
+        return variable.sample_at((statistics.index(statistic), month - 1), lat, lon, method)
+
+    def exceedance(self, month, lat, lon, method=None):
+        """Exceedance probability of every risk with a built raster at the point(s), plus years of record
+
+        month may be an array matching lat/lon; returns ({}, 0) when no raster has been built
+        """
+        probabilities = {}
+        years = None
+        months = np.asarray(month) - 1
+        for name in DATASET_SOURCES:
+            if not self.has(name, 'exceedance'):
+                continue
+            variable = self.registry.get(raster_name(name, 'exceedance'))
+            for i, risk in enumerate(variable.data['risk'].values.tolist()):
+                probabilities[risk] = variable.sample_at((i, months), lat, lon, method)
+            record = variable.data['years'].values[months]
+            years = record if years is None else np.minimum(years, record)
+        return probabilities, (0 if years is None else years)
+
+    def stats(self):
+        return self.registry.stats()
+
+
+_climatology = None
+_climatology_lock = threading.Lock()
+
+
+def get_climatology():
+    """Process-wide climatology shared by every analyzer"""
+    global _climatology
+    if _climatology is None:
+        with _climatology_lock:
+            if _climatology is None:
+                _climatology = MonthlyClimatology()
+    return _climatology
+
+
+def describe_climatology(climatology_dir=None):
+    """Shape and years per month of every built cube"""
+    climatology_dir = climatology_dir or CLIMATOLOGY_DIR
+    results = {}
+    for name in DATASET_SOURCES:
+        path = os.path.join(climatology_dir, f"{name}.nc")
+        if not os.path.exists(path):
+            results[name] = 'missing'
+        else:
+            with xr.open_dataset(path) as ds:
+                results[name] = {'shape': list(ds['climatology'].shape), 'period': ds.attrs.get('period'),
+                                 'years_per_month': ds['years'].values.tolist()}
+        print(f"{name}: {results[name]}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or describe the monthly NASA climatology cubes")
+    parser.add_argument('command', choices=['build', 'describe'])
+    parser.add_argument('--data-dir', default=None)
+    parser.add_argument('--output-dir', default=None)
+    parser.add_argument('--chunk-mb', type=float, default=CHUNK_MB)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_climatology(args.data_dir, args.output_dir, args.chunk_mb)
+    else:
+        describe_climatology(args.output_dir)
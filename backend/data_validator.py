@@ -1,41 +1,58 @@
-import xarray as xr
 import numpy as np
+from dataset_registry import get_registry, COVERAGE_BOUNDS
+from point_cache import get_point_cache
+from metrics import stage
 
 def validate_location_coverage(lat, lon):
     """Check if location is within Southern Asia NASA data coverage"""
-    # Southern Asia bounds
-    lat_min, lat_max = 5, 40    # 5°N to 40°N
-    lon_min, lon_max = 60, 100  # 60°E to 100°E
-    
-    if not (lat_min <= lat <= lat_max and lon_min <= lon <= lon_max):
-        return False, f"Location ({lat:.2f}°N, {lon:.2f}°E) is outside Southern Asia coverage area"
-    
-    return True, "Location within NASA data coverage"
+    with stage('coverage_check'):
+        # Southern Asia bounds: 5°N to 40°N, 60°E to 100°E
+        lat_min, lat_max = COVERAGE_BOUNDS['lat_min'], COVERAGE_BOUNDS['lat_max']
+        lon_min, lon_max = COVERAGE_BOUNDS['lon_min'], COVERAGE_BOUNDS['lon_max']
+        
+        if not (lat_min <= lat <= lat_max and lon_min <= lon <= lon_max):
+            return False, f"Location ({lat:.2f}°N, {lon:.2f}°E) is outside Southern Asia coverage area"
+        
+        return True, "Location within NASA data coverage"
+
+def coverage_mask(lats, lons):
+    """Vectorized validate_location_coverage: True where a location is inside Southern Asia"""
+    with stage('coverage_check'):
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        return ((lats >= COVERAGE_BOUNDS['lat_min']) & (lats <= COVERAGE_BOUNDS['lat_max']) &
+                (lons >= COVERAGE_BOUNDS['lon_min']) & (lons <= COVERAGE_BOUNDS['lon_max']))
+
+def get_nasa_data_batch(lats, lons, method=None):
+    """Extract actual NASA data for arrays of coordinates in one lookup per dataset
 
-def get_actual_nasa_data(lat, lon):
+    method is 'nearest' or 'bilinear' (default SUNRIZE_SAMPLE_METHOD)
+    """
+    try:
+        registry = get_registry()
+        with stage('grid_read'):
+            return {
+                'precipitation_mm': registry.get('precipitation').sample(lats, lons, method),
+                'temperature_k': registry.get('temperature').sample(lats, lons, method),
+                'wind_speed_ms': registry.get('wind').sample(lats, lons, method)
+            }
+    except Exception as e:
+        raise Exception(f"Failed to extract NASA data: {str(e)}")
+
+def get_actual_nasa_data(lat, lon, method=None):
     """Extract actual NASA data for given coordinates"""
     try:
-        # Load datasets
-        precip_ds = xr.open_dataset("precipitation.nc")
-        temp_ds = xr.open_dataset("temp.nc")
-        wind_ds = xr.open_dataset("wind.nc")
-        
-        # Get variable names dynamically
-        precip_var = [v for v in precip_ds.data_vars][0]
-        temp_var = [v for v in temp_ds.data_vars][0]
-        wind_var = [v for v in wind_ds.data_vars][0]
-        
-        # Extract data at location
-        precip_data = precip_ds[precip_var].sel(lat=lat, lon=lon, method='nearest')
-        temp_data = temp_ds[temp_var].sel(lat=lat, lon=lon, method='nearest')
-        wind_data = wind_ds[wind_var].sel(lat=lat, lon=lon, method='nearest')
+        # Shared datasets, opened once per process
+        registry = get_registry()
         
-        return {
-            'precipitation_mm': float(precip_data.values),
-            'temperature_k': float(temp_data.values),
-            'wind_speed_ms': float(wind_data.values),
-            'data_source': 'NASA Earth Observation Data'
-        }
+        # Extract data at location (cached per grid cell, or per point when interpolating)
+        with stage('grid_read'):
+            return get_point_cache().get_or_compute('nasa_data', registry.cell_key(lat, lon, method), lambda: {
+                'precipitation_mm': registry.get('precipitation').sample(lat, lon, method),
+                'temperature_k': registry.get('temperature').sample(lat, lon, method),
+                'wind_speed_ms': registry.get('wind').sample(lat, lon, method),
+                'data_source': 'NASA Earth Observation Data'
+            })
         
     except Exception as e:
         raise Exception(f"Failed to extract NASA data: {str(e)}")
@@ -0,0 +1,406 @@
+"""
+Process-wide registry of the NASA grids served by the API
+Each variable is opened once per process, loaded into memory and shared read-only
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import xarray as xr
+
+from grid_index import GridIndexer
+import grid_store
+import shared_grids
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DATA_DIR = os.environ.get('SUNRIZE_DATA_DIR', os.path.dirname(os.path.abspath(__file__)))
+
+# Region served by the API (Southern Asia), see data_validator.validate_location_coverage
+COVERAGE_BOUNDS = {'lat_min': 5, 'lat_max': 40, 'lon_min': 60, 'lon_max': 100}
+
+# Grids are cropped to the served region plus this margin (degrees) and stored as float32
+CROP_TO_COVERAGE = os.environ.get('SUNRIZE_CROP', '1') != '0'
+CROP_MARGIN = float(os.environ.get('SUNRIZE_CROP_MARGIN', '1.0'))
+GRID_DTYPE = np.float32
+
+# netCDF4/HDF5 is not thread-safe, so every NetCDF read in the process is serialized on this lock
+NETCDF_LOCK = threading.Lock()
+
+# Point lookups snap to the nearest cell or interpolate bilinearly between the four surrounding cells
+SAMPLE_METHODS = ('nearest', 'bilinear')
+SAMPLE_METHOD = os.environ.get('SUNRIZE_SAMPLE_METHOD', 'nearest')
+
+# Prefer the memory-mapped grid store (see grid_store.py) when it has been built
+USE_GRID_STORE = os.environ.get('SUNRIZE_USE_STORE', '1') != '0'
+
+
+def parse_bounds(text):
+    """'lat_min,lat_max,lon_min,lon_max' -> bounds dict"""
+    lat_min, lat_max, lon_min, lon_max = [float(v) for v in text.split(',')]
+    return {'lat_min': lat_min, 'lat_max': lat_max, 'lon_min': lon_min, 'lon_max': lon_max}
+
+
+CROP_BOUNDS = parse_bounds(os.environ['SUNRIZE_BBOX']) if os.environ.get('SUNRIZE_BBOX') else COVERAGE_BOUNDS
+
+DATASET_SOURCES = {
+    'precipitation': {
+        'file': 'precipitation.nc',
+        'variable': 'GPM_3IMERGM_07_precipitation',
+        'product': 'GPM IMERG'
+    },
+    'temperature': {
+        'file': 'temp.nc',
+        'variable': 'FLDAS_NOAH01_C_GL_M_001_RadT_tavg',
+        'product': 'FLDAS'
+    },
+    'wind': {
+        'file': 'wind.nc',
+        'variable': 'M2TMNXFLX_5_12_4_SPEED',
+        'product': 'MERRA-2'
+    }
+}
+
+
+class GridVariable:
+    """Read-only in-memory copy of one NASA variable"""
+
+    def __init__(self, name, data, path, load_seconds, source_nbytes=None, storage='memory', cropped_to=None):
+        self.name = name
+        self.data = data
+        self.path = path
+        self.load_seconds = load_seconds
+        self.source_nbytes = source_nbytes if source_nbytes is not None else data.nbytes
+        self.storage = storage
+        # Bounds plus margin the grid was cropped to, None for the file's full extent
+        self.cropped_to = cropped_to
+        self.indexer = GridIndexer(data['lat'].values, data['lon'].values)
+
+    @property
+    def values(self):
+        return self.data.values
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def sample(self, lat, lon, method=None):
+        """Grid value for a coordinate, or an array of values for coordinate arrays
+
+        method is 'nearest' (the cell containing the point) or 'bilinear', default SUNRIZE_SAMPLE_METHOD
+        """
+        return self._sample((Ellipsis,), lat, lon, method)
+
+    def sample_at(self, index, lat, lon, method=None):
+        """Like sample, for one slice of the leading axes, e.g. index (statistic, month) of a climatology cube"""
+        return self._sample(tuple(index), lat, lon, method)
+
+    def _sample(self, index, lat, lon, method):
+        method = method or SAMPLE_METHOD
+        if method == 'nearest':
+            rows, cols = self.indexer.cell(lat, lon)
+            values = self.values[index + (rows, cols)].astype(np.float64)
+        elif method == 'bilinear':
+            # One gather of the four corners of every point, weighted on the last axis
+            rows, cols, weights = self.indexer.corners(lat, lon)
+            # Per-point leading indices (e.g. one month per point) broadcast over the corner axis
+            index = tuple(np.asarray(i)[..., None] if np.ndim(i) else i for i in index)
+            corners = self.values[index + (rows, cols)].astype(np.float64)
+            valid = ~np.isnan(corners)
+            weight = np.where(valid, weights, 0).sum(axis=-1)
+            total = np.where(valid, corners * weights, 0).sum(axis=-1)
+            # Corners off the data (coastlines) are left out and the rest renormalized
+            with np.errstate(invalid='ignore', divide='ignore'):
+                values = np.where(weight > 0, total / weight, np.nan)
+        else:
+            raise ValueError(f"Unknown sample method '{method}', expected one of {', '.join(SAMPLE_METHODS)}")
+
+        outside = self.outside_crop(lat, lon, method)
+        if outside is not None:
+            values = np.where(outside, np.nan, values)
+
+        if np.ndim(lat) == 0 and np.ndim(lon) == 0:
+            return float(values)
+        return values
+
+    def outside_crop(self, lat, lon, method=None):
+        """True where the cells a point needs may have been cropped away, None for an uncropped grid
+
+        Cropping keeps the cells whose centres are inside the box, so a nearest lookup is exact up to half
+        a cell inside its edge and a bilinear one up to a whole cell; beyond that the lookup would clamp
+        to the crop edge and return a neighbour's value
+        """
+        if self.cropped_to is None:
+            return None
+        box = self.cropped_to
+        margin = box.get('margin', 0)
+        reach = 1.0 if (method or SAMPLE_METHOD) == 'bilinear' else 0.5
+        lat_pad = abs(self.indexer.lat.step) * reach
+        lon_pad = abs(self.indexer.lon.step) * reach
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        return ((lat < box['lat_min'] - margin + lat_pad) | (lat > box['lat_max'] + margin - lat_pad) |
+                (lon < box['lon_min'] - margin + lon_pad) | (lon > box['lon_max'] + margin - lon_pad))
+
+    def describe(self):
+        return {
+            'file': os.path.basename(self.path),
+            'variable': self.data.name,
+            'shape': list(self.data.shape),
+            'dtype': str(self.data.dtype),
+            'storage': self.storage,
+            'memory_mb': round(self.nbytes / 1024 ** 2, 3),
+            'source_memory_mb': round(self.source_nbytes / 1024 ** 2, 3),
+            'memory_saved_mb': round((self.source_nbytes - self.nbytes) / 1024 ** 2, 3),
+            'load_seconds': round(self.load_seconds, 4),
+            'cropped_to': self.cropped_to,
+            'grid': self.indexer.describe()
+        }
+
+
+class DatasetRegistry:
+    """Lazily opens each configured variable once and hands out shared read-only views"""
+
+    def __init__(self, data_dir=None, sources=None, crop=None, bounds=None, margin=None,
+                 use_store=None, store_dir=None, shared_manifest=None):
+        self.data_dir = data_dir or DATA_DIR
+        self.use_store = USE_GRID_STORE if use_store is None else use_store
+        self.store_dir = store_dir or grid_store.default_store_dir(self.data_dir)
+        self.sources = sources or DATASET_SOURCES
+        self.crop = CROP_TO_COVERAGE if crop is None else crop
+        self.bounds = bounds or CROP_BOUNDS
+        self.margin = CROP_MARGIN if margin is None else margin
+        self.version = 0
+        self._variables = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+        # Worker side of the shared-memory mode (see shared_grids.py)
+        self.shared_manifest = os.environ.get(shared_grids.MANIFEST_ENV) if shared_manifest is None else shared_manifest
+        self.shared_generation = None
+        self.shared_watch_stop = threading.Event()
+        self._shared_blocks = []
+
+    def get(self, name):
+        """Return the loaded variable, opening its file on first use"""
+        variable = self._variables.get(name)
+        if variable is not None:
+            return variable
+
+        with self._lock:
+            if name not in self._variables and name not in self._errors:
+                try:
+                    self._variables[name] = self._load(name)
+                except Exception as e:
+                    self._errors[name] = f"Failed to load {name} dataset: {e}"
+                    print(self._errors[name])
+
+        if name in self._errors:
+            raise Exception(self._errors[name])
+        return self._variables[name]
+
+    def cell_key(self, lat, lon, method=None):
+        """Dataset version plus the snapped (row, col) of a coordinate in every variable
+
+        Bilinear values vary within a cell, so those are keyed on the coordinate itself (rounded to ~10 m)
+        """
+        version = self.version
+        if (method or SAMPLE_METHOD) == 'bilinear':
+            return version, ('bilinear', round(float(lat), 4), round(float(lon), 4))
+        cells = []
+        for name in self.sources:
+            variable = self.get(name)
+            if variable.outside_crop(lat, lon, 'nearest'):
+                # Served as missing, so it must not share the entry of the clamped edge cell
+                cells.append((-1, -1))
+                continue
+            rows, cols = variable.indexer.cell(lat, lon)
+            cells.append((int(rows), int(cols)))
+        return version, tuple(cells)
+
+    def load_all(self):
+        """Eagerly load every configured variable, returning the names that failed"""
+        failed = []
+        for name in self.sources:
+            try:
+                self.get(name)
+            except Exception:
+                failed.append(name)
+        return failed
+
+    def retry_failed(self):
+        """Forget failed opens so the next access tries those files again"""
+        with self._lock:
+            self._errors = {}
+
+    def reload(self):
+        """Drop every loaded variable so the next access reopens the files"""
+        with self._lock:
+            self._variables = {}
+            self._errors = {}
+            self.version += 1
+            blocks, self._shared_blocks = self._shared_blocks, []
+        shared_grids.close_blocks(blocks)
+
+    def close(self):
+        """Release every grid and detach from shared memory (process shutdown)"""
+        self.shared_watch_stop.set()
+        self.reload()
+
+    def _load(self, name):
+        if name not in self.sources:
+            raise KeyError(f"Unknown dataset '{name}'")
+
+        if self.shared_manifest:
+            variable = self._load_from_shared(name)
+            if variable is not None:
+                return variable
+
+        if self.use_store:
+            variable = self._load_from_store(name)
+            if variable is not None:
+                return variable
+
+        source = self.sources[name]
+        path = self.source_path(name)
+        start = time.perf_counter()
+
+        with NETCDF_LOCK, xr.open_dataset(path) as ds:
+            var_name = source['variable']
+            if var_name not in ds.data_vars:
+                if source.get('fallback') is False:
+                    raise Exception(f"{var_name} not found in {os.path.basename(path)}")
+                # Fall back to the first lat/lon grid in the file
+                candidates = [v for v in ds.data_vars if {'lat', 'lon'} <= set(ds[v].dims)]
+                if not candidates:
+                    raise Exception(f"No lat/lon variable found in {source['file']}")
+                var_name = candidates[0]
+
+            # Keep lat/lon as the trailing axes so cells index as values[..., row, col]
+            data = ds[var_name].transpose(..., 'lat', 'lon')
+            source_nbytes = data.size * data.dtype.itemsize
+
+            if self.crop:
+                data = self._crop(data)
+            data = data.load()
+
+        # Contiguous float32 copy, detached from the file
+        values = np.ascontiguousarray(data.values, dtype=GRID_DTYPE)
+        values.flags.writeable = False
+        data = data.copy(data=values)
+
+        if self.crop:
+            print(f"{name}: cropped {source_nbytes / 1024 ** 2:.1f} MB -> {data.nbytes / 1024 ** 2:.1f} MB")
+        return GridVariable(name, data, path, time.perf_counter() - start, source_nbytes,
+                            cropped_to=self.cropped_to())
+
+    def _load_from_shared(self, name):
+        """Attach to the supervisor's shared block, or None if it does not publish this variable"""
+        start = time.perf_counter()
+        for attempt in range(2):
+            manifest = shared_grids.read_manifest(self.shared_manifest)
+            entry = manifest['datasets'].get(name)
+            if entry is None:
+                return None
+            try:
+                data, block = shared_grids.attach_variable(entry)
+                break
+            except FileNotFoundError:
+                # The supervisor swapped generations between reading the manifest and attaching
+                if attempt:
+                    raise
+        self._shared_blocks.append(block)
+        self.shared_generation = manifest['generation']
+        return GridVariable(name, data, entry['path'], time.perf_counter() - start,
+                            entry['source_nbytes'], storage='shared', cropped_to=entry.get('cropped_to'))
+
+    def _load_from_store(self, name):
+        """Memory-map a prebuilt grid, or None if it is missing, older than its NetCDF source, or was built
+        from another source file or crop"""
+        header = grid_store.read_header(self.store_dir, name)
+        if header is None:
+            return None
+
+        source_path = self.source_path(name)
+        if os.path.basename(source_path) != header['source']['file']:
+            print(f"Grid store for {name} was built from {header['source']['file']}, not "
+                  f"{os.path.basename(source_path)}, reading NetCDF instead")
+            return None
+        if header.get('cropped_to') != self.cropped_to():
+            print(f"Grid store for {name} was cropped to {header.get('cropped_to')}, not {self.cropped_to()}, "
+                  f"reading NetCDF instead")
+            return None
+        if grid_store.is_stale(header, source_path):
+            print(f"Grid store for {name} is older than {header['source']['file']}, reading NetCDF instead")
+            return None
+
+        start = time.perf_counter()
+        data = grid_store.open_variable(self.store_dir, header)
+        return GridVariable(name, data, source_path, time.perf_counter() - start,
+                            header.get('source_nbytes'), storage='memmap', cropped_to=header.get('cropped_to'))
+
+    def source_path(self, name):
+        """NetCDF file of a variable, honouring SUNRIZE_<NAME>_FILE overrides"""
+        return os.path.join(self.data_dir, os.environ.get(f"SUNRIZE_{name.upper()}_FILE", self.sources[name]['file']))
+
+    def cropped_to(self):
+        """Bounds plus margin grids are cropped to, None when cropping is off"""
+        return dict(self.bounds, margin=self.margin) if self.crop else None
+
+    def _crop(self, data):
+        """Subset a grid to the configured bounding box plus margin before reading it"""
+        return crop_to_bounds(data, self.bounds, self.margin)
+
+    def stats(self):
+        """Load time and memory report for /health"""
+        variables = dict(self._variables)
+        return {
+            'version': self.version,
+            'data_dir': self.data_dir,
+            'store_dir': self.store_dir if self.use_store else None,
+            'shared_generation': self.shared_generation,
+            'cropped_to': self.cropped_to(),
+            'datasets': {name: variable.describe() for name, variable in variables.items()},
+            'errors': dict(self._errors),
+            'total_memory_mb': round(sum(v.nbytes for v in variables.values()) / 1024 ** 2, 3),
+            'total_load_seconds': round(sum(v.load_seconds for v in variables.values()), 4),
+            'peak_rss_mb': peak_rss_mb()
+        }
+
+
+def crop_to_bounds(data, bounds, margin):
+    """Lazy lat/lon subset of a DataArray to bounds plus margin (degrees)"""
+    lat = data['lat'].values
+    lon = data['lon'].values
+    rows = np.flatnonzero((lat >= bounds['lat_min'] - margin) & (lat <= bounds['lat_max'] + margin))
+    cols = np.flatnonzero((lon >= bounds['lon_min'] - margin) & (lon <= bounds['lon_max'] + margin))
+    if rows.size == 0 or cols.size == 0:
+        raise Exception(f"{data.name} does not overlap the served region {bounds}")
+    return data.isel(lat=slice(rows[0], rows[-1] + 1), lon=slice(cols[0], cols[-1] + 1))
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process, None where unsupported"""
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Process-wide registry shared by every analyzer"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = DatasetRegistry()
+                if _registry.shared_manifest:
+                    shared_grids.watch_manifest(_registry)
+    return _registry
@@ -44,23 +44,40 @@ class WeatherFeatureEngineer:
         
         return df
     
-    def create_weather_features(self, df):
-        """Engineer weather-specific features"""
-        weather_cols = ['temperature', 'humidity', 'pressure', 'precipitation']
+    def create_weather_features(self, df, group_cols=None, date_col='date'):
+        """Engineer weather-specific features
         
-        for col in weather_cols:
-            if col in df.columns:
-                # Statistical features
-                df[f'{col}_rolling_7d'] = df[col].rolling(7, min_periods=1).mean()
-                df[f'{col}_rolling_30d'] = df[col].rolling(30, min_periods=1).mean()
-                df[f'{col}_std_7d'] = df[col].rolling(7, min_periods=1).std()
+        Rolling statistics, anomalies and trends are computed per location (group_cols, default lat/lon)
+        in one vectorized pass over the rows sorted by location and date, so windows never cross from one
+        location into the next. Features are float32 and rows keep their original order.
+        """
+        weather_cols = [col for col in ['temperature', 'humidity', 'pressure', 'precipitation'] if col in df.columns]
+        
+        if weather_cols:
+            order, first = self.location_order(df, group_cols, date_col)
+            # Sorted position of every original row, to scatter the features back
+            restore = np.empty_like(order)
+            restore[order] = np.arange(order.size)
+            
+            for col in weather_cols:
+                values = df[col].to_numpy(dtype=np.float64)[order]
                 
-                # Anomaly detection
-                df[f'{col}_anomaly'] = np.abs(df[col] - df[f'{col}_rolling_30d'])
+                # Statistical features
+                rolling_7d, std_7d = self.rolling_stats(values, first, 7)
+                rolling_30d, _ = self.rolling_stats(values, first, 30)
                 
-                # Trend features
-                df[f'{col}_trend'] = df[col].diff()
-                df[f'{col}_trend_7d'] = df[f'{col}_rolling_7d'].diff()
+                features = {
+                    f'{col}_rolling_7d': rolling_7d,
+                    f'{col}_rolling_30d': rolling_30d,
+                    f'{col}_std_7d': std_7d,
+                    # Anomaly detection
+                    f'{col}_anomaly': np.abs(values - rolling_30d),
+                    # Trend features
+                    f'{col}_trend': self.group_diff(values, first),
+                    f'{col}_trend_7d': self.group_diff(rolling_7d, first)
+                }
+                for name, feature in features.items():
+                    df[name] = feature[restore].astype(np.float32)
         
         # Composite indices
         if all(col in df.columns for col in ['temperature', 'humidity']):
@@ -68,6 +85,68 @@ class WeatherFeatureEngineer:
         
         return df
     
+    def location_order(self, df, group_cols=None, date_col='date'):
+        """Row order sorted by location then date, and the sorted position of each row's first location row"""
+        if group_cols is None:
+            group_cols = [col for col in ('lat', 'lon') if col in df.columns]
+        if group_cols:
+            groups = df.groupby(group_cols, sort=False, dropna=False).ngroup().to_numpy()
+        else:
+            groups = np.zeros(len(df), dtype=np.int64)
+        
+        if date_col in df.columns:
+            order = np.lexsort((pd.to_datetime(df[date_col]).to_numpy(), groups))
+        else:
+            order = np.argsort(groups, kind='stable')
+        
+        sorted_groups = groups[order]
+        starts = np.ones(order.size, dtype=bool)
+        starts[1:] = sorted_groups[1:] != sorted_groups[:-1]
+        first = np.maximum.accumulate(np.where(starts, np.arange(order.size), 0))
+        return order, first
+    
+    def rolling_stats(self, values, first, window):
+        """Trailing mean and sample std over up to window rows of the same location, skipping NaN
+        
+        Matches Series.rolling(window, min_periods=1) run separately on each location
+        """
+        n = values.size
+        valid = ~np.isnan(values)
+        
+        # Centre on each location's mean so the running sums of squares keep their precision
+        starts = np.flatnonzero(first == np.arange(n))
+        sums = np.add.reduceat(np.where(valid, values, 0), starts) if n else np.zeros(0)
+        counts = np.add.reduceat(valid.astype(np.int64), starts) if n else np.zeros(0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            offset = np.nan_to_num(sums / counts)[np.repeat(np.arange(starts.size), np.diff(np.append(starts, n)))]
+        centred = np.where(valid, values - offset, 0)
+        
+        # Window sums as differences of running sums, the window start clipped to the location's first row
+        low = np.maximum(np.arange(n) - window + 1, first)
+        high = np.arange(1, n + 1)
+        
+        def window_sum(x):
+            running = np.concatenate([[0], np.cumsum(x)])
+            return running[high] - running[low]
+        
+        count = window_sum(valid.astype(np.int64))
+        total = window_sum(centred)
+        squares = window_sum(centred * centred)
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, total / count + offset, np.nan)
+            variance = np.maximum(squares - total * total / count, 0) / (count - 1)
+        std = np.where(count > 1, np.sqrt(variance), np.nan)
+        return mean, std
+    
+    def group_diff(self, values, first):
+        """Difference from the previous row of the same location (NaN on each location's first row)"""
+        diff = np.empty_like(values)
+        diff[0:1] = np.nan
+        diff[1:] = values[1:] - values[:-1]
+        diff[first == np.arange(values.size)] = np.nan
+        return diff
+    
     def calculate_heat_index(self, temp_f, humidity):
         """Calculate heat index from temperature and humidity"""
         hi = 0.5 * (temp_f + 61.0 + ((temp_f - 68.0) * 1.2) + (humidity * 0.094))
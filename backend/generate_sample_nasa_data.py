@@ -1,9 +1,11 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 
-def generate_nasa_sample_data():
-    """Generate realistic NASA-style sample data for immediate development"""
+def generate_nasa_sample_data(seed=42):
+    """Generate realistic NASA-style sample data for immediate development
+    
+    For larger gridded data (NetCDF or CSV) see synthetic_data.py
+    """
     
     # Date range: 2020-2023
     dates = pd.date_range('2020-01-01', '2023-12-31', freq='D')
@@ -15,38 +17,32 @@ def generate_nasa_sample_data():
         {'lat': 25.7617, 'lon': -80.1918, 'name': 'Miami'}
     ]
     
-    all_data = []
+    # Location-specific adjustments: (temperature offset, precipitation offset, precipitation scale)
+    adjustments = {'Miami': (10, 0.3, 1.0), 'Los Angeles': (5, 0.0, 0.3)}
+    temp_offset, precip_offset, precip_scale = np.array(
+        [adjustments.get(loc['name'], (0, 0.0, 1.0)) for loc in locations]).T
+    
+    # Every (location, date) pair at once, rows ordered by location then date
+    rng = np.random.default_rng(seed)
+    shape = (len(locations), len(dates))
+    day_of_year = np.asarray(dates.dayofyear, dtype=np.float64)[None, :]
     
-    for loc in locations:
-        for date in dates:
-            day_of_year = date.dayofyear
-            
-            # Realistic seasonal patterns
-            temp_base = 15 + 10 * np.sin(2 * np.pi * (day_of_year - 80) / 365)
-            precip_base = 0.1 + 0.4 * np.sin(2 * np.pi * (day_of_year + 90) / 365)
-            wind_base = 3 + 2 * np.sin(2 * np.pi * day_of_year / 365)
-            
-            # Add location-specific adjustments
-            if 'Miami' in loc['name']:
-                temp_base += 10  # Warmer
-                precip_base += 0.3  # More rain
-            elif 'Los Angeles' in loc['name']:
-                temp_base += 5
-                precip_base *= 0.3  # Less rain
-            
-            all_data.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'latitude': loc['lat'],
-                'longitude': loc['lon'],
-                'location': loc['name'],
-                'precipitation_mm': max(0, precip_base + np.random.normal(0, 0.2)),
-                'temperature_c': temp_base + np.random.normal(0, 3),
-                'wind_speed_ms': max(0, wind_base + np.random.normal(0, 1)),
-                'humidity_percent': 50 + 30 * np.sin(2 * np.pi * day_of_year / 365) + np.random.normal(0, 10),
-                'cloud_cover_fraction': np.clip(0.3 + 0.4 * np.sin(2 * np.pi * (day_of_year + 180) / 365) + np.random.normal(0, 0.1), 0, 1)
-            })
+    # Realistic seasonal patterns
+    temp_base = 15 + 10 * np.sin(2 * np.pi * (day_of_year - 80) / 365) + temp_offset[:, None]
+    precip_base = (0.1 + 0.4 * np.sin(2 * np.pi * (day_of_year + 90) / 365)) * precip_scale[:, None] + precip_offset[:, None]
+    wind_base = 3 + 2 * np.sin(2 * np.pi * day_of_year / 365)
     
-    df = pd.DataFrame(all_data)
+    df = pd.DataFrame({
+        'date': np.tile(dates.strftime('%Y-%m-%d').values, len(locations)),
+        'latitude': np.repeat([loc['lat'] for loc in locations], len(dates)),
+        'longitude': np.repeat([loc['lon'] for loc in locations], len(dates)),
+        'location': np.repeat([loc['name'] for loc in locations], len(dates)),
+        'precipitation_mm': np.maximum(0, precip_base + rng.normal(0, 0.2, shape)).ravel(),
+        'temperature_c': (temp_base + rng.normal(0, 3, shape)).ravel(),
+        'wind_speed_ms': np.maximum(0, wind_base + rng.normal(0, 1, shape)).ravel(),
+        'humidity_percent': (50 + 30 * np.sin(2 * np.pi * day_of_year / 365) + rng.normal(0, 10, shape)).ravel(),
+        'cloud_cover_fraction': np.clip(0.3 + 0.4 * np.sin(2 * np.pi * (day_of_year + 180) / 365) + rng.normal(0, 0.1, shape), 0, 1).ravel()
+    })
     
     # Save as separate CSV files (like Giovanni exports)
     for var in ['precipitation_mm', 'temperature_c', 'wind_speed_ms']:
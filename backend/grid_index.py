@@ -0,0 +1,122 @@
+"""
+Coordinate to grid-cell resolver for the NASA lat/lon grids
+Regular axes are resolved arithmetically, irregular ones with a binary search; points resolve either to
+their nearest cell or to the four surrounding cells with bilinear weights
+"""
+import numpy as np
+
+# Spacing may jitter by this fraction of a step (float32 coordinates) and still count as regular
+REGULAR_TOLERANCE = 1e-3
+
+
+class GridAxis:
+    """Nearest-cell lookup along one coordinate axis"""
+
+    def __init__(self, coords):
+        coords = np.asarray(coords, dtype=np.float64)
+        if coords.ndim != 1 or coords.size == 0:
+            raise ValueError("Grid axis needs a non-empty 1-D coordinate array")
+
+        self.coords = coords
+        self.size = coords.size
+        self.start = coords[0]
+        self.step = (coords[-1] - coords[0]) / (self.size - 1) if self.size > 1 else 0.0
+
+        steps = np.diff(coords)
+        self.regular = bool(
+            self.size > 1 and self.step != 0 and
+            np.all(np.abs(steps - self.step) <= abs(self.step) * REGULAR_TOLERANCE)
+        )
+
+        if not self.regular:
+            # searchsorted needs ascending coordinates
+            self._order = np.argsort(coords, kind='stable')
+            self._sorted = coords[self._order]
+
+    def index(self, values):
+        """Nearest cell index for a scalar or array of coordinates, clipped to the grid edge"""
+        values = np.asarray(values, dtype=np.float64)
+
+        if self.size == 1:
+            return np.zeros(values.shape, dtype=np.intp)
+
+        if self.regular:
+            # Arithmetic guess of the bracketing cells, refined against the real coordinates
+            left = np.clip(np.floor((values - self.start) / self.step), 0, self.size - 2).astype(np.intp)
+            right = left + 1
+            coords = self.coords
+        else:
+            right = np.clip(np.searchsorted(self._sorted, values), 1, self.size - 1)
+            left = right - 1
+            coords = self._sorted
+
+        # Ties go to the larger coordinate, like DataArray.sel(method='nearest')
+        take_left = np.abs(values - coords[left]) < np.abs(coords[right] - values)
+        if self.regular and self.step < 0:
+            take_left = np.abs(values - coords[left]) <= np.abs(coords[right] - values)
+        nearest = np.where(take_left, left, right)
+
+        return nearest if self.regular else self._order[nearest]
+
+    def bracket(self, values):
+        """Cells on either side of each coordinate and the linear weight of the second one
+
+        Coordinates beyond the grid are clamped to the edge cell
+        """
+        values = np.asarray(values, dtype=np.float64)
+
+        if self.size == 1:
+            zeros = np.zeros(values.shape, dtype=np.intp)
+            return zeros, zeros, np.zeros(values.shape)
+
+        if self.regular:
+            position = np.clip((values - self.start) / self.step, 0, self.size - 1)
+            lower = np.minimum(np.floor(position), self.size - 2).astype(np.intp)
+            upper = lower + 1
+            coords = self.coords
+        else:
+            upper = np.clip(np.searchsorted(self._sorted, values, side='right'), 1, self.size - 1)
+            lower = upper - 1
+            coords = self._sorted
+
+        # Measured on the real coordinates, so float32 jitter in a regular axis does not shift the weights
+        fraction = np.clip((values - coords[lower]) / (coords[upper] - coords[lower]), 0, 1)
+
+        if self.regular:
+            return lower, upper, fraction
+        return self._order[lower], self._order[upper], fraction
+
+
+class GridIndexer:
+    """Resolves (lat, lon) pairs to integer (row, column) indices of a lat/lon grid"""
+
+    def __init__(self, lat, lon):
+        self.lat = GridAxis(lat)
+        self.lon = GridAxis(lon)
+
+    @property
+    def regular(self):
+        return self.lat.regular and self.lon.regular
+
+    def cell(self, lat, lon):
+        """Row and column indices for scalars or broadcastable arrays"""
+        lat, lon = np.broadcast_arrays(np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64))
+        return self.lat.index(lat), self.lon.index(lon)
+
+    def corners(self, lat, lon):
+        """Row and column indices of the four cells around each point, shape (..., 4), and their bilinear weights"""
+        lat, lon = np.broadcast_arrays(np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64))
+        top, bottom, v = self.lat.bracket(lat)
+        left, right, u = self.lon.bracket(lon)
+
+        rows = np.stack([top, top, bottom, bottom], axis=-1)
+        cols = np.stack([left, right, left, right], axis=-1)
+        weights = np.stack([(1 - v) * (1 - u), (1 - v) * u, v * (1 - u), v * u], axis=-1)
+        return rows, cols, weights
+
+    def describe(self):
+        return {
+            'regular': self.regular,
+            'lat_step': round(float(self.lat.step), 6),
+            'lon_step': round(float(self.lon.step), 6)
+        }
@@ -0,0 +1,168 @@
+"""
+Compact on-disk grid store built offline from the NASA NetCDF inputs
+Each variable is a raw little-endian float32 file plus a JSON header, memory-mapped at startup
+
+    python grid_store.py build      # convert the configured NetCDF variables
+    python grid_store.py verify     # check the headers against the current source files
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import xarray as xr
+
+STORE_DTYPE = '<f4'
+HEADER_VERSION = 1
+
+
+def default_store_dir(data_dir):
+    return os.environ.get('SUNRIZE_GRID_STORE', os.path.join(data_dir, 'grid_store'))
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def header_path(store_dir, name):
+    return os.path.join(store_dir, f"{name}.json")
+
+
+def write_variable(variable, store_dir, bounds=None):
+    """Write one loaded GridVariable as <name>.f32 + <name>.json"""
+    os.makedirs(store_dir, exist_ok=True)
+    data = variable.data
+    values = np.ascontiguousarray(data.values, dtype=STORE_DTYPE)
+
+    raw_file = f"{variable.name}.f32"
+    source_stat = os.stat(variable.path)
+    header = {
+        'header_version': HEADER_VERSION,
+        'name': variable.name,
+        'variable': data.name,
+        'dims': list(data.dims),
+        'shape': list(values.shape),
+        'dtype': STORE_DTYPE,
+        'raw_file': raw_file,
+        'coords': {dim: data[dim].values.astype(np.float64).tolist() for dim in data.dims if dim in data.coords},
+        'units': data.attrs.get('units', ''),
+        'attrs': {k: str(v) for k, v in data.attrs.items()},
+        'cropped_to': bounds,
+        'source_nbytes': int(variable.source_nbytes),
+        'source': {
+            'file': os.path.basename(variable.path),
+            'sha256': file_sha256(variable.path),
+            'size': source_stat.st_size,
+            'mtime': source_stat.st_mtime
+        },
+        'built_at': datetime.now().isoformat()
+    }
+
+    # Write to temporary names and swap in, so a running server never maps a half-written file
+    raw_path = os.path.join(store_dir, raw_file)
+    values.tofile(raw_path + '.tmp')
+    with open(header_path(store_dir, variable.name) + '.tmp', 'w') as f:
+        json.dump(header, f)
+    os.replace(raw_path + '.tmp', raw_path)
+    os.replace(header_path(store_dir, variable.name) + '.tmp', header_path(store_dir, variable.name))
+
+    return header
+
+
+def read_header(store_dir, name):
+    """Header dict for a stored variable, or None if it was never built"""
+    path = header_path(store_dir, name)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def is_stale(header, source_path):
+    """True when the source NetCDF changed since the store was built (size/mtime check)"""
+    if not os.path.exists(source_path):
+        return False
+    stat = os.stat(source_path)
+    return stat.st_size != header['source']['size'] or stat.st_mtime != header['source']['mtime']
+
+
+def open_variable(store_dir, header):
+    """Memory-map a stored variable read-only as a DataArray"""
+    values = np.memmap(os.path.join(store_dir, header['raw_file']), dtype=header['dtype'],
+                       mode='r', shape=tuple(header['shape']))
+    coords = {dim: np.asarray(c) for dim, c in header['coords'].items()}
+    return xr.DataArray(values, coords=coords, dims=header['dims'], name=header['variable'],
+                        attrs=header['attrs'])
+
+
+def build_store(data_dir=None, store_dir=None):
+    """Convert every configured NetCDF variable into the store"""
+    from dataset_registry import DatasetRegistry
+
+    registry = DatasetRegistry(data_dir=data_dir, use_store=False)
+    store_dir = store_dir or default_store_dir(registry.data_dir)
+    bounds = registry.cropped_to()
+
+    built = {}
+    for name in registry.sources:
+        start = time.perf_counter()
+        try:
+            header = write_variable(registry.get(name), store_dir, bounds)
+        except Exception as e:
+            print(f"Skipping {name}: {e}")
+            continue
+        built[name] = header
+        print(f"Built {name}: shape {header['shape']} from {header['source']['file']} "
+              f"in {time.perf_counter() - start:.2f}s")
+
+    print(f"Grid store written to {store_dir}")
+    return built
+
+
+def verify_store(data_dir=None, store_dir=None):
+    """Recompute source checksums and report variables whose store is out of date"""
+    from dataset_registry import DatasetRegistry
+
+    registry = DatasetRegistry(data_dir=data_dir, use_store=False)
+    store_dir = store_dir or default_store_dir(registry.data_dir)
+    results = {}
+
+    for name in registry.sources:
+        header = read_header(store_dir, name)
+        if header is None:
+            results[name] = 'missing'
+            continue
+        source_path = registry.source_path(name)
+        if not os.path.exists(source_path):
+            results[name] = 'source missing'
+        elif os.path.basename(source_path) != header['source']['file']:
+            results[name] = 'stale (other source file)'
+        elif header.get('cropped_to') != registry.cropped_to():
+            results[name] = 'stale (other crop)'
+        elif file_sha256(source_path) != header['source']['sha256']:
+            results[name] = 'stale'
+        else:
+            results[name] = 'ok'
+        print(f"{name}: {results[name]}")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or verify the memory-mapped NASA grid store")
+    parser.add_argument('command', choices=['build', 'verify'])
+    parser.add_argument('--data-dir', default=None)
+    parser.add_argument('--store-dir', default=None)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_store(args.data_dir, args.store_dir)
+    else:
+        verify_store(args.data_dir, args.store_dir)
@@ -1,27 +1,124 @@
-from fastapi import FastAPI, HTTPException
+import time
+import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
 from datetime import datetime, date
-import joblib
-import pandas as pd
-try:
-    from simple_nasa_predictor import SimpleNASAPredictor
-    nasa_predictor = SimpleNASAPredictor()
-except Exception as e:
-    print(f"NASA predictor failed: {e}")
-    from simple_predictor import SimplePredictor
-    nasa_predictor = SimplePredictor()
-
-# Load vacation recommender
-try:
-    from vacation_recommender import VacationRecommender
-    vacation_recommender = VacationRecommender()
-except Exception as e:
-    print(f"Vacation recommender failed: {e}")
-    vacation_recommender = None
+from typing import List
+import os
+import threading
 import numpy as np
+from point_cache import get_point_cache
+from blocking_executor import ExecutorBusy, get_executor, shutdown_executor
+from risk_engine import apply_exceedance, score_point, score_risks
+import metrics
+import profiling
+from metrics import POINTS_SCORED, stage
+
+# Datasets, predictors and pandas/xarray/joblib are loaded by warm_up() after the port is bound;
+# set SUNRIZE_BACKGROUND_WARMUP=0 to finish warm-up before serving instead
+BACKGROUND_WARM_UP = os.environ.get('SUNRIZE_BACKGROUND_WARMUP', '1') != '0'
+
+nasa_predictor = None
+vacation_recommender = None
+rain_model = heat_model = wind_model = None
+
+# Destination analyzer, built once at startup and shared by all requests
+nasa_analyzer = None
+nasa_analyzer_lock = threading.Lock()
+
+# Reported by /readyz and /health
+startup_state = {'ready': False, 'warm_up_finished': False, 'phases': {}, 'errors': {}}
+
+def get_nasa_analyzer():
+    """Shared RealNASAAnalyzer with per-city analysis precomputed"""
+    global nasa_analyzer
+    # Handlers run on executor threads, so only one of them builds the analyzer
+    with nasa_analyzer_lock:
+        if nasa_analyzer is None:
+            from real_nasa_analyzer import RealNASAAnalyzer
+            analyzer = RealNASAAnalyzer()
+            analyzer.warm_up()
+            nasa_analyzer = analyzer
+            # Ready as soon as the analyzer exists, whether warm-up or a first request built it
+            startup_state['ready'] = True
+    return nasa_analyzer
 
-app = FastAPI(title="Weather Prediction API", version="1.0.0")
+def load_datasets():
+    from dataset_registry import get_registry
+    failed = get_registry().load_all()
+    if failed:
+        raise Exception(f"Failed to load {', '.join(failed)}")
+
+def load_nasa_predictor():
+    global nasa_predictor
+    try:
+        from simple_nasa_predictor import SimpleNASAPredictor
+        nasa_predictor = SimpleNASAPredictor()
+    except Exception as e:
+        print(f"NASA predictor failed: {e}")
+        from simple_predictor import SimplePredictor
+        nasa_predictor = SimplePredictor()
+
+def load_vacation_recommender():
+    global vacation_recommender
+    try:
+        from vacation_recommender import VacationRecommender
+        vacation_recommender = VacationRecommender()
+    except Exception as e:
+        print(f"Vacation recommender failed: {e}")
+        vacation_recommender = None
+
+def load_models():
+    """Pre-trained models (you'll train these); joblib is only imported once they exist"""
+    global rain_model, heat_model, wind_model
+    if not os.path.exists('models/rain_model.pkl'):
+        return
+    import joblib
+    try:
+        rain_model = joblib.load('models/rain_model.pkl')
+        heat_model = joblib.load('models/heat_model.pkl')
+        wind_model = joblib.load('models/wind_model.pkl')
+    except FileNotFoundError:
+        rain_model = heat_model = wind_model = None
+
+def run_startup_phase(name, func):
+    """Run one warm-up phase, recording how long it took and whether it failed"""
+    start = time.perf_counter()
+    try:
+        func()
+    except Exception as e:
+        startup_state['errors'][name] = str(e)
+        print(f"Startup phase {name} failed: {e}")
+    elapsed = time.perf_counter() - start
+    startup_state['phases'][name] = round(elapsed, 3)
+    print(f"Startup phase {name}: {elapsed:.2f}s")
+
+def warm_up():
+    """Load everything the endpoints need; requests that arrive earlier load it on demand"""
+    start = time.perf_counter()
+    run_startup_phase('datasets', load_datasets)
+    run_startup_phase('nasa_analyzer', get_nasa_analyzer)
+    run_startup_phase('nasa_predictor', load_nasa_predictor)
+    run_startup_phase('vacation_recommender', load_vacation_recommender)
+    run_startup_phase('models', load_models)
+    startup_state['warm_up_finished'] = True
+    print(f"Warm-up finished in {time.perf_counter() - start:.2f}s, ready: {startup_state['ready']}")
+
+@asynccontextmanager
+async def lifespan(app):
+    if BACKGROUND_WARM_UP:
+        threading.Thread(target=warm_up, name='sunrize-warm-up', daemon=True).start()
+    else:
+        warm_up()
+    yield
+    shutdown_executor()
+    from dataset_registry import get_registry
+    get_registry().close()
+
+app = FastAPI(title="Weather Prediction API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware for React frontend
 app.add_middleware(
@@ -32,15 +129,66 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# NASA predictor initialized above - now validates Southern Asia only
+# NASA predictor is initialized by warm_up() - validates Southern Asia only
+
+if metrics.METRICS_ENABLED:
+    @app.middleware("http")
+    async def record_request_latency(request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        # Route templates keep the label set small (/export-analysis/{format}, not every format)
+        route = request.scope.get('route')
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, request.method,
+                                        route.path if route is not None else 'unmatched', str(response.status_code))
+        return response
+
+def collect_service_metrics():
+    """Point cache, dataset, executor and startup figures read when /metrics is scraped"""
+    from dataset_registry import get_registry
+    cache = get_point_cache().stats()
+    datasets = get_registry().stats()['datasets']
+    executor = get_executor().stats()
+    return [
+        ('sunrize_point_cache_hits_total', 'counter', "Point cache hits", [({}, cache['hits'])]),
+        ('sunrize_point_cache_misses_total', 'counter', "Point cache misses", [({}, cache['misses'])]),
+        ('sunrize_point_cache_hit_ratio', 'gauge', "Point cache hit ratio since start", [({}, cache['hit_ratio'])]),
+        ('sunrize_point_cache_entries', 'gauge', "Cached grid cells", [({}, cache['entries'])]),
+        ('sunrize_point_cache_evictions_total', 'counter', "Point cache evictions", [({}, cache['evictions'])]),
+        ('sunrize_dataset_load_seconds', 'gauge', "Time taken to load each NASA grid",
+         [({'dataset': name, 'storage': d['storage']}, d['load_seconds']) for name, d in datasets.items()]),
+        ('sunrize_dataset_memory_bytes', 'gauge', "Memory held by each NASA grid",
+         [({'dataset': name}, int(d['memory_mb'] * 1024 ** 2)) for name, d in datasets.items()]),
+        ('sunrize_executor_queued', 'gauge', "Blocking calls waiting for an executor thread", [({}, executor['queued'])]),
+        ('sunrize_executor_running', 'gauge', "Blocking calls running", [({}, executor['running'])]),
+        ('sunrize_executor_rejected_total', 'counter', "Calls refused because the queue was full",
+         [({}, executor['rejected'])]),
+        ('sunrize_startup_phase_seconds', 'gauge', "Duration of each startup phase",
+         [({'phase': phase}, seconds) for phase, seconds in startup_state['phases'].items()]),
+        ('sunrize_ready', 'gauge', "1 once warm-up has finished", [({}, int(startup_state['ready']))])
+    ]
+
+metrics.add_collector(collect_service_metrics)
 
-# Load pre-trained models (you'll train these)
-try:
-    rain_model = joblib.load('models/rain_model.pkl')
-    heat_model = joblib.load('models/heat_model.pkl')
-    wind_model = joblib.load('models/wind_model.pkl')
-except FileNotFoundError:
-    rain_model = heat_model = wind_model = None
+@app.exception_handler(ExecutorBusy)
+async def executor_busy(request, exc):
+    from fastapi.responses import JSONResponse
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+@app.exception_handler(profiling.ProfileDenied)
+async def profile_denied(request, exc):
+    from fastapi.responses import JSONResponse
+    return JSONResponse(status_code=403, content={"detail": str(exc)})
+
+async def run_blocking(http_request, response, func, *args):
+    """Run func on the executor, under a profiler when the request carries the admin profile token"""
+    mode = profiling.requested_mode(http_request.headers)
+    if mode is None:
+        return await get_executor().run(func, *args)
+    
+    result, profile_id = await get_executor().run(profiling.profile_call, mode, func.__name__, func, *args)
+    # Routes returning a Response object bypass the injected one
+    (result if isinstance(result, Response) else response).headers[profiling.PROFILE_ID_HEADER] = profile_id
+    return result
 
 class PredictionRequest(BaseModel):
     latitude: float
@@ -48,6 +196,24 @@ class PredictionRequest(BaseModel):
     event_date: date
     location_name: str = ""
 
+class BatchPredictionRequest(BaseModel):
+    items: List[PredictionRequest]
+    # "json", or csv/ndjson/arrow/parquet for one table row per item
+    format: str = "json"
+
+# Upper bound on items per /predict/batch call
+MAX_BATCH_ITEMS = 10000
+
+class ExportPoint(BaseModel):
+    latitude: float
+    longitude: float
+    location_name: str = ""
+
+class BulkExportRequest(BaseModel):
+    format: str = "csv"
+    # No points exports every grid cell of the Southern Asia coverage box; at most MAX_BATCH_ITEMS points
+    points: List[ExportPoint] = []
+
 class PredictionResponse(BaseModel):
     location: str
     date: str
@@ -67,8 +233,7 @@ class VacationRequest(BaseModel):
 async def root():
     return {"message": "Weather Prediction API for NASA Space Apps Challenge"}
 
-@app.post("/predict", response_model=PredictionResponse)
-async def predict_weather(request: PredictionRequest):
+def _predict_weather(request):
     try:
         import sys
         import os
@@ -88,59 +253,34 @@ async def predict_weather(request: PredictionRequest):
         precip = nasa_data['precipitation_mm']
         wind = nasa_data['wind_speed_ms']
         
-        # Risk calculations based on actual NASA data
-        predictions = {}
-        
-        # Very Wet (precipitation based)
-        if precip > 10:
-            predictions['very_wet'] = min(0.9, 0.6 + precip * 0.02)
-        elif precip > 5:
-            predictions['very_wet'] = min(0.6, 0.3 + precip * 0.04)
-        else:
-            predictions['very_wet'] = max(0.05, precip * 0.03)
-        
-        # Very Hot (temperature based)
-        if temp_c > 35:
-            predictions['very_hot'] = min(0.9, 0.5 + (temp_c - 35) * 0.03)
-        elif temp_c > 30:
-            predictions['very_hot'] = min(0.6, 0.2 + (temp_c - 30) * 0.06)
-        else:
-            predictions['very_hot'] = max(0.05, max(0, temp_c - 20) * 0.02)
+        # Risk calculations based on actual NASA data (percent scores -> probabilities)
+        with stage('risk_scoring'):
+            predictions = {k: v / 100 for k, v in score_point(precip, temp_c, wind, model='comfort').items()}
+        POINTS_SCORED.inc(1, 'predict')
         
-        # Very Cold (temperature based)
-        if temp_c < 0:
-            predictions['very_cold'] = min(0.9, 0.7 + abs(temp_c) * 0.02)
-        elif temp_c < 10:
-            predictions['very_cold'] = min(0.6, (10 - temp_c) * 0.05)
-        else:
-            predictions['very_cold'] = max(0.02, (20 - temp_c) * 0.015) if temp_c < 20 else 0.02
-        
-        # Very Windy (wind based)
-        if wind > 15:
-            predictions['very_windy'] = min(0.9, 0.4 + (wind - 15) * 0.03)
-        elif wind > 10:
-            predictions['very_windy'] = min(0.5, 0.15 + (wind - 10) * 0.05)
-        else:
-            predictions['very_windy'] = max(0.05, wind * 0.02)
-        
-        # Very Uncomfortable (combined)
-        predictions['very_uncomfortable'] = (predictions['very_hot'] + predictions['very_cold'] + 
-                                           predictions['very_windy'] * 0.7 + predictions['very_wet'] * 0.5) / 3.2
+        historical_context = {
+            "nasa_data_source": "Southern Asia NASA Earth Observation Data",
+            "precipitation_mm": round(precip, 2),
+            "temperature_c": round(temp_c, 2),
+            "wind_speed_ms": round(wind, 2)
+        }
         
-        # Ensure all values are between 0.01 and 0.95
-        predictions = {k: max(0.01, min(0.95, v)) for k, v in predictions.items()}
+        # Empirical exceedance probabilities for the event month, once the rasters have been built
+        from climatology import get_climatology
+        with stage('grid_read'):
+            exceedance, years = get_climatology().exceedance(request.event_date.month, request.latitude,
+                                                             request.longitude)
+        if exceedance:
+            predictions = {k: float(v) for k, v in apply_exceedance(predictions, exceedance).items()}
+            historical_context["probability_method"] = "monthly exceedance frequency"
+            historical_context["years_of_record"] = int(years)
         
         return PredictionResponse(
             location=f"{request.location_name} ({request.latitude:.2f}, {request.longitude:.2f})",
             date=request.event_date.strftime('%Y-%m-%d'),
             predictions=predictions,
             confidence={k: 0.95 for k in predictions.keys()},  # High confidence from NASA data
-            historical_context={
-                "nasa_data_source": "Southern Asia NASA Earth Observation Data",
-                "precipitation_mm": round(precip, 2),
-                "temperature_c": round(temp_c, 2),
-                "wind_speed_ms": round(wind, 2)
-            }
+            historical_context=historical_context
         )
         
     except HTTPException:
@@ -148,40 +288,198 @@ async def predict_weather(request: PredictionRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"NASA data processing error: {str(e)}")
 
-@app.post("/recommend-destinations")
-async def recommend_destinations(request: VacationRequest):
+@app.post("/predict", response_model=PredictionResponse)
+async def predict_weather(request: PredictionRequest, http_request: Request, response: Response):
+    return await run_blocking(http_request, response, _predict_weather, request)
+
+def _coverage_error(item):
+    return f"Location ({item.latitude:.2f}°N, {item.longitude:.2f}°E) is outside Southern Asia coverage area"
+
+def _batch_table(format, items, covered, precip, temp_c, wind, risks, years):
+    """/predict/batch results as one row per item, encoded by the bulk export writers"""
+    from bulk_export import BATCH_COLUMNS, BATCH_RISKS, MEDIA_TYPES, batch_schema, write_export
+    from dataset_registry import get_registry
+    
+    count = len(items)
+    rows = np.flatnonzero(covered)
+    has_data = ~(np.isnan(precip) | np.isnan(temp_c) | np.isnan(wind))
+    scored = rows[has_data]
+    
+    def scatter(values, where):
+        column = np.full(count, np.nan)
+        column[where] = values
+        return column
+    
+    columns = {
+        'index': np.arange(count, dtype=np.int64),
+        'location_name': [item.location_name for item in items],
+        'latitude': np.array([item.latitude for item in items], dtype=np.float64),
+        'longitude': np.array([item.longitude for item in items], dtype=np.float64),
+        'date': [item.event_date.strftime('%Y-%m-%d') for item in items],
+        'precipitation_mm': scatter(np.round(precip, 2), rows),
+        'temperature_c': scatter(np.round(temp_c, 2), rows),
+        'wind_speed_ms': scatter(np.round(wind, 2), rows),
+        'dataset_version': np.full(count, get_registry().version, dtype=np.int64)
+    }
+    for k in BATCH_RISKS:
+        columns[k] = scatter(np.asarray(risks[k])[has_data], scored)
+    
+    # Same values and per-item errors as the JSON response
+    columns['years_of_record'] = [None] * count
+    if years is not None:
+        for row, value in zip(scored.tolist(), np.broadcast_to(years, rows.shape)[has_data].tolist()):
+            columns['years_of_record'][row] = int(value)
+    columns['error'] = [None if in_coverage else _coverage_error(item)
+                        for item, in_coverage in zip(items, covered.tolist())]
+    for row in rows[~has_data].tolist():
+        columns['error'][row] = "No NASA data for this grid cell"
+    
     try:
-        from real_nasa_analyzer import RealNASAAnalyzer
+        parts = write_export(format, [columns], BATCH_COLUMNS, batch_schema)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    with stage('serialization'):
+        content = b''.join(part.encode() if isinstance(part, str) else part for part in parts)
+    return Response(
+        content=content,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=nasa_predictions_batch.{format}"}
+    )
+
+def _predict_weather_batch(request):
+    from data_validator import coverage_mask, get_nasa_data_batch
+    from climatology import get_climatology
+    from bulk_export import MEDIA_TYPES
+    
+    items = request.items
+    if len(items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch is limited to {MAX_BATCH_ITEMS} items")
+    format = request.format.lower()
+    if format != 'json' and format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Format must be one of json, {', '.join(MEDIA_TYPES)}")
+    
+    try:
+        lats = np.array([item.latitude for item in items], dtype=np.float64)
+        lons = np.array([item.longitude for item in items], dtype=np.float64)
+        
+        # Southern Asia coverage check for every item at once
+        covered = coverage_mask(lats, lons)
+        
+        # Resolve all grid cells and score them with array operations
+        nasa_data = get_nasa_data_batch(lats[covered], lons[covered])
+        precip = nasa_data['precipitation_mm']
+        temp_c = nasa_data['temperature_k'] - 273.15
+        wind = nasa_data['wind_speed_ms']
+        with stage('risk_scoring'):
+            risks = {k: v / 100 for k, v in score_risks(precip, temp_c, wind, model='comfort').items()}
+        POINTS_SCORED.inc(int(covered.sum()), 'predict_batch')
+        
+        # Empirical exceedance probabilities for each item's event month, once the rasters have been built
+        months = np.array([item.event_date.month for item in items], dtype=np.intp)[covered]
+        with stage('grid_read'):
+            exceedance, years = get_climatology().exceedance(months, lats[covered], lons[covered])
+        if exceedance:
+            risks = apply_exceedance(risks, exceedance)
+            years_list = np.broadcast_to(years, months.shape).tolist()
+        has_data = ~(np.isnan(precip) | np.isnan(temp_c) | np.isnan(wind))
+        
+        # Plain Python lists so the per-item loop below stays cheap
+        risk_lists = {k: v.tolist() for k, v in risks.items()}
+        precip_list = np.round(precip, 2).tolist()
+        temp_list = np.round(temp_c, 2).tolist()
+        wind_list = np.round(wind, 2).tolist()
+        has_data = has_data.tolist()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"NASA data processing error: {str(e)}")
+    
+    if format != 'json':
+        return _batch_table(format, items, covered, precip, temp_c, wind, risks, years if exceedance else None)
+    
+    # Per-item response dicts
+    with stage('serialization'):
+        results = []
+        row = 0
+        for index, (item, in_coverage) in enumerate(zip(items, covered.tolist())):
+            location = f"{item.location_name} ({item.latitude:.2f}, {item.longitude:.2f})"
+            if not in_coverage:
+                results.append({
+                    "index": index,
+                    "location": location,
+                    "error": _coverage_error(item)
+                })
+                continue
+        
+            i, row = row, row + 1
+            if not has_data[i]:
+                results.append({"index": index, "location": location, "error": "No NASA data for this grid cell"})
+                continue
         
-        # Use real NASA analyzer
-        analyzer = RealNASAAnalyzer()
+            predictions = {k: v[i] for k, v in risk_lists.items()}
+            historical_context = {
+                "nasa_data_source": "Southern Asia NASA Earth Observation Data",
+                "precipitation_mm": precip_list[i],
+                "temperature_c": temp_list[i],
+                "wind_speed_ms": wind_list[i]
+            }
+            if exceedance:
+                historical_context["probability_method"] = "monthly exceedance frequency"
+                historical_context["years_of_record"] = years_list[i]
+            results.append({
+                "index": index,
+                "location": location,
+                "date": item.event_date.strftime('%Y-%m-%d'),
+                "predictions": predictions,
+                "confidence": {k: 0.95 for k in predictions},
+                "historical_context": historical_context
+            })
+    
+    failed = sum(1 for r in results if "error" in r)
+    return {"count": len(results), "succeeded": len(results) - failed, "failed": failed, "results": results}
+
+@app.post("/predict/batch")
+async def predict_weather_batch(request: BatchPredictionRequest, http_request: Request, response: Response):
+    return await run_blocking(http_request, response, _predict_weather_batch, request)
+
+def _recommend_destinations(request):
+    try:
+        # Use the shared real NASA analyzer
+        analyzer = get_nasa_analyzer()
         
         criteria = {
             'maxWetRisk': request.maxWetRisk,
             'maxHotRisk': request.maxHotRisk,
             'maxColdRisk': request.maxColdRisk,
             'maxWindyRisk': request.maxWindyRisk,
-            'activityType': request.activityType
+            'activityType': request.activityType,
+            'month': request.month
         }
         
-        # Get real NASA analysis
-        recommendations = analyzer.find_best_destinations(criteria)
+        # Get real NASA analysis (monthly climatology when it has been built)
+        recommendations = analyzer.find_best_destinations(criteria, limit=15)
         
         return {"recommendations": recommendations[:15]}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/export-analysis/{format}")
-async def export_analysis(format: str, lat: float, lon: float, location_name: str = ""):
+@app.post("/recommend-destinations")
+async def recommend_destinations(request: VacationRequest, http_request: Request, response: Response):
+    return await run_blocking(http_request, response, _recommend_destinations, request)
+
+def _export_analysis(format, lat, lon, location_name):
     try:
         from fastapi.responses import Response
         import json
         import csv
         from io import StringIO
         
+        from bulk_export import ARROW_FORMATS, MEDIA_TYPES, point_chunks, stream_export
+        
         # Get NASA analysis
-        from data_validator import get_actual_nasa_data
+        from data_validator import validate_location_coverage, get_actual_nasa_data
+        valid, msg = validate_location_coverage(lat, lon)
+        if not valid:
+            raise HTTPException(status_code=400, detail=msg)
         nasa_data = get_actual_nasa_data(lat, lon)
         temp_c = nasa_data['temperature_k'] - 273.15
         
@@ -189,12 +487,9 @@ async def export_analysis(format: str, lat: float, lon: float, location_name: st
         precip = nasa_data['precipitation_mm']
         wind = nasa_data['wind_speed_ms']
         
-        risks = {
-            'very_wet': min(90, max(5, precip * 30)),
-            'very_hot': min(90, max(5, (temp_c - 20) * 3)) if temp_c > 20 else 5,
-            'very_cold': min(90, max(5, (15 - temp_c) * 4)) if temp_c < 15 else 5,
-            'very_windy': min(90, max(5, wind * 15))
-        }
+        with stage('risk_scoring'):
+            risks = score_point(precip, temp_c, wind, model='export')
+        POINTS_SCORED.inc(1, 'export')
         
         export_data = {
             "location": f"{location_name} ({lat:.4f}, {lon:.4f})",
@@ -209,24 +504,27 @@ async def export_analysis(format: str, lat: float, lon: float, location_name: st
         }
         
         if format.lower() == "json":
+            with stage('serialization'):
+                content = json.dumps(export_data, indent=2)
             return Response(
-                content=json.dumps(export_data, indent=2),
+                content=content,
                 media_type="application/json",
                 headers={"Content-Disposition": f"attachment; filename=nasa_analysis_{lat}_{lon}.json"}
             )
         
         elif format.lower() == "csv":
-            output = StringIO()
-            writer = csv.writer(output)
-            writer.writerow(["Parameter", "Value", "Unit"])
-            writer.writerow(["Location", export_data["location"], ""])
-            writer.writerow(["Latitude", lat, "degrees"])
-            writer.writerow(["Longitude", lon, "degrees"])
-            writer.writerow(["Precipitation", export_data["raw_measurements"]["precipitation_mm"], "mm"])
-            writer.writerow(["Temperature", export_data["raw_measurements"]["temperature_c"], "°C"])
-            writer.writerow(["Wind Speed", export_data["raw_measurements"]["wind_speed_ms"], "m/s"])
-            for risk, prob in export_data["risk_probabilities"].items():
-                writer.writerow([risk.replace('_', ' ').title(), prob, "%"])
+            with stage('serialization'):
+                output = StringIO()
+                writer = csv.writer(output)
+                writer.writerow(["Parameter", "Value", "Unit"])
+                writer.writerow(["Location", export_data["location"], ""])
+                writer.writerow(["Latitude", lat, "degrees"])
+                writer.writerow(["Longitude", lon, "degrees"])
+                writer.writerow(["Precipitation", export_data["raw_measurements"]["precipitation_mm"], "mm"])
+                writer.writerow(["Temperature", export_data["raw_measurements"]["temperature_c"], "°C"])
+                writer.writerow(["Wind Speed", export_data["raw_measurements"]["wind_speed_ms"], "m/s"])
+                for risk, prob in export_data["risk_probabilities"].items():
+                    writer.writerow([risk.replace('_', ' ').title(), prob, "%"])
             
             return Response(
                 content=output.getvalue(),
@@ -234,20 +532,114 @@ async def export_analysis(format: str, lat: float, lon: float, location_name: st
                 headers={"Content-Disposition": f"attachment; filename=nasa_analysis_{lat}_{lon}.csv"}
             )
         
+        elif format.lower() in ARROW_FORMATS:
+            # Typed single-row table, same columns as the bulk export
+            body = b''.join(stream_export(format.lower(), point_chunks([(location_name, lat, lon)])))
+            return Response(
+                content=body,
+                media_type=MEDIA_TYPES[format.lower()],
+                headers={"Content-Disposition": f"attachment; filename=nasa_analysis_{lat}_{lon}.{format.lower()}"}
+            )
+        
         else:
-            raise HTTPException(status_code=400, detail="Format must be 'json' or 'csv'")
+            raise HTTPException(status_code=400, detail="Format must be 'json', 'csv', 'arrow' or 'parquet'")
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/export-analysis/{format}")
+async def export_analysis(format: str, lat: float, lon: float, http_request: Request, response: Response,
+                          location_name: str = ""):
+    return await run_blocking(http_request, response, _export_analysis, format, lat, lon, location_name)
+
+@app.post("/export-analysis/bulk")
+async def export_analysis_bulk(request: BulkExportRequest):
+    from fastapi.responses import StreamingResponse
+    from dataset_registry import get_registry
+    from bulk_export import MEDIA_TYPES, grid_chunks, point_chunks, stream_export
+    
+    format = request.format.lower()
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Format must be one of {', '.join(MEDIA_TYPES)}")
+    if len(request.points) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Bulk export is limited to {MAX_BATCH_ITEMS} points")
+    
+    # Open the grids up front so a load failure is a 500, not a truncated download
+    failed = await get_executor().run(get_registry().load_all)
+    if failed:
+        raise HTTPException(status_code=500, detail=f"NASA datasets unavailable: {', '.join(failed)}")
+    
+    if request.points:
+        chunks = point_chunks([(p.location_name, p.latitude, p.longitude) for p in request.points])
+    else:
+        chunks = grid_chunks()
+    
+    # Rows are scored chunk by chunk on the bounded executor while the response is being sent
+    try:
+        body = stream_export(format, chunks, skip_missing=not request.points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    body = await get_executor().stream(body)
+    
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=nasa_analysis_bulk.{format}"}
+    )
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    from fastapi.responses import Response
+    return Response(content=metrics.render(), media_type=metrics.PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, http_request: Request, raw: bool = False):
+    """Stored request profile: text summary or collapsed stacks, or the pstats dump with raw=true"""
+    from fastapi.responses import FileResponse
+    if profiling.requested_mode(http_request.headers) is None:
+        raise HTTPException(status_code=403, detail=f"{profiling.PROFILE_HEADER} header required")
+    
+    path = profiling.profile_path(profile_id, raw=raw)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    if path.endswith('.prof'):
+        return FileResponse(path, media_type="application/octet-stream", filename=os.path.basename(path))
+    return FileResponse(path, media_type="text/plain")
+
+@app.get("/livez")
+async def liveness():
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness():
+    from fastapi.responses import JSONResponse
+    return JSONResponse(status_code=200 if startup_state['ready'] else 503, content={
+        "status": "ready" if startup_state['ready'] else "warming_up",
+        **startup_state
+    })
+
 @app.get("/health")
 async def health_check():
+    from dataset_registry import get_registry
+    from climatology import get_climatology
     return {
         "status": "healthy", 
         "models_loaded": rain_model is not None,
-        "vacation_recommender": vacation_recommender is not None
+        "vacation_recommender": vacation_recommender is not None,
+        "nasa_analyzer": nasa_analyzer is not None,
+        "datasets": get_registry().stats(),
+        "climatology": get_climatology().stats(),
+        "point_cache": get_point_cache().stats(),
+        "executor": get_executor().stats(),
+        "startup": startup_state
     }
 
+startup_state['phases']['imports'] = round(time.perf_counter() - import_started, 3)
+print(f"Startup phase imports: {startup_state['phases']['imports']:.2f}s")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8889)
\ No newline at end of file
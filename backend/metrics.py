@@ -0,0 +1,166 @@
+"""
+In-process request metrics rendered in the Prometheus text format by /metrics
+Stage timers, histograms and counters are plain Python objects; with SUNRIZE_METRICS=0 every
+recording call returns immediately
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+
+METRICS_ENABLED = os.environ.get('SUNRIZE_METRICS', '1') != '0'
+
+# Seconds; request stages are mostly sub-millisecond, whole requests up to a few seconds
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *labels):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        if not METRICS_ENABLED:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    label_text = _format_labels(self.labelnames, labels, ('le', _format_value(float(bound))))
+                    lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+                label_text = _format_labels(self.labelnames, labels)
+                lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+                lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class _Stage:
+    """Context manager timing one stage into STAGE_SECONDS"""
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_SECONDS.observe(time.perf_counter() - self.start, self.name)
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name):
+    """with stage('grid_read'): ... records the block's duration under that stage"""
+    return _Stage(name) if METRICS_ENABLED else _NO_STAGE
+
+
+STAGE_SECONDS = Histogram('sunrize_stage_seconds', "Time spent in each stage of request handling", ['stage'])
+REQUEST_SECONDS = Histogram('sunrize_request_seconds', "HTTP request latency", ['method', 'route', 'status'])
+CITIES_SCORED = Histogram('sunrize_cities_scored', "Cities evaluated against the criteria per destination query",
+                          buckets=COUNT_BUCKETS)
+CITIES_MATCHED = Histogram('sunrize_cities_matched', "Destinations returned per destination query",
+                           buckets=COUNT_BUCKETS)
+POINTS_SCORED = Counter('sunrize_points_scored_total', "Locations scored, by endpoint", ['endpoint'])
+
+_metrics = [STAGE_SECONDS, REQUEST_SECONDS, CITIES_SCORED, CITIES_MATCHED, POINTS_SCORED]
+_collectors = []
+
+
+def add_collector(collect):
+    """Register a callable returning [(name, type, help, [(labels dict, value), ...]), ...] read at scrape time"""
+    _collectors.append(collect)
+
+
+def render():
+    """Every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+
+    for collect in _collectors:
+        try:
+            families = collect()
+        except Exception as e:
+            print(f"Metrics collector failed: {e}")
+            continue
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                if value is None:
+                    continue
+                lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+
+    return '\n'.join(lines) + '\n'
@@ -1,46 +1,130 @@
 import xarray as xr
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from dataset_registry import DATASET_SOURCES, NETCDF_LOCK
+from grid_index import GridIndexer
+from netcdf_parquet import BLOCK_MB, convert_netcdf, grid_variables, open_parquet
+from regrid import get_regridder
 
 class MultiDatasetProcessor:
-    def __init__(self):
+    def __init__(self, output_dir="nasa_parquet"):
+        self.output_dir = Path(output_dir)
+        self.sources = {}
         self.datasets = {}
     
+    def _open(self, name, filepath):
+        """Open one NetCDF grid lazily; values are only read when combined or converted"""
+        with NETCDF_LOCK:
+            ds = xr.open_dataset(filepath)
+        
+        var_name = DATASET_SOURCES.get(name, {}).get('variable')
+        if var_name not in ds.data_vars:
+            candidates = [v for v in grid_variables(ds) if v != 'shape_mask']
+            if not candidates:
+                raise Exception(f"No lat/lon variable found in {filepath}")
+            var_name = candidates[0]
+        
+        self.sources[name] = str(filepath)
+        self.datasets[name] = ds[var_name].transpose(..., 'lat', 'lon')
+        return self.datasets[name]
+    
     def load_precipitation(self, filepath):
         """Load precipitation NetCDF"""
-        ds = xr.open_dataset(filepath)
-        df = ds.to_dataframe().reset_index().dropna()
-        df['variable'] = 'precipitation'
-        self.datasets['precipitation'] = df
-        return df
+        return self._open('precipitation', filepath)
     
     def load_temperature(self, filepath):
         """Load temperature NetCDF"""
-        ds = xr.open_dataset(filepath)
-        df = ds.to_dataframe().reset_index().dropna()
-        df['variable'] = 'temperature'
-        self.datasets['temperature'] = df
-        return df
+        return self._open('temperature', filepath)
     
     def load_wind(self, filepath):
         """Load wind NetCDF"""
-        ds = xr.open_dataset(filepath)
-        df = ds.to_dataframe().reset_index().dropna()
-        df['variable'] = 'wind'
-        self.datasets['wind'] = df
-        return df
-    
-    def combine_datasets(self):
-        """Combine all datasets for ML"""
+        return self._open('wind', filepath)
+    
+    def to_parquet(self):
+        """Stream every loaded file into <output_dir>/<name>, partitioned by variable and year"""
+        converted = {}
+        for name, filepath in self.sources.items():
+            output_dir = self.output_dir / name
+            convert_netcdf(filepath, str(output_dir))
+            converted[name] = open_parquet(str(output_dir))
+        return converted
+    
+    def time_axis(self):
+        """Sorted union of the loaded datasets' time steps (normalized to the day), None if none has time"""
+        steps = [pd.DatetimeIndex(data['time'].values).normalize()
+                 for data in self.datasets.values() if 'time' in data.dims]
+        if not steps:
+            return None
+        return steps[0].append(steps[1:]).unique().sort_values()
+    
+    def combine_datasets(self, target=None, times=None, block_mb=BLOCK_MB, method='nearest'):
+        """Combine all datasets for ML into one (variable, time, lat, lon) float32 cube
+        
+        Every variable is regridded onto the target dataset's grid (default: the first loaded) with
+        cached sparse weights (method: nearest, bilinear or conservative, see regrid.py) and onto a
+        shared time axis (default: the union of all time steps) with array indexing. Target cells outside
+        a source's extent and time steps a source lacks stay NaN; grids without a time axis
+        (time-averaged maps) are repeated along it.
+        """
         if not self.datasets:
             return None
+        
+        grid = self.datasets[target or next(iter(self.datasets))]
+        lat = grid['lat'].values
+        lon = grid['lon'].values
+        times = self.time_axis() if times is None else pd.DatetimeIndex(times).normalize()
+        n_times = 1 if times is None else len(times)
+        
+        names = list(self.datasets)
+        cube = np.full((len(names), n_times, lat.size, lon.size), np.nan, dtype=np.float32)
+        
+        for v, name in enumerate(names):
+            data = self.datasets[name]
+            window = self._window(data, lat, lon)
+            if window is None:
+                continue
+            regridder = get_regridder(window['lat'].values, window['lon'].values, lat, lon, method)
+            
+            if 'time' not in data.dims or times is None:
+                with NETCDF_LOCK:
+                    values = window.values.reshape((-1,) + window.shape[-2:])[0]
+                cube[v, :] = regridder(values)
+                continue
             
-        # Merge on common columns (time, lat, lon)
-        combined = None
-        for name, df in self.datasets.items():
-            if combined is None:
-                combined = df
-            else:
-                combined = pd.merge(combined, df, on=['time', 'lat', 'lon'], how='outer')
+            # Position of every source time step on the target axis (-1 when absent)
+            positions = times.get_indexer(pd.DatetimeIndex(data['time'].values).normalize())
+            # Blocks bounded on both the source window and the regridded target grid
+            step_bytes = max(window[0].size, lat.size * lon.size) * 8
+            steps_per_block = max(1, int(block_mb * 1024 ** 2 // step_bytes))
+            for start in range(0, positions.size, steps_per_block):
+                block_positions = positions[start:start + steps_per_block]
+                keep = block_positions >= 0
+                if not keep.any():
+                    continue
+                with NETCDF_LOCK:
+                    values = window.isel(time=slice(start, start + steps_per_block)).values
+                # One sparse product regrids the whole block
+                cube[v, block_positions[keep]] = regridder(values[keep])
         
-        return combined
\ No newline at end of file
+        return xr.DataArray(
+            cube, dims=['variable', 'time', 'lat', 'lon'], name='combined',
+            coords={'variable': names, 'time': times if times is not None else [np.datetime64('NaT')],
+                    'lat': lat, 'lon': lon},
+            attrs={'target_grid': target or names[0], 'regrid_method': method,
+                   'sources': ', '.join(self.sources.values())}
+        )
+    
+    def _window(self, data, lat, lon):
+        """Source rows/columns covering the target grid plus one cell of margin, None when disjoint"""
+        indexer = GridIndexer(data['lat'].values, data['lon'].values)
+        slices = {}
+        for dim, axis, coords, values in (('lat', indexer.lat, data['lat'].values, lat),
+                                          ('lon', indexer.lon, data['lon'].values, lon)):
+            half = abs(axis.step) / 2
+            inside = (values >= coords.min() - half) & (values <= coords.max() + half)
+            if not inside.any():
+                return None
+            cells = axis.index(values[inside])
+            slices[dim] = slice(max(int(cells.min()) - 1, 0), min(int(cells.max()) + 2, axis.size))
+        return data.isel(**slices)
@@ -0,0 +1,188 @@
+"""
+Out-of-core NetCDF to Parquet conversion
+Every lat/lon variable is read one block of time steps and grid rows at a time, its missing cells dropped,
+and appended to a Parquet dataset partitioned by variable and year:
+
+    <output>/variable=<name>/year=<yyyy>/<source>.parquet    (year=all for time-averaged maps)
+
+Peak memory is bounded by the block size (SUNRIZE_PARQUET_BLOCK_MB) rather than the file size
+
+    python netcdf_parquet.py precipitation.nc temp.nc wind.nc --output nasa_parquet
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import xarray as xr
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pds
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet conversion is unavailable without pyarrow
+    pa = pds = pq = None
+
+from dataset_registry import NETCDF_LOCK, peak_rss_mb
+
+# Upper bound on the values of one variable read from the file at once
+BLOCK_MB = float(os.environ.get('SUNRIZE_PARQUET_BLOCK_MB', '16'))
+TIMELESS_YEAR = 'all'
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise Exception("Parquet conversion requires pyarrow (pip install pyarrow)")
+
+
+def grid_variables(ds):
+    """Names of the data variables laid out on the lat/lon grid (skips bounds such as lat_bnds)"""
+    return [name for name in ds.data_vars if {'lat', 'lon'} <= set(ds[name].dims)]
+
+
+def iter_blocks(data, block_mb=BLOCK_MB):
+    """Loaded sub-arrays of data covering at most block_mb of values, time steps outermost"""
+    # Time (or any other leading dimension) first, grid rows last
+    leading = [dim for dim in data.dims if dim not in ('lat', 'lon')]
+    data = data.transpose(*leading, 'lat', 'lon')
+    row_bytes = data.sizes['lon'] * data.dtype.itemsize
+    rows_per_block = max(1, int(block_mb * 1024 ** 2 // row_bytes))
+
+    if leading:
+        steps_per_block = max(1, rows_per_block // data.sizes['lat'])
+        rows_per_block = min(rows_per_block, data.sizes['lat'])
+        outer = leading[0]
+        for start in range(0, data.sizes[outer], steps_per_block):
+            step = data.isel({outer: slice(start, start + steps_per_block)})
+            for row in range(0, data.sizes['lat'], rows_per_block):
+                with NETCDF_LOCK:
+                    yield step.isel(lat=slice(row, row + rows_per_block)).load()
+    else:
+        for row in range(0, data.sizes['lat'], rows_per_block):
+            with NETCDF_LOCK:
+                yield data.isel(lat=slice(row, row + rows_per_block)).load()
+
+
+def block_columns(block):
+    """Long-format columns (one per dimension plus value) of a block's non-missing cells"""
+    values = block.values
+    keep = ~np.isnan(values) if np.issubdtype(values.dtype, np.floating) else np.ones(values.shape, dtype=bool)
+
+    columns = {}
+    for axis, dim in enumerate(block.dims):
+        coords = block[dim].values if dim in block.coords else np.arange(block.sizes[dim])
+        # Broadcast views, so only the kept rows are materialized
+        shape = [1] * values.ndim
+        shape[axis] = -1
+        columns[dim] = np.broadcast_to(coords.reshape(shape), values.shape)[keep]
+    columns['value'] = values[keep].astype(np.float32)
+    return columns
+
+
+def year_slices(block):
+    """(year, sub-block) pairs of a block with a time axis, ('all', block) without one"""
+    if 'time' not in block.dims:
+        yield TIMELESS_YEAR, block
+        return
+    years = block['time'].values.astype('datetime64[Y]').astype(np.int64) + 1970
+    for year in np.unique(years):
+        yield int(year), block.isel(time=np.flatnonzero(years == year))
+
+
+class PartitionWriters:
+    """One open ParquetWriter per (variable, year) partition, each block appended as a row group
+
+    Files are named after the source, so several NetCDF files can share an output directory
+    """
+
+    def __init__(self, output_dir, part_name='part-0', compression='zstd'):
+        self.output_dir = output_dir
+        self.part_name = part_name
+        self.compression = compression
+        self.writers = {}
+        self.rows = {}
+
+    def write(self, variable, year, table):
+        key = (variable, str(year))
+        writer = self.writers.get(key)
+        if writer is None:
+            directory = os.path.join(self.output_dir, f"variable={variable}", f"year={year}")
+            os.makedirs(directory, exist_ok=True)
+            writer = self.writers[key] = pq.ParquetWriter(os.path.join(directory, f"{self.part_name}.parquet"),
+                                                          table.schema, compression=self.compression)
+        writer.write_table(table)
+        self.rows[key] = self.rows.get(key, 0) + table.num_rows
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+
+def convert_dataset(ds, output_dir, variables=None, block_mb=BLOCK_MB, part_name='part-0'):
+    """Stream the grid variables of an open Dataset into the partitioned Parquet dataset at output_dir
+
+    Returns rows written per variable and year, the largest block read and the peak RSS
+    """
+    _require_pyarrow()
+    start = time.perf_counter()
+    writers = PartitionWriters(output_dir, part_name)
+    largest_block = 0
+
+    try:
+        for variable in variables or grid_variables(ds):
+            data = ds[variable]
+            for block in iter_blocks(data, block_mb):
+                largest_block = max(largest_block, block.nbytes)
+                for year, part in year_slices(block):
+                    columns = block_columns(part)
+                    if columns['value'].size:
+                        writers.write(variable, year, pa.table(columns))
+    finally:
+        writers.close()
+
+    partitions = {}
+    for (variable, year), rows in writers.rows.items():
+        partitions.setdefault(variable, {})[year] = rows
+    return {
+        'output': output_dir,
+        'rows': partitions,
+        'largest_block_mb': round(largest_block / 1024 ** 2, 3),
+        'peak_rss_mb': peak_rss_mb(),
+        'seconds': round(time.perf_counter() - start, 2)
+    }
+
+
+def convert_netcdf(path, output_dir, variables=None, block_mb=BLOCK_MB):
+    """Open one NetCDF file lazily and stream it into the partitioned Parquet dataset"""
+    with NETCDF_LOCK:
+        ds = xr.open_dataset(path)
+    try:
+        part_name = os.path.splitext(os.path.basename(path))[0]
+        summary = convert_dataset(ds, output_dir, variables, block_mb, part_name)
+    finally:
+        with NETCDF_LOCK:
+            ds.close()
+
+    total = sum(sum(years.values()) for years in summary['rows'].values())
+    print(f"{os.path.basename(path)}: {total} rows in {summary['seconds']}s -> {output_dir} "
+          f"(largest block {summary['largest_block_mb']} MB, peak RSS {summary['peak_rss_mb']} MB)")
+    return summary
+
+
+def open_parquet(output_dir):
+    """Lazy pyarrow dataset over a converted directory; filter on variable/year before materializing"""
+    _require_pyarrow()
+    return pds.dataset(output_dir, format='parquet', partitioning='hive')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert NASA NetCDF files to partitioned Parquet out of core")
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--output', default='nasa_parquet')
+    parser.add_argument('--variables', nargs='+', default=None)
+    parser.add_argument('--block-mb', type=float, default=BLOCK_MB)
+    args = parser.parse_args()
+
+    for path in args.files:
+        convert_netcdf(path, args.output, args.variables, args.block_mb)
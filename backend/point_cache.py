@@ -0,0 +1,80 @@
+"""
+Bounded LRU cache of point results keyed by snapped grid cell
+Every coordinate that falls in the same cells of the loaded grids shares one entry (bilinear sampling keys
+on the rounded coordinate instead, see DatasetRegistry.cell_key)
+"""
+import os
+import threading
+from collections import OrderedDict
+
+POINT_CACHE_SIZE = int(os.environ.get('SUNRIZE_POINT_CACHE_SIZE', '4096'))
+
+
+class PointCache:
+    """Thread-safe LRU with hit/miss/eviction counters, cleared when the datasets reload"""
+
+    def __init__(self, max_entries=POINT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, namespace, cell_key, compute):
+        """Cached value for (namespace, cell), computing and storing it on a miss
+
+        cell_key is (dataset version, cells) from DatasetRegistry.cell_key; cached values are shared
+        between callers and must be treated as read-only
+        """
+        version, cells = cell_key
+        key = (namespace, cells)
+
+        with self._lock:
+            if version != self.version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.version = version
+            elif key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            if version == self.version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None
+        }
+
+
+_point_cache = PointCache()
+
+
+def get_point_cache():
+    """Process-wide point cache shared by /predict and /export-analysis"""
+    return _point_cache
@@ -2,6 +2,7 @@ import xarray as xr
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from netcdf_parquet import convert_dataset, open_parquet
 
 def process_all_nasa_datasets():
     """Process all three NASA datasets and combine them"""
@@ -66,13 +67,40 @@ def create_weather_prediction_data(datasets):
     
     return combined_data
 
+def convert_weather_prediction_data(datasets, output_dir="nasa_parquet"):
+    """Convert datasets to prediction-ready Parquet, partitioned by variable and year; returns one summary per dataset"""
+    
+    summaries = []
+    
+    for name, ds in datasets.items():
+        try:
+            # Stream to Parquet a block at a time, dropping missing cells
+            summary = convert_dataset(ds, output_dir, part_name=name)
+            summary['dataset'] = name
+            
+            rows = sum(sum(years.values()) for years in summary['rows'].values())
+            print(f"\n{name.title()} rows: {rows} in {summary['seconds']}s")
+            print(f"Variables: {list(summary['rows'])}")
+            print(f"Largest block: {summary['largest_block_mb']} MB, peak RSS: {summary['peak_rss_mb']} MB")
+            
+            summaries.append(summary)
+            
+        except Exception as e:
+            print(f"Error processing {name}: {e}")
+    
+    if summaries:
+        print("Sample data:")
+        print(open_parquet(output_dir).head(3).to_pandas())
+    
+    return summaries
+
 if __name__ == "__main__":
     print("=== NASA Weather Data Processing ===")
     datasets = process_all_nasa_datasets()
     
     if datasets:
         print(f"\nSuccessfully loaded {len(datasets)} datasets")
-        combined_data = create_weather_prediction_data(datasets)
+        summaries = convert_weather_prediction_data(datasets)
         print(f"\nReady for weather prediction system!")
     else:
         print("No datasets loaded successfully")
\ No newline at end of file
@@ -2,6 +2,7 @@ import xarray as xr
 import pandas as pd
 import numpy as np
 from data_loader import DataLoader
+from netcdf_parquet import convert_dataset, open_parquet
 
 def process_giovanni_precipitation():
     """Process the downloaded NASA precipitation data"""
@@ -17,23 +18,21 @@ def process_giovanni_precipitation():
         print("\nVariables:", list(ds.variables.keys()))
         print("\nDimensions:", ds.dims)
         
-        # Convert to DataFrame
-        df = ds.to_dataframe().reset_index()
-        df = df.dropna()
+        # Stream to Parquet a block at a time (partitioned by variable and year), dropping missing cells
+        summary = convert_dataset(ds, 'nasa_precipitation_parquet', part_name='precipitation')
         
-        print(f"\nDataFrame shape: {df.shape}")
+        rows = sum(sum(years.values()) for years in summary['rows'].values())
+        print(f"\nRows written: {rows} (largest block {summary['largest_block_mb']} MB, "
+              f"peak RSS {summary['peak_rss_mb']} MB)")
         print("\nFirst few rows:")
-        print(df.head())
+        print(open_parquet('nasa_precipitation_parquet').head(5).to_pandas())
+        print("\nSaved processed data to: nasa_precipitation_parquet/")
         
-        # Save as CSV for easy use
-        df.to_csv('nasa_precipitation_processed.csv', index=False)
-        print("\nSaved processed data to: nasa_precipitation_processed.csv")
-        
-        return df
+        return summary
         
     except Exception as e:
         print(f"Error processing file: {e}")
         return None
 
 if __name__ == "__main__":
-    df = process_giovanni_precipitation()
\ No newline at end of file
+    summary = process_giovanni_precipitation()
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""
+Opt-in profiling of single API requests
+A request carrying X-Sunrize-Profile with the admin token from SUNRIZE_PROFILE_TOKEN runs under cProfile
+(pstats dump) or, with X-Sunrize-Profile-Mode: sample, a stack sampler (collapsed stacks for flame graphs).
+The profile is stored in SUNRIZE_PROFILE_DIR and its id returned in the X-Sunrize-Profile-Id header.
+Profiling is off when no token is configured.
+"""
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+PROFILE_TOKEN = os.environ.get('SUNRIZE_PROFILE_TOKEN', '')
+PROFILE_DIR = os.environ.get('SUNRIZE_PROFILE_DIR',
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles'))
+PROFILE_KEEP = int(os.environ.get('SUNRIZE_PROFILE_KEEP', '50'))
+SAMPLE_INTERVAL = float(os.environ.get('SUNRIZE_PROFILE_SAMPLE_MS', '1')) / 1000
+
+PROFILE_HEADER = 'X-Sunrize-Profile'
+PROFILE_MODE_HEADER = 'X-Sunrize-Profile-Mode'
+PROFILE_ID_HEADER = 'X-Sunrize-Profile-Id'
+PROFILE_MODES = ('cprofile', 'sample')
+
+# Where each mode writes its raw profile and its human-readable summary
+PROFILE_FILES = {
+    'cprofile': ('prof', 'txt'),
+    'sample': ('collapsed', 'collapsed')
+}
+
+_PROFILE_ID = re.compile(r'^[0-9]{8}T[0-9]{6}_[a-z_]+_[0-9a-f]{8}$')
+
+# Python 3.12+ allows one active cProfile per interpreter
+_cprofile_lock = threading.Lock()
+
+
+class ProfileDenied(Exception):
+    pass
+
+
+def requested_mode(headers):
+    """Profiling mode asked for by the request headers, None when not asked for
+
+    Raises ProfileDenied when the header is present but the token is wrong or profiling is disabled
+    """
+    token = headers.get(PROFILE_HEADER)
+    if token is None:
+        return None
+    if not PROFILE_TOKEN or not hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode()):
+        raise ProfileDenied("Profiling is disabled or the admin token is invalid")
+
+    mode = headers.get(PROFILE_MODE_HEADER, 'cprofile').lower()
+    if mode not in PROFILE_MODES:
+        raise ProfileDenied(f"Profile mode must be one of {', '.join(PROFILE_MODES)}")
+    return mode
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a timer and counts identical stacks"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sunrize-profile-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed stack format, one 'frame;frame;frame count' line per stack"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _new_profile_id(label):
+    label = re.sub(r'[^a-z_]', '_', label.lower()).strip('_') or 'request'
+    return f"{time.strftime('%Y%m%dT%H%M%S')}_{label}_{uuid.uuid4().hex[:8]}"
+
+
+def _prune():
+    """Keep only the newest PROFILE_KEEP profiles"""
+    if PROFILE_KEEP <= 0:
+        return
+    profiles = sorted({name.rsplit('.', 1)[0] for name in os.listdir(PROFILE_DIR)
+                       if _PROFILE_ID.match(name.rsplit('.', 1)[0])})
+    for profile_id in profiles[:-PROFILE_KEEP]:
+        for extension in {ext for pair in PROFILE_FILES.values() for ext in pair}:
+            path = os.path.join(PROFILE_DIR, f"{profile_id}.{extension}")
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def profile_call(mode, label, func, *args):
+    """Run func(*args) under the given profiler; returns (result, profile_id)
+
+    Runs on the thread that does the work, so executor jobs are profiled where they execute
+    """
+    profile_id = _new_profile_id(label)
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    start = time.perf_counter()
+
+    if mode == 'sample':
+        sampler = StackSampler(threading.get_ident())
+        try:
+            with sampler:
+                result = func(*args)
+        finally:
+            with open(os.path.join(PROFILE_DIR, f"{profile_id}.collapsed"), 'w') as f:
+                f.write(sampler.collapsed())
+            print(f"Profile {profile_id}: {sampler.samples} samples in {time.perf_counter() - start:.3f}s")
+    else:
+        with _cprofile_lock:
+            profiler = cProfile.Profile()
+            try:
+                result = profiler.runcall(func, *args)
+            finally:
+                profiler.dump_stats(os.path.join(PROFILE_DIR, f"{profile_id}.prof"))
+                summary = io.StringIO()
+                pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(40)
+                with open(os.path.join(PROFILE_DIR, f"{profile_id}.txt"), 'w') as f:
+                    f.write(summary.getvalue())
+                print(f"Profile {profile_id}: {time.perf_counter() - start:.3f}s under cProfile")
+
+    _prune()
+    return result, profile_id
+
+
+def profile_path(profile_id, raw=False):
+    """Stored profile file for an id (raw pstats/collapsed stacks or the text summary), None if missing"""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    for raw_extension, summary_extension in PROFILE_FILES.values():
+        path = os.path.join(PROFILE_DIR, f"{profile_id}.{raw_extension if raw else summary_extension}")
+        if os.path.exists(path):
+            return path
+    return None
@@ -1,25 +1,83 @@
-import xarray as xr
 import numpy as np
 import pandas as pd
+from dataset_registry import get_registry
+from risk_engine import score_risks, score_point
+from point_cache import get_point_cache
+from metrics import CITIES_MATCHED, CITIES_SCORED, stage
+from climatology import get_climatology, parse_month
+
+class CityRiskMatrix:
+    """Columnar per-city measurements and risk percentages, built once per dataset load"""
+    
+    def __init__(self, cities, raw, risks):
+        self.cities = cities
+        self.precipitation_mm = raw['precipitation_mm']
+        self.temperature_c = raw['temperature_k'] - 273.15
+        self.wind_speed_ms = raw['wind_speed_ms']
+        
+        # Risk percentages, one column per risk type
+        self.risk_names = list(risks.keys())
+        self.risk_pct = {k: v * 100 for k, v in risks.items()}
+        
+        # Overall risk is averaged over the four filterable risks and rounded like the API output
+        overall = (self.risk_pct['very_wet'] + self.risk_pct['very_hot'] +
+                   self.risk_pct['very_cold'] + self.risk_pct['very_windy']) / 4
+        self.overall_risk = [round(float(v), 1) for v in overall]
+        
+        # Integer sort key: rounded overall risk first, original city order second
+        rounded = np.array(self.overall_risk, dtype=np.float64)
+        ranks = np.nan_to_num(np.rint(rounded * 10), nan=np.iinfo(np.int32).max).astype(np.int64)
+        self.sort_key = ranks * len(cities) + np.arange(len(cities))
+    
+    def __len__(self):
+        return len(self.cities)
+    
+    def select(self, criteria, limit=None):
+        """Row indices meeting the criteria, lowest overall risk first"""
+        with stage('city_filter'):
+            mask = (
+                (self.risk_pct['very_wet'] <= criteria['maxWetRisk']) &
+                (self.risk_pct['very_hot'] <= criteria['maxHotRisk']) &
+                (self.risk_pct['very_cold'] <= criteria['maxColdRisk']) &
+                (self.risk_pct['very_windy'] <= criteria['maxWindyRisk'])
+            )
+            rows = np.flatnonzero(mask)
+            
+            if limit is not None and limit < len(rows):
+                # Only the top-k rows need ordering
+                rows = rows[np.argpartition(self.sort_key[rows], limit - 1)[:limit]]
+            
+            rows = rows[np.argsort(self.sort_key[rows])]
+        
+        CITIES_SCORED.observe(len(self.cities))
+        CITIES_MATCHED.observe(len(rows))
+        return rows
+    
+    def risk_scores(self, row):
+        return {k: round(float(self.risk_pct[k][row]), 1) for k in self.risk_names}
 
 class RealNASAAnalyzer:
-    def __init__(self):
+    def __init__(self, sample_method=None):
+        # 'nearest' or 'bilinear' point sampling, default SUNRIZE_SAMPLE_METHOD
+        self.sample_method = sample_method
+        self.city_matrix = None
+        self.month_matrices = {}
         self.load_datasets()
         
     def load_datasets(self):
-        """Load your actual NASA datasets"""
+        """Load your actual NASA datasets from the shared registry"""
         try:
-            # Load precipitation data
-            self.precip_ds = xr.open_dataset("precipitation.nc")
-            self.precip_data = self.precip_ds['GPM_3IMERGM_07_precipitation']
+            registry = get_registry()
+            self.dataset_version = registry.version
             
-            # Load temperature data  
-            self.temp_ds = xr.open_dataset("temp.nc")
-            self.temp_data = self.temp_ds['FLDAS_NOAH01_C_GL_M_001_RadT_tavg']
+            # Precipitation, temperature and wind grids (opened once per process)
+            self.precip = registry.get('precipitation')
+            self.temp = registry.get('temperature')
+            self.wind = registry.get('wind')
             
-            # Load wind data
-            self.wind_ds = xr.open_dataset("wind.nc") 
-            self.wind_data = self.wind_ds['M2TMNXFLX_5_12_4_SPEED']
+            self.precip_data = self.precip.data
+            self.temp_data = self.temp.data
+            self.wind_data = self.wind.data
             
             print("Real NASA datasets loaded successfully")
             print(f"Precipitation shape: {self.precip_data.shape}")
@@ -29,13 +87,21 @@ class RealNASAAnalyzer:
         except Exception as e:
             raise Exception(f"Failed to load NASA datasets: {e}")
     
+    def refresh_datasets(self):
+        """Pick up grids reloaded in the registry and drop state derived from the old ones"""
+        if self.dataset_version != get_registry().version:
+            self.load_datasets()
+            self.city_matrix = None
+            self.month_matrices = {}
+    
     def get_location_data(self, lat, lon):
         """Extract real NASA data for specific coordinates"""
+        self.refresh_datasets()
         try:
-            # Get nearest grid point data
-            precip_val = float(self.precip_data.sel(lat=lat, lon=lon, method='nearest').values)
-            temp_val = float(self.temp_data.sel(lat=lat, lon=lon, method='nearest').values)  
-            wind_val = float(self.wind_data.sel(lat=lat, lon=lon, method='nearest').values)
+            # Get grid data at the point (nearest cell or bilinear)
+            precip_val = self.precip.sample(lat, lon, self.sample_method)
+            temp_val = self.temp.sample(lat, lon, self.sample_method)
+            wind_val = self.wind.sample(lat, lon, self.sample_method)
             
             return {
                 'precipitation_mm': precip_val,
@@ -47,62 +113,31 @@ class RealNASAAnalyzer:
         except Exception as e:
             raise Exception(f"Error extracting data for {lat}, {lon}: {e}")
     
-    def analyze_weather_risks(self, lat, lon):
-        """Calculate weather risks from real NASA data"""
+    def analyze_weather_risks(self, lat, lon, verbose=True):
+        """Calculate weather risks from real NASA data (cached per grid cell)"""
+        self.refresh_datasets()
+        cell_key = get_registry().cell_key(lat, lon, self.sample_method)
+        return get_point_cache().get_or_compute(
+            'analyzer', cell_key, lambda: self._analyze_weather_risks(lat, lon, verbose))
+    
+    def _analyze_weather_risks(self, lat, lon, verbose):
         # Get actual NASA measurements
-        data = self.get_location_data(lat, lon)
+        with stage('grid_read'):
+            data = self.get_location_data(lat, lon)
         
         precip = data['precipitation_mm']
         temp_c = data['temperature_k'] - 273.15  # Convert K to C
         wind = data['wind_speed_ms']
         
-        print(f"Real NASA data for ({lat:.2f}, {lon:.2f}):")
-        print(f"   Precipitation: {precip:.3f} mm")
-        print(f"   Temperature: {temp_c:.1f}°C") 
-        print(f"   Wind Speed: {wind:.2f} m/s")
+        if verbose:
+            print(f"Real NASA data for ({lat:.2f}, {lon:.2f}):")
+            print(f"   Precipitation: {precip:.3f} mm")
+            print(f"   Temperature: {temp_c:.1f}°C") 
+            print(f"   Wind Speed: {wind:.2f} m/s")
         
         # Calculate risk probabilities based on actual measurements
-        risks = {}
-        
-        # Very Wet Risk (based on actual precipitation)
-        if precip > 5.0:
-            risks['very_wet'] = min(0.85, 0.4 + (precip - 5) * 0.08)
-        elif precip > 1.0:
-            risks['very_wet'] = 0.1 + (precip - 1) * 0.075
-        else:
-            risks['very_wet'] = max(0.02, precip * 0.1)
-        
-        # Very Hot Risk (based on actual temperature)
-        if temp_c > 35:
-            risks['very_hot'] = min(0.9, 0.6 + (temp_c - 35) * 0.05)
-        elif temp_c > 30:
-            risks['very_hot'] = 0.2 + (temp_c - 30) * 0.08
-        else:
-            risks['very_hot'] = max(0.01, (temp_c - 15) * 0.02) if temp_c > 15 else 0.01
-        
-        # Very Cold Risk (based on actual temperature)
-        if temp_c < 5:
-            risks['very_cold'] = min(0.9, 0.5 + (5 - temp_c) * 0.08)
-        elif temp_c < 15:
-            risks['very_cold'] = (15 - temp_c) * 0.04
-        else:
-            risks['very_cold'] = 0.01
-        
-        # Very Windy Risk (based on actual wind speed)
-        if wind > 12:
-            risks['very_windy'] = min(0.85, 0.3 + (wind - 12) * 0.06)
-        elif wind > 6:
-            risks['very_windy'] = 0.05 + (wind - 6) * 0.04
-        else:
-            risks['very_windy'] = max(0.01, wind * 0.008)
-        
-        # Very Uncomfortable (combination of factors)
-        discomfort = (risks['very_hot'] * 0.3 + risks['very_cold'] * 0.3 + 
-                     risks['very_windy'] * 0.2 + risks['very_wet'] * 0.2)
-        risks['very_uncomfortable'] = min(0.9, discomfort)
-        
-        # Ensure all values are reasonable probabilities
-        risks = {k: max(0.01, min(0.95, v)) for k, v in risks.items()}
+        with stage('risk_scoring'):
+            risks = score_point(precip, temp_c, wind, model='analyzer')
         
         return {
             'risks': risks,
@@ -110,135 +145,137 @@ class RealNASAAnalyzer:
             'analysis_summary': f"Based on real NASA measurements: {precip:.2f}mm precip, {temp_c:.1f}°C, {wind:.1f}m/s wind"
         }
     
-    def find_best_destinations(self, criteria):
-        """Find destinations using real NASA data analysis for ALL Southern Asian cities"""
+    def warm_up(self):
+        """Precompute the city x risk matrix so requests only filter it"""
         from southern_asia_cities import get_cities_in_bounds
         
-        # Get all cities within NASA data coverage
-        all_cities = get_cities_in_bounds()
+        cities = get_cities_in_bounds()
+        lats = np.array([city['lat'] for city in cities])
+        lons = np.array([city['lon'] for city in cities])
         
-        # Convert to required format
-        cities = []
-        for city in all_cities:
-            cities.append({
-                "name": f"{city['name']}, {city['country']}",
-                "lat": city['lat'],
-                "lon": city['lon'],
-                "country": city['country'],
-                "state": city.get('state', ''),
-                "population": city.get('population', 0)
-            })
+        # Read every city's grid value with one indexing operation per variable
+        raw = {
+            'precipitation_mm': self.precip.sample(lats, lons, self.sample_method),
+            'temperature_k': self.temp.sample(lats, lons, self.sample_method),
+            'wind_speed_ms': self.wind.sample(lats, lons, self.sample_method)
+        }
         
-        recommendations = []
+        # Score every city in one vectorized pass
+        risks = score_risks(raw['precipitation_mm'], raw['temperature_k'] - 273.15,
+                            raw['wind_speed_ms'], model='analyzer')
+        
+        self.city_matrix = CityRiskMatrix(cities, raw, risks)
+        print(f"Precomputed NASA analysis for {len(cities)} cities")
+        return self.city_matrix
+    
+    def build_month_matrix(self, month):
+        """City x risk matrix from the climatology means of one month, None when no cube has been built"""
+        from southern_asia_cities import get_cities_in_bounds
+        
+        climatology = get_climatology()
+        grids = {'precipitation_mm': ('precipitation', self.precip), 'temperature_k': ('temperature', self.temp),
+                 'wind_speed_ms': ('wind', self.wind)}
+        available = {key: climatology.has(name) for key, (name, _) in grids.items()}
+        if not any(available.values()):
+            return None
+        
+        cities = get_cities_in_bounds()
+        lats = np.array([city['lat'] for city in cities])
+        lons = np.array([city['lon'] for city in cities])
+        
+        # Variables without a cube fall back to the time-averaged grid
+        raw = {key: climatology.sample(name, month, lats, lons, method=self.sample_method) if available[key]
+               else grid.sample(lats, lons, self.sample_method)
+               for key, (name, grid) in grids.items()}
+        
+        risks = score_risks(raw['precipitation_mm'], raw['temperature_k'] - 273.15,
+                            raw['wind_speed_ms'], model='analyzer')
+        print(f"Precomputed NASA analysis for {len(cities)} cities in month {month}")
+        return CityRiskMatrix(cities, raw, risks)
+    
+    def get_city_matrix(self, month=None):
+        """City x risk matrix, computed on first use and reused afterwards (one per month when month is given)"""
+        self.refresh_datasets()
+        if month is not None:
+            matrix = self.month_matrices.get(month)
+            if matrix is None:
+                with stage('city_matrix_build'):
+                    matrix = self.build_month_matrix(month)
+                if matrix is None:
+                    # Without a climatology every month shares the time-averaged matrix; not cached, so
+                    # cubes built while the server runs are picked up
+                    return self.get_city_matrix()
+                self.month_matrices[month] = matrix
+            return matrix
+        if self.city_matrix is None:
+            with stage('city_matrix_build'):
+                self.warm_up()
+        return self.city_matrix
+    
+    def find_best_destinations(self, criteria, limit=None):
+        """Find destinations using real NASA data analysis for ALL Southern Asian cities"""
+        matrix = self.get_city_matrix(parse_month(criteria.get('month')))
         
-        print(f"Analyzing ALL {len(cities)} Southern Asian cities with real NASA data...")
+        print(f"Analyzing ALL {len(matrix)} Southern Asian cities with real NASA data...")
         print(f"Coverage: India, Pakistan, Bangladesh, Sri Lanka, Nepal, Bhutan, Maldives, Afghanistan")
         
-        for city in cities:
-            try:
-                # Get real NASA analysis for this city
-                analysis = self.analyze_weather_risks(city['lat'], city['lon'])
-                risks = analysis['risks']
-                raw_data = analysis['raw_data']
-                
-                # Convert to percentages for comparison
-                risk_percentages = {k: v * 100 for k, v in risks.items()}
-                
-                # Check if city meets user criteria
-                meets_criteria = (
-                    risk_percentages['very_wet'] <= criteria['maxWetRisk'] and
-                    risk_percentages['very_hot'] <= criteria['maxHotRisk'] and
-                    risk_percentages['very_cold'] <= criteria['maxColdRisk'] and
-                    risk_percentages['very_windy'] <= criteria['maxWindyRisk']
-                )
-                
-                if meets_criteria:
-                    overall_risk = (risk_percentages['very_wet'] + risk_percentages['very_hot'] + 
-                                  risk_percentages['very_cold'] + risk_percentages['very_windy']) / 4
-                    
-                    temp_c = raw_data['temperature_k'] - 273.15
-                    
-                    recommendations.append({
-                        'destination': city['name'],
-                        'country': city['country'],
-                        'coordinates': f"{city['lat']:.1f}°N, {city['lon']:.1f}°E",
-                        'riskScores': {k: round(v, 1) for k, v in risk_percentages.items()},
-                        'overallRisk': round(overall_risk, 1),
-                        'avgTemp': f"{temp_c:.1f}°C",
-                        'avgPrecip': f"{raw_data['precipitation_mm']:.2f}mm",
-                        'whyRecommended': f"Real NASA data shows: {temp_c:.1f}°C, {raw_data['precipitation_mm']:.2f}mm precip, {raw_data['wind_speed_ms']:.1f}m/s wind",
-                        'bestFor': ['Outdoor activities', 'Sightseeing', 'Photography'],
-                        'nasaDataSource': 'GPM + FLDAS + MERRA-2'
-                    })
-                    
-            except Exception as e:
-                print(f"Error analyzing {city['name']}: {e}")
-                continue
+        recommendations = []
         
-        # Sort by overall risk (lowest first)
-        recommendations.sort(key=lambda x: x['overallRisk'])
+        # Rows meeting the user criteria, sorted by overall risk (lowest first)
+        for row in matrix.select(criteria, limit):
+            city = matrix.cities[row]
+            temp_c = matrix.temperature_c[row]
+            precip = matrix.precipitation_mm[row]
+            wind = matrix.wind_speed_ms[row]
+            
+            recommendations.append({
+                'destination': f"{city['name']}, {city['country']}",
+                'country': city['country'],
+                'coordinates': f"{city['lat']:.1f}°N, {city['lon']:.1f}°E",
+                'riskScores': matrix.risk_scores(row),
+                'overallRisk': matrix.overall_risk[row],
+                'avgTemp': f"{temp_c:.1f}°C",
+                'avgPrecip': f"{precip:.2f}mm",
+                'whyRecommended': f"Real NASA data shows: {temp_c:.1f}°C, {precip:.2f}mm precip, {wind:.1f}m/s wind",
+                'bestFor': ['Outdoor activities', 'Sightseeing', 'Photography'],
+                'nasaDataSource': 'GPM + FLDAS + MERRA-2'
+            })
         
         print(f"Found {len(recommendations)} destinations meeting criteria")
         return recommendations
     
-    def analyze_destinations_for_period(self, criteria):
+    def analyze_destinations_for_period(self, criteria, limit=None):
         """Analyze destinations using real NASA data for specific month/year"""
-        from southern_asia_cities import get_cities_in_bounds
-        
-        # Get all cities within NASA data coverage
-        all_cities = get_cities_in_bounds()
+        matrix = self.get_city_matrix(parse_month(criteria.get('month')))
         
         print(f"NASA Analysis for {criteria['month']} {criteria['year']}:")
-        print(f"Analyzing {len(all_cities)} cities with real satellite data...")
+        print(f"Analyzing {len(matrix)} cities with real satellite data...")
         
         destinations = []
+        best_for = self.get_activity_recommendations(criteria['activityType'])
         
-        for city in all_cities:
-            try:
-                # Get real NASA analysis for this city
-                analysis = self.analyze_weather_risks(city['lat'], city['lon'])
-                risks = analysis['risks']
-                raw_data = analysis['raw_data']
-                
-                # Convert to percentages for comparison
-                risk_percentages = {k: v * 100 for k, v in risks.items()}
-                
-                # Check if city meets user criteria for the specified period
-                meets_criteria = (
-                    risk_percentages['very_wet'] <= criteria['maxWetRisk'] and
-                    risk_percentages['very_hot'] <= criteria['maxHotRisk'] and
-                    risk_percentages['very_cold'] <= criteria['maxColdRisk'] and
-                    risk_percentages['very_windy'] <= criteria['maxWindyRisk']
-                )
-                
-                if meets_criteria:
-                    overall_risk = (risk_percentages['very_wet'] + risk_percentages['very_hot'] + 
-                                  risk_percentages['very_cold'] + risk_percentages['very_windy']) / 4
-                    
-                    temp_c = raw_data['temperature_k'] - 273.15
-                    
-                    destinations.append({
-                        'destination': f"{city['name']}, {city['country']}",
-                        'country': city['country'],
-                        'coordinates': f"{city['lat']:.1f}°N, {city['lon']:.1f}°E",
-                        'riskScores': {k: round(v, 1) for k, v in risk_percentages.items()},
-                        'overallRisk': round(overall_risk, 1),
-                        'avgTemp': f"{temp_c:.1f}°C",
-                        'avgPrecip': f"{raw_data['precipitation_mm']:.2f}mm",
-                        'avgWind': f"{raw_data['wind_speed_ms']:.1f}m/s",
-                        'whyRecommended': f"NASA satellite analysis shows optimal conditions: {temp_c:.1f}°C, {raw_data['precipitation_mm']:.2f}mm precip, {raw_data['wind_speed_ms']:.1f}m/s wind",
-                        'bestFor': self.get_activity_recommendations(criteria['activityType']),
-                        'nasaDataSource': 'Real-time satellite analysis',
-                        'analysisConfidence': '95%+',
-                        'population': city.get('population', 0)
-                    })
-                    
-            except Exception as e:
-                print(f"Error analyzing {city['name']}: {e}")
-                continue
-        
-        # Sort by overall risk (lowest first)
-        destinations.sort(key=lambda x: x['overallRisk'])
+        # Rows meeting the user criteria for the specified period, lowest overall risk first
+        for row in matrix.select(criteria, limit):
+            city = matrix.cities[row]
+            temp_c = matrix.temperature_c[row]
+            precip = matrix.precipitation_mm[row]
+            wind = matrix.wind_speed_ms[row]
+            
+            destinations.append({
+                'destination': f"{city['name']}, {city['country']}",
+                'country': city['country'],
+                'coordinates': f"{city['lat']:.1f}°N, {city['lon']:.1f}°E",
+                'riskScores': matrix.risk_scores(row),
+                'overallRisk': matrix.overall_risk[row],
+                'avgTemp': f"{temp_c:.1f}°C",
+                'avgPrecip': f"{precip:.2f}mm",
+                'avgWind': f"{wind:.1f}m/s",
+                'whyRecommended': f"NASA satellite analysis shows optimal conditions: {temp_c:.1f}°C, {precip:.2f}mm precip, {wind:.1f}m/s wind",
+                'bestFor': list(best_for),
+                'nasaDataSource': 'Real-time satellite analysis',
+                'analysisConfidence': '95%+',
+                'population': city.get('population', 0)
+            })
         
         print(f"Found {len(destinations)} optimal destinations for {criteria['month']} {criteria['year']}")
         return destinations
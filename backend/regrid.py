@@ -0,0 +1,218 @@
+"""
+Regridding between the NASA lat/lon grids with precomputed sparse weights
+The weights from a source grid to a target grid are built once per method (nearest, bilinear or
+conservative), cached on disk under the two grids' fingerprints, and applied as one sparse matrix
+product to a single field, a time slice or a whole (..., lat, lon) cube.
+
+Rectilinear grids make every method separable: the 2-D weights are the Kronecker product of one
+latitude and one longitude weight matrix (conservative weights use sin(lat) for cell areas).
+"""
+import hashlib
+import os
+import threading
+
+import numpy as np
+import scipy.sparse as sp
+
+from dataset_registry import DATA_DIR
+from grid_index import GridAxis
+
+METHODS = ('nearest', 'bilinear', 'conservative')
+WEIGHTS_VERSION = 1
+
+REGRID_CACHE_DIR = os.environ.get('SUNRIZE_REGRID_CACHE', os.path.join(DATA_DIR, 'regrid_weights'))
+
+# Target cells whose valid source weight is below this fraction of the full weight are left NaN
+MIN_COVERAGE = 0.5
+
+
+def grid_fingerprint(lat, lon):
+    """Short stable hash of a grid's coordinates"""
+    digest = hashlib.sha256()
+    for coords in (lat, lon):
+        coords = np.ascontiguousarray(coords, dtype=np.float64)
+        digest.update(str(coords.size).encode())
+        digest.update(coords.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def cell_edges(coords):
+    """Cell boundaries halfway between centres, extrapolated by half a step at both ends"""
+    coords = np.asarray(coords, dtype=np.float64)
+    if coords.size == 1:
+        return np.array([coords[0] - 0.5, coords[0] + 0.5])
+    middle = (coords[:-1] + coords[1:]) / 2
+    return np.concatenate([[2 * coords[0] - middle[0]], middle, [2 * coords[-1] - middle[-1]]])
+
+
+def nearest_weights(source, target):
+    """(target x source) one-hot matrix of the nearest source cell, empty rows outside the source extent"""
+    axis = GridAxis(source)
+    target = np.asarray(target, dtype=np.float64)
+    edges = cell_edges(source)
+    inside = (target >= edges.min()) & (target <= edges.max())
+    rows = np.flatnonzero(inside)
+    cols = axis.index(target[inside])
+    return sp.csr_matrix((np.ones(rows.size), (rows, cols)), shape=(target.size, axis.size))
+
+
+def linear_weights(source, target):
+    """(target x source) linear interpolation matrix, empty rows outside the source coordinates"""
+    source = np.asarray(source, dtype=np.float64)
+    target = np.asarray(target, dtype=np.float64)
+    order = np.argsort(source, kind='stable')
+    ordered = source[order]
+
+    if source.size == 1:
+        rows = np.flatnonzero(target == ordered[0])
+        return sp.csr_matrix((np.ones(rows.size), (rows, np.zeros(rows.size, dtype=np.intp))),
+                             shape=(target.size, 1))
+
+    inside = (target >= ordered[0]) & (target <= ordered[-1])
+    rows = np.flatnonzero(inside)
+    right = np.clip(np.searchsorted(ordered, target[inside], side='right'), 1, source.size - 1)
+    left = right - 1
+    fraction = (target[inside] - ordered[left]) / (ordered[right] - ordered[left])
+
+    return sp.csr_matrix(
+        (np.concatenate([1 - fraction, fraction]),
+         (np.concatenate([rows, rows]), np.concatenate([order[left], order[right]]))),
+        shape=(target.size, source.size)
+    )
+
+
+def overlap_weights(source, target, transform=None):
+    """(target x source) overlap of cell intervals as a fraction of each target cell
+
+    transform maps edges before measuring (sin of latitude gives area-proportional weights)
+    """
+    def intervals(coords):
+        edges = cell_edges(coords)
+        low, high = np.minimum(edges[:-1], edges[1:]), np.maximum(edges[:-1], edges[1:])
+        return (transform(low), transform(high)) if transform is not None else (low, high)
+
+    source_low, source_high = intervals(source)
+    target_low, target_high = intervals(target)
+    order = np.argsort(source_low, kind='stable')
+    source_low, source_high = source_low[order], source_high[order]
+
+    # Source cells intersecting each target cell form one contiguous run of the sorted intervals
+    first = np.searchsorted(source_high, target_low, side='right')
+    last = np.searchsorted(source_low, target_high, side='left')
+    counts = np.maximum(last - first, 0)
+    rows = np.repeat(np.arange(target_low.size), counts)
+    cols = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(first, counts)
+
+    overlap = np.minimum(target_high[rows], source_high[cols]) - np.maximum(target_low[rows], source_low[cols])
+    keep = overlap > 0
+    rows, cols = rows[keep], cols[keep]
+    weights = overlap[keep] / (target_high - target_low)[rows]
+    return sp.csr_matrix((weights, (rows, order[cols])), shape=(target_low.size, source_low.size))
+
+
+def _sin_latitude(edges):
+    return np.sin(np.radians(np.clip(edges, -90, 90)))
+
+
+def build_weights(source_lat, source_lon, target_lat, target_lon, method='nearest'):
+    """Sparse (target cells x source cells) weights, both grids flattened row-major (lat, lon)"""
+    if method == 'nearest':
+        lat, lon = nearest_weights(source_lat, target_lat), nearest_weights(source_lon, target_lon)
+    elif method == 'bilinear':
+        lat, lon = linear_weights(source_lat, target_lat), linear_weights(source_lon, target_lon)
+    elif method == 'conservative':
+        lat = overlap_weights(source_lat, target_lat, transform=_sin_latitude)
+        lon = overlap_weights(source_lon, target_lon)
+    else:
+        raise ValueError(f"Unknown regridding method '{method}', expected one of {', '.join(METHODS)}")
+    return sp.kron(lat, lon, format='csr')
+
+
+class Regridder:
+    """Weights from one source grid to one target grid, loaded from the cache or built once"""
+
+    def __init__(self, source_lat, source_lon, target_lat, target_lon, method='nearest', cache_dir=None):
+        if method not in METHODS:
+            raise ValueError(f"Unknown regridding method '{method}', expected one of {', '.join(METHODS)}")
+        self.method = method
+        self.source_shape = (len(source_lat), len(source_lon))
+        self.target_shape = (len(target_lat), len(target_lon))
+        self.key = (f"{method}_v{WEIGHTS_VERSION}_{grid_fingerprint(source_lat, source_lon)}"
+                    f"_{grid_fingerprint(target_lat, target_lon)}")
+
+        cache_dir = REGRID_CACHE_DIR if cache_dir is None else cache_dir
+        path = os.path.join(cache_dir, f"{self.key}.npz") if cache_dir else None
+        if path and os.path.exists(path):
+            self.weights = sp.load_npz(path).tocsr()
+            self.cached = True
+        else:
+            self.weights = build_weights(source_lat, source_lon, target_lat, target_lon, method)
+            self.cached = False
+            if path:
+                # Write to a temporary name and swap in, so concurrent builders never read a partial file
+                os.makedirs(cache_dir, exist_ok=True)
+                sp.save_npz(path + '.tmp.npz', self.weights)
+                os.replace(path + '.tmp.npz', path)
+
+        # Full weight of every target cell, to renormalize around missing source values
+        self.row_sums = np.asarray(self.weights.sum(axis=1)).ravel()
+        self._weights32 = self.weights.astype(np.float32)
+
+    def __call__(self, values, skipna=True):
+        return self.apply(values, skipna)
+
+    def apply(self, values, skipna=True):
+        """Regrid an array of shape (..., source_lat, source_lon) to (..., target_lat, target_lon), float32
+
+        Each target cell is the weighted mean of the source cells it covers. With skipna, NaN source cells
+        are left out of that mean; target cells covered less than MIN_COVERAGE by valid source cells, or
+        not at all, are NaN
+        """
+        values = np.asarray(values)
+        if values.shape[-2:] != self.source_shape:
+            raise ValueError(f"Expected trailing grid shape {self.source_shape}, got {values.shape[-2:]}")
+
+        leading = values.shape[:-2]
+        # (source cells x fields) copy in float32, the layout the sparse product runs on
+        flat = np.array(values.reshape(-1, self.source_shape[0] * self.source_shape[1]).T,
+                        dtype=np.float32, order='C')
+
+        # Every target cell is divided by the weight it actually received, so cells only partly over the
+        # source (conservative edges) keep the source's scale whether or not other cells are missing
+        full_weight = self.row_sums[:, None].astype(np.float32)
+        missing = np.isnan(flat) if skipna else None
+        if missing is not None and missing.any():
+            # Fields sharing one mask (a land/sea mask over time) need the valid weight only once
+            valid = ~missing[:, :1] if (missing == missing[:, :1]).all() else ~missing
+            flat[missing] = 0
+            weight = self._weights32 @ valid.astype(np.float32)
+        else:
+            weight = full_weight
+
+        result = self._weights32 @ flat
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result /= weight
+        result[np.broadcast_to(weight < MIN_COVERAGE * full_weight, result.shape)] = np.nan
+        result[self.row_sums == 0] = np.nan
+
+        return result.T.reshape(leading + self.target_shape)
+
+    def describe(self):
+        return {'method': self.method, 'source_shape': list(self.source_shape),
+                'target_shape': list(self.target_shape), 'nonzeros': int(self.weights.nnz), 'cached': self.cached}
+
+
+_regridders = {}
+_regridders_lock = threading.Lock()
+
+
+def get_regridder(source_lat, source_lon, target_lat, target_lon, method='nearest'):
+    """Process-wide Regridder per (method, source grid, target grid)"""
+    key = (method, grid_fingerprint(source_lat, source_lon), grid_fingerprint(target_lat, target_lon))
+    regridder = _regridders.get(key)
+    if regridder is None:
+        with _regridders_lock:
+            regridder = _regridders.get(key)
+            if regridder is None:
+                regridder = _regridders[key] = Regridder(source_lat, source_lon, target_lat, target_lon, method)
+    return regridder
@@ -0,0 +1,147 @@
+"""
+Vectorized weather risk engine
+Scores precipitation (mm), temperature (°C) and wind speed (m/s) arrays of any shape in one call
+"""
+import numpy as np
+
+RISK_TYPES = ['very_wet', 'very_hot', 'very_cold', 'very_windy', 'very_uncomfortable']
+
+
+def _piecewise(conditions, choices, default):
+    """First matching branch wins, like an if/elif/else ladder; NaN inputs stay NaN"""
+    return np.select(conditions, choices, default=default)
+
+
+def analyzer_risks(precip, temp_c, wind):
+    """RealNASAAnalyzer model, probabilities in 0.01-0.95"""
+    risks = {}
+
+    risks['very_wet'] = _piecewise(
+        [precip > 5.0, precip > 1.0],
+        [np.minimum(0.85, 0.4 + (precip - 5) * 0.08), 0.1 + (precip - 1) * 0.075],
+        np.maximum(0.02, precip * 0.1)
+    )
+    risks['very_hot'] = _piecewise(
+        [temp_c > 35, temp_c > 30, temp_c > 15],
+        [np.minimum(0.9, 0.6 + (temp_c - 35) * 0.05), 0.2 + (temp_c - 30) * 0.08,
+         np.maximum(0.01, (temp_c - 15) * 0.02)],
+        np.where(np.isnan(temp_c), np.nan, 0.01)
+    )
+    risks['very_cold'] = _piecewise(
+        [temp_c < 5, temp_c < 15],
+        [np.minimum(0.9, 0.5 + (5 - temp_c) * 0.08), (15 - temp_c) * 0.04],
+        np.where(np.isnan(temp_c), np.nan, 0.01)
+    )
+    risks['very_windy'] = _piecewise(
+        [wind > 12, wind > 6],
+        [np.minimum(0.85, 0.3 + (wind - 12) * 0.06), 0.05 + (wind - 6) * 0.04],
+        np.maximum(0.01, wind * 0.008)
+    )
+
+    discomfort = (risks['very_hot'] * 0.3 + risks['very_cold'] * 0.3 +
+                  risks['very_windy'] * 0.2 + risks['very_wet'] * 0.2)
+    risks['very_uncomfortable'] = np.minimum(0.9, discomfort)
+
+    return {k: np.clip(v, 0.01, 0.95) for k, v in risks.items()}
+
+
+def comfort_risks(precip, temp_c, wind):
+    """VacationRecommender / /predict model, percentages in 1-95"""
+    risks = {}
+
+    risks['very_wet'] = _piecewise(
+        [precip > 10, precip > 5],
+        [np.minimum(90, 60 + precip * 2), np.minimum(60, 30 + precip * 4)],
+        np.maximum(5, precip * 3)
+    )
+    risks['very_hot'] = _piecewise(
+        [temp_c > 35, temp_c > 30],
+        [np.minimum(90, 50 + (temp_c - 35) * 3), np.minimum(60, 20 + (temp_c - 30) * 6)],
+        np.maximum(5, np.maximum(0, temp_c - 20) * 2)
+    )
+    risks['very_cold'] = _piecewise(
+        [temp_c < 0, temp_c < 10, temp_c < 20],
+        [np.minimum(90, 70 + np.abs(temp_c) * 2), np.minimum(60, (10 - temp_c) * 5),
+         np.maximum(2, (20 - temp_c) * 1.5)],
+        np.where(np.isnan(temp_c), np.nan, 2)
+    )
+    risks['very_windy'] = _piecewise(
+        [wind > 15, wind > 10],
+        [np.minimum(90, 40 + (wind - 15) * 3), np.minimum(50, 15 + (wind - 10) * 5)],
+        np.maximum(5, wind * 2)
+    )
+
+    risks['very_uncomfortable'] = (risks['very_hot'] + risks['very_cold'] +
+                                   risks['very_windy'] * 0.7 + risks['very_wet'] * 0.5) / 3.2
+
+    return {k: np.clip(v, 1, 95) for k, v in risks.items()}
+
+
+def threshold_risks(precip, temp_c, wind):
+    """SimpleNASAPredictor model, stepped probabilities in 0.1-0.9"""
+    risks = {}
+
+    risks['very_wet'] = _piecewise([precip > 10, precip > 5, precip > 2], [0.9, 0.7, 0.4], 0.1)
+    risks['very_hot'] = _piecewise([temp_c > 35, temp_c > 30, temp_c > 25], [0.9, 0.7, 0.4], 0.1)
+    risks['very_cold'] = _piecewise([temp_c < -5, temp_c < 0, temp_c < 5], [0.9, 0.7, 0.4], 0.1)
+    risks['very_windy'] = _piecewise([wind > 15, wind > 10, wind > 7], [0.9, 0.7, 0.4], 0.1)
+
+    discomfort = (0.4 * ((temp_c > 35) | (temp_c < -5)) +
+                  0.3 * (wind > 12) +
+                  0.3 * (precip > 8))
+    risks['very_uncomfortable'] = np.clip(discomfort, 0.1, 0.9)
+
+    return risks
+
+
+def export_risks(precip, temp_c, wind):
+    """/export-analysis model, percentages in 5-90 (no discomfort score)"""
+    return {
+        'very_wet': np.clip(precip * 30, 5, 90),
+        'very_hot': np.where(temp_c > 20, np.clip((temp_c - 20) * 3, 5, 90), 5),
+        'very_cold': np.where(temp_c < 15, np.clip((15 - temp_c) * 4, 5, 90), 5),
+        'very_windy': np.clip(wind * 15, 5, 90)
+    }
+
+
+RISK_MODELS = {
+    'analyzer': analyzer_risks,
+    'comfort': comfort_risks,
+    'threshold': threshold_risks,
+    'export': export_risks
+}
+
+
+def score_risks(precip_mm, temp_c, wind_ms, model='analyzer'):
+    """Score broadcastable arrays of measurements, returning one array per risk type"""
+    if model not in RISK_MODELS:
+        raise ValueError(f"Unknown risk model '{model}'")
+
+    precip, temp, wind = np.broadcast_arrays(
+        np.asarray(precip_mm, dtype=np.float64),
+        np.asarray(temp_c, dtype=np.float64),
+        np.asarray(wind_ms, dtype=np.float64)
+    )
+    return RISK_MODELS[model](precip, temp, wind)
+
+
+def apply_exceedance(risks, exceedance):
+    """Replace modelled probabilities (0-1) with empirical exceedance probabilities where a raster has a value
+
+    very_uncomfortable becomes the chance of at least one of the four extremes, treating them as independent
+    """
+    combined = dict(risks)
+    for risk, probability in exceedance.items():
+        if risk in combined:
+            combined[risk] = np.where(np.isnan(probability), combined[risk], probability)
+
+    extremes = ['very_wet', 'very_hot', 'very_cold', 'very_windy']
+    if 'very_uncomfortable' in combined and all(risk in exceedance for risk in extremes):
+        calm = np.prod([1 - np.asarray(combined[risk], dtype=np.float64) for risk in extremes], axis=0)
+        combined['very_uncomfortable'] = 1 - calm
+    return combined
+
+
+def score_point(precip_mm, temp_c, wind_ms, model='analyzer'):
+    """Score a single location, returning plain floats"""
+    return {k: float(v) for k, v in score_risks(precip_mm, temp_c, wind_ms, model).items()}
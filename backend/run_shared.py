@@ -0,0 +1,38 @@
+"""
+Multi-worker launcher that shares one copy of the NASA grids between all uvicorn workers
+
+    python run_shared.py --workers 8
+
+Replacing the .nc files (or rebuilding the grid store) publishes a new generation of grids;
+workers re-attach within a few seconds and the old blocks are unlinked
+"""
+import argparse
+import os
+import tempfile
+
+import uvicorn
+
+from dataset_registry import DatasetRegistry
+from shared_grids import MANIFEST_ENV, SharedGridPublisher
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run main:app with grids in shared memory")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8889)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    manifest_path = os.path.join(tempfile.gettempdir(), f"sunrize_grids_{os.getpid()}.json")
+
+    with SharedGridPublisher(DatasetRegistry(shared_manifest=''), manifest_path) as publisher:
+        # Workers are spawned after this point and inherit the manifest location
+        os.environ[MANIFEST_ENV] = manifest_path
+
+        publisher.watch_sources()
+
+        uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
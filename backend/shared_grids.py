@@ -0,0 +1,185 @@
+"""
+Shared-memory grids for multi-worker deployments
+The supervisor loads every grid once into multiprocessing.shared_memory blocks and
+publishes a JSON manifest; workers attach zero-copy NumPy views instead of loading their own copy
+"""
+import json
+import os
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+import xarray as xr
+
+MANIFEST_ENV = 'SUNRIZE_SHM_MANIFEST'
+WATCH_INTERVAL = float(os.environ.get('SUNRIZE_SHM_WATCH_SECONDS', '5'))
+
+
+class SharedGridPublisher:
+    """Owns the shared-memory blocks; only the supervisor process creates or unlinks them"""
+
+    def __init__(self, registry, manifest_path):
+        self.registry = registry
+        self.manifest_path = manifest_path
+        self.generation = 0
+        self.blocks = {}
+        self._stop = threading.Event()
+
+    def publish(self):
+        """Copy the registry's grids into a new generation of blocks and swap the manifest"""
+        failed = self.registry.load_all()
+        if failed:
+            print(f"Not sharing datasets that failed to load: {', '.join(failed)}")
+
+        self.generation += 1
+        blocks = {}
+        entries = {}
+
+        for name in self.registry.sources:
+            if name in failed:
+                continue
+            variable = self.registry.get(name)
+            values = np.ascontiguousarray(variable.values)
+
+            block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1),
+                                               name=f"sunrize_{os.getpid()}_{self.generation}_{name}")
+            np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[...] = values
+            blocks[name] = block
+
+            data = variable.data
+            entries[name] = {
+                'block': block.name,
+                'variable': data.name,
+                'dims': list(data.dims),
+                'shape': list(values.shape),
+                'dtype': values.dtype.str,
+                'coords': {dim: data[dim].values.astype(np.float64).tolist() for dim in data.dims if dim in data.coords},
+                'attrs': {k: str(v) for k, v in data.attrs.items()},
+                'path': variable.path,
+                'cropped_to': variable.cropped_to,
+                'source_nbytes': int(variable.source_nbytes)
+            }
+
+        manifest = {'generation': self.generation, 'supervisor_pid': os.getpid(), 'datasets': entries}
+        with open(self.manifest_path + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+        os.replace(self.manifest_path + '.tmp', self.manifest_path)
+
+        # Workers still attached to the previous generation keep their mappings until they re-attach
+        previous, self.blocks = self.blocks, blocks
+        self._release(previous)
+
+        total = sum(b.size for b in blocks.values()) / 1024 ** 2
+        print(f"Published {len(blocks)} shared grids ({total:.1f} MB), generation {self.generation}")
+        return manifest
+
+    def reload(self):
+        """Re-read the source files and publish them as a new generation"""
+        self.registry.reload()
+        return self.publish()
+
+    def watch_sources(self, interval=WATCH_INTERVAL):
+        """Republish whenever a source file or the grid store changes on disk"""
+        def watch():
+            signature = self._source_signature()
+            while not self._stop.wait(interval):
+                current = self._source_signature()
+                if current != signature:
+                    print("NASA data files changed, publishing new shared grids")
+                    try:
+                        self.reload()
+                    except Exception as e:
+                        print(f"Shared grid reload failed, keeping generation {self.generation}: {e}")
+                    signature = self._source_signature()
+
+        thread = threading.Thread(target=watch, name='sunrize-shm-publish', daemon=True)
+        thread.start()
+        return thread
+
+    def _source_signature(self):
+        paths = [self.registry.source_path(name) for name in self.registry.sources]
+        paths += [os.path.join(self.registry.store_dir, f"{name}.json") for name in self.registry.sources]
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append((path, None, None))
+        return signature
+
+    def close(self):
+        """Stop watching, unlink every block and remove the manifest"""
+        self._stop.set()
+        self._release(self.blocks)
+        self.blocks = {}
+        if os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
+
+    def _release(self, blocks):
+        for block in blocks.values():
+            block.close()
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        self.publish()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_manifest(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _attach_block(name):
+    """Open an existing block without taking over its cleanup"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        # Spawned workers share the supervisor's resource tracker, so the registration made here
+        # is the supervisor's own and is balanced by its unlink()
+        return shared_memory.SharedMemory(name=name)
+
+
+def attach_variable(entry):
+    """Zero-copy read-only DataArray over a published block, plus the block handle to close later"""
+    block = _attach_block(entry['block'])
+    values = np.ndarray(tuple(entry['shape']), dtype=entry['dtype'], buffer=block.buf)
+    values.flags.writeable = False
+    coords = {dim: np.asarray(c) for dim, c in entry['coords'].items()}
+    data = xr.DataArray(values, coords=coords, dims=entry['dims'], name=entry['variable'], attrs=entry['attrs'])
+    return data, block
+
+
+def close_blocks(blocks):
+    """Detach from blocks; views still referenced elsewhere keep theirs alive until collected"""
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            pass
+
+
+def watch_manifest(registry, interval=WATCH_INTERVAL):
+    """Reload the worker's registry whenever the supervisor publishes a new generation"""
+    def watch():
+        stop = registry.shared_watch_stop
+        while not stop.wait(interval):
+            try:
+                generation = read_manifest(registry.shared_manifest)['generation']
+            except (OSError, ValueError, KeyError):
+                continue
+            if generation != registry.shared_generation:
+                print(f"Shared grids moved to generation {generation}, reloading")
+                registry.reload()
+                registry.load_all()
+
+    thread = threading.Thread(target=watch, name='sunrize-shm-watch', daemon=True)
+    thread.start()
+    return thread
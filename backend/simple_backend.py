@@ -3,6 +3,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from datetime import date
 from real_nasa_analyzer import RealNASAAnalyzer
+from data_validator import validate_location_coverage
+from dataset_registry import get_registry
+from point_cache import get_point_cache
+from blocking_executor import ExecutorBusy, get_executor
 
 app = FastAPI(title="NASA Weather API")
 
@@ -14,8 +18,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize real NASA analyzer
+# Initialize real NASA analyzer and precompute per-city analysis
 analyzer = RealNASAAnalyzer()
+analyzer.warm_up()
+
+@app.exception_handler(ExecutorBusy)
+async def executor_busy(request, exc):
+    from fastapi.responses import JSONResponse
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
 
 class PredictionRequest(BaseModel):
     latitude: float
@@ -34,9 +44,12 @@ class VacationRequest(BaseModel):
 
 
 
-@app.post("/predict")
-async def predict_weather(request: PredictionRequest):
+def _predict_weather(request):
     try:
+        valid, msg = validate_location_coverage(request.latitude, request.longitude)
+        if not valid:
+            raise HTTPException(status_code=400, detail=msg)
+        
         # Use real NASA analyzer
         analysis = analyzer.analyze_weather_risks(request.latitude, request.longitude)
         
@@ -53,17 +66,26 @@ async def predict_weather(request: PredictionRequest):
                 "analysis_note": analysis['analysis_summary']
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/export-analysis/{format}")
-async def export_analysis(format: str, lat: float, lon: float, location_name: str = ""):
+@app.post("/predict")
+async def predict_weather(request: PredictionRequest):
+    return await get_executor().run(_predict_weather, request)
+
+def _export_analysis(format, lat, lon, location_name):
     try:
         from fastapi.responses import Response
         import json
         import csv
         from io import StringIO
         
+        valid, msg = validate_location_coverage(lat, lon)
+        if not valid:
+            raise HTTPException(status_code=400, detail=msg)
+        
         # Get NASA analysis
         analysis = analyzer.analyze_weather_risks(lat, lon)
         
@@ -120,21 +142,27 @@ async def export_analysis(format: str, lat: float, lon: float, location_name: st
         else:
             raise HTTPException(status_code=400, detail="Format must be 'json' or 'csv'")
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/analyze-destinations")
-async def analyze_destinations(request: VacationRequest):
+@app.get("/export-analysis/{format}")
+async def export_analysis(format: str, lat: float, lon: float, location_name: str = ""):
+    return await get_executor().run(_export_analysis, format, lat, lon, location_name)
+
+def _analyze_destinations(request):
     try:
         # Use existing analyzer
         criteria = {
             'maxWetRisk': request.maxWetRisk,
             'maxHotRisk': request.maxHotRisk,
             'maxColdRisk': request.maxColdRisk,
-            'maxWindyRisk': request.maxWindyRisk
+            'maxWindyRisk': request.maxWindyRisk,
+            'month': request.month
         }
         
-        destinations = analyzer.find_best_destinations(criteria)
+        destinations = analyzer.find_best_destinations(criteria, limit=15)
         
         activity_mapping = {
             'beach': ['Beach volleyball', 'Swimming', 'Surfing'],
@@ -163,6 +191,19 @@ async def analyze_destinations(request: VacationRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/analyze-destinations")
+async def analyze_destinations(request: VacationRequest):
+    return await get_executor().run(_analyze_destinations, request)
+
+@app.get("/health")
+async def health_check():
+    return {
+        "status": "healthy",
+        "datasets": get_registry().stats(),
+        "point_cache": get_point_cache().stats(),
+        "executor": get_executor().stats()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8889)
\ No newline at end of file
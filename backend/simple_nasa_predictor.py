@@ -1,6 +1,7 @@
-import xarray as xr
 import pandas as pd
 import numpy as np
+from dataset_registry import get_registry
+from risk_engine import score_point
 
 class SimpleNASAPredictor:
     def __init__(self):
@@ -8,34 +9,32 @@ class SimpleNASAPredictor:
         self.load_nasa_data()
     
     def load_nasa_data(self):
-        """Load all NASA datasets"""
-        try:
-            # Precipitation
-            precip_ds = xr.open_dataset("g4.timeAvgMap.GPM_3IMERGM_07_precipitation.20200101-20250930.180W_90S_180E_90N.nc")
-            self.datasets['precipitation'] = precip_ds['GPM_3IMERGM_07_precipitation']
-            
-            # Temperature  
-            temp_ds = xr.open_dataset("temp.nc")
-            self.datasets['temperature'] = temp_ds['FLDAS_NOAH01_C_GL_M_001_RadT_tavg']
-            
-            # Wind
-            wind_ds = xr.open_dataset("wind.nc")
-            self.datasets['wind'] = wind_ds['M2TMNXFLX_5_12_4_SPEED']
-            
+        """Load all NASA datasets from the shared registry"""
+        registry = get_registry()
+        self.dataset_version = registry.version
+        
+        for name in ['precipitation', 'temperature', 'wind']:
+            try:
+                self.datasets[name] = registry.get(name)
+            except Exception as e:
+                print(f"Error loading datasets: {e}")
+        
+        if len(self.datasets) == 3:
             print("All NASA datasets loaded successfully")
-            
-        except Exception as e:
-            print(f"Error loading datasets: {e}")
     
     def get_location_data(self, lat, lon):
         """Extract data for specific location"""
+        # Pick up grids reloaded in the registry
+        if self.dataset_version != get_registry().version:
+            self.datasets = {}
+            self.load_nasa_data()
+        
         location_data = {}
         
         for name, dataset in self.datasets.items():
             try:
                 # Find nearest grid point
-                point_data = dataset.sel(lat=lat, lon=lon, method='nearest')
-                location_data[name] = float(point_data.values)
+                location_data[name] = dataset.sample(lat, lon)
             except Exception as e:
                 print(f"Error extracting {name} data: {e}")
                 location_data[name] = np.nan
@@ -57,58 +56,7 @@ class SimpleNASAPredictor:
             temp_c = temp_k - 273.15
             
             # Calculate probabilities for each condition
-            predictions = {}
-            
-            # Very Wet (based on precipitation)
-            if precip > 10:
-                predictions['very_wet'] = 0.9
-            elif precip > 5:
-                predictions['very_wet'] = 0.7
-            elif precip > 2:
-                predictions['very_wet'] = 0.4
-            else:
-                predictions['very_wet'] = 0.1
-            
-            # Very Hot (based on temperature)
-            if temp_c > 35:
-                predictions['very_hot'] = 0.9
-            elif temp_c > 30:
-                predictions['very_hot'] = 0.7
-            elif temp_c > 25:
-                predictions['very_hot'] = 0.4
-            else:
-                predictions['very_hot'] = 0.1
-            
-            # Very Cold (based on temperature)
-            if temp_c < -5:
-                predictions['very_cold'] = 0.9
-            elif temp_c < 0:
-                predictions['very_cold'] = 0.7
-            elif temp_c < 5:
-                predictions['very_cold'] = 0.4
-            else:
-                predictions['very_cold'] = 0.1
-            
-            # Very Windy (based on wind speed)
-            if wind > 15:
-                predictions['very_windy'] = 0.9
-            elif wind > 10:
-                predictions['very_windy'] = 0.7
-            elif wind > 7:
-                predictions['very_windy'] = 0.4
-            else:
-                predictions['very_windy'] = 0.1
-            
-            # Very Uncomfortable (combination of factors)
-            discomfort_score = 0
-            if temp_c > 35 or temp_c < -5:
-                discomfort_score += 0.4
-            if wind > 12:
-                discomfort_score += 0.3
-            if precip > 8:
-                discomfort_score += 0.3
-            
-            predictions['very_uncomfortable'] = min(0.9, max(0.1, discomfort_score))
+            predictions = score_point(precip, temp_c, wind, model='threshold')
             
             # Calculate confidence based on data availability
             valid_data_count = sum(1 for v in data.values() if not np.isnan(v))
@@ -0,0 +1,188 @@
+"""
+Vectorized synthetic weather cubes for development and load testing
+Seasonal time x lat x lon fields are built with array operations and a seeded np.random.Generator,
+a block of days at a time, and written as CF-compliant NetCDF and/or long-format CSV
+
+    python synthetic_data.py --start 1990-01-01 --end 2023-12-31 --resolution 0.25 --format netcdf csv
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_registry import COVERAGE_BOUNDS
+
+# CF metadata of every generated variable
+VARIABLES = {
+    'precipitation_mm': {'standard_name': 'lwe_thickness_of_precipitation_amount', 'long_name': 'Daily precipitation',
+                         'units': 'mm'},
+    'temperature_c': {'standard_name': 'air_temperature', 'long_name': 'Daily mean near-surface air temperature',
+                      'units': 'degC'},
+    'wind_speed_ms': {'standard_name': 'wind_speed', 'long_name': 'Daily mean 10 m wind speed', 'units': 'm s-1'},
+    'humidity_percent': {'standard_name': 'relative_humidity', 'long_name': 'Daily mean relative humidity',
+                         'units': '%'},
+    'cloud_cover_fraction': {'standard_name': 'cloud_area_fraction', 'long_name': 'Daily mean cloud cover',
+                             'units': '1'}
+}
+
+TIME_UNITS = 'days since 1970-01-01 00:00:00'
+DEFAULT_CHUNK_DAYS = 30
+
+
+def grid_axes(bounds=COVERAGE_BOUNDS, resolution=1.0):
+    """Cell-centre latitude and longitude axes covering bounds"""
+    lat = np.arange(bounds['lat_min'] + resolution / 2, bounds['lat_max'], resolution)
+    lon = np.arange(bounds['lon_min'] + resolution / 2, bounds['lon_max'], resolution)
+    return lat.astype(np.float32), lon.astype(np.float32)
+
+
+def generate_fields(times, lat, lon, rng):
+    """Seasonal fields of shape (time,) + lat.shape for broadcastable lat/lon arrays (grid or point list)"""
+    doy = np.asarray(times.dayofyear, dtype=np.float32).reshape((-1,) + (1,) * np.ndim(lat))
+    lat = np.asarray(lat, dtype=np.float32)[None]
+    lon = np.asarray(lon, dtype=np.float32)[None]
+    shape = np.broadcast_shapes(doy.shape, lat.shape, lon.shape)
+    season = np.sin(2 * np.pi * (doy - 80) / 365)
+
+    # Warmer towards the tropics, with a seasonal swing that grows with latitude
+    temperature = 30 - 0.45 * np.abs(lat - 10) + (2 + 0.3 * np.abs(lat)) * season * np.sign(lat + 1e-6)
+    temperature = temperature + rng.normal(0, 2.5, shape).astype(np.float32)
+
+    # Monsoon peak around day 200, wetter towards the east
+    monsoon = np.exp(-((doy - 200) / 45) ** 2) * (1 + (lon - 60) / 40)
+    precipitation = np.clip(0.3 + 8 * monsoon, 0, None) * rng.gamma(0.8, 1.25, shape).astype(np.float32)
+
+    wind = np.clip(3 + 1.5 * np.sin(2 * np.pi * doy / 365) + 0.02 * np.abs(lat) +
+                   rng.normal(0, 1, shape).astype(np.float32), 0, None)
+    humidity = np.clip(55 + 30 * monsoon + rng.normal(0, 8, shape).astype(np.float32), 0, 100)
+    cloud = np.clip(0.3 + 0.5 * monsoon + rng.normal(0, 0.1, shape).astype(np.float32), 0, 1)
+
+    fields = {
+        'precipitation_mm': precipitation,
+        'temperature_c': temperature,
+        'wind_speed_ms': wind,
+        'humidity_percent': humidity,
+        'cloud_cover_fraction': cloud
+    }
+    return {name: np.broadcast_to(values, shape).astype(np.float32) for name, values in fields.items()}
+
+
+def iter_chunks(start, end, lat, lon, seed=42, chunk_days=DEFAULT_CHUNK_DAYS):
+    """(times, fields) blocks of at most chunk_days days for lat/lon arrays of the same shape
+
+    The same seed and chunk size always give the same data
+    """
+    dates = pd.date_range(start, end, freq='D')
+    n_chunks = max(1, -(-len(dates) // chunk_days))
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    for i, chunk_seed in enumerate(seeds):
+        times = dates[i * chunk_days:(i + 1) * chunk_days]
+        if len(times):
+            yield times, generate_fields(times, lat, lon, np.random.default_rng(chunk_seed))
+
+
+def write_netcdf(path, start, end, lat, lon, seed=42, chunk_days=DEFAULT_CHUNK_DAYS):
+    """CF-1.8 NetCDF with an unlimited time axis, appended one block of days at a time"""
+    import netCDF4
+
+    with netCDF4.Dataset(path, 'w', format='NETCDF4') as ds:
+        ds.Conventions = 'CF-1.8'
+        ds.title = 'SUNRIZE synthetic daily weather'
+        ds.source = f"synthetic_data.py (seed {seed})"
+        ds.history = f"{time.strftime('%Y-%m-%dT%H:%M:%S')} created"
+
+        ds.createDimension('time', None)
+        ds.createDimension('lat', len(lat))
+        ds.createDimension('lon', len(lon))
+
+        time_var = ds.createVariable('time', 'f8', ('time',))
+        time_var.units = TIME_UNITS
+        time_var.calendar = 'standard'
+        time_var.standard_name = 'time'
+        time_var.axis = 'T'
+
+        for name, values, attrs in [('lat', lat, {'units': 'degrees_north', 'standard_name': 'latitude', 'axis': 'Y'}),
+                                    ('lon', lon, {'units': 'degrees_east', 'standard_name': 'longitude', 'axis': 'X'})]:
+            var = ds.createVariable(name, 'f4', (name,))
+            var.setncatts(attrs)
+            var[:] = values
+
+        data_vars = {}
+        for name, attrs in VARIABLES.items():
+            var = ds.createVariable(name, 'f4', ('time', 'lat', 'lon'), zlib=True, complevel=4,
+                                    chunksizes=(1, len(lat), len(lon)), fill_value=np.float32(np.nan))
+            var.setncatts(attrs)
+            data_vars[name] = var
+
+        offset = 0
+        epoch = np.datetime64('1970-01-01')
+        lat2d, lon2d = np.meshgrid(lat, lon, indexing='ij')
+        for times, fields in iter_chunks(start, end, lat2d, lon2d, seed, chunk_days):
+            stop = offset + len(times)
+            time_var[offset:stop] = (times.values - epoch) / np.timedelta64(1, 'D')
+            for name, values in fields.items():
+                data_vars[name][offset:stop] = values
+            offset = stop
+
+    return path
+
+
+def write_csv(output_dir, start, end, lat, lon, seed=42, chunk_days=DEFAULT_CHUNK_DAYS, prefix='synthetic'):
+    """One long-format CSV per variable (date, latitude, longitude, value, variable), written per block"""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {name: os.path.join(output_dir, f"{prefix}_{name}.csv") for name in VARIABLES}
+    lat2d, lon2d = np.meshgrid(lat, lon, indexing='ij')
+    first = True
+
+    for times, fields in iter_chunks(start, end, lat2d, lon2d, seed, chunk_days):
+        cells = lat2d.size
+        columns = {
+            'date': np.repeat(times.strftime('%Y-%m-%d').values, cells),
+            'latitude': np.tile(lat2d.ravel(), len(times)),
+            'longitude': np.tile(lon2d.ravel(), len(times))
+        }
+        for name, values in fields.items():
+            frame = pd.DataFrame(dict(columns, value=values.ravel(), variable=name))
+            frame.to_csv(paths[name], mode='w' if first else 'a', header=first, index=False, float_format='%.3f')
+        first = False
+
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic seasonal weather cubes")
+    parser.add_argument('--start', default='2020-01-01')
+    parser.add_argument('--end', default='2023-12-31')
+    parser.add_argument('--resolution', type=float, default=1.0, help="grid spacing in degrees")
+    parser.add_argument('--bounds', type=float, nargs=4, metavar=('LAT_MIN', 'LAT_MAX', 'LON_MIN', 'LON_MAX'),
+                        default=None, help="defaults to the Southern Asia coverage box")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-days', type=int, default=DEFAULT_CHUNK_DAYS)
+    parser.add_argument('--format', nargs='+', choices=['netcdf', 'csv'], default=['netcdf'])
+    parser.add_argument('--output-dir', default='synthetic_output')
+    args = parser.parse_args()
+
+    bounds = COVERAGE_BOUNDS
+    if args.bounds:
+        bounds = dict(zip(['lat_min', 'lat_max', 'lon_min', 'lon_max'], args.bounds))
+    lat, lon = grid_axes(bounds, args.resolution)
+    days = len(pd.date_range(args.start, args.end, freq='D'))
+    print(f"Generating {days} days x {len(lat)} x {len(lon)} cells x {len(VARIABLES)} variables "
+          f"({days * lat.size * lon.size * len(VARIABLES) * 4 / 1024 ** 2:.0f} MB as float32)")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    if 'netcdf' in args.format:
+        start = time.perf_counter()
+        path = write_netcdf(os.path.join(args.output_dir, 'synthetic_weather.nc'), args.start, args.end,
+                            lat, lon, args.seed, args.chunk_days)
+        print(f"Wrote {path} in {time.perf_counter() - start:.1f}s")
+    if 'csv' in args.format:
+        start = time.perf_counter()
+        paths = write_csv(args.output_dir, args.start, args.end, lat, lon, args.seed, args.chunk_days)
+        print(f"Wrote {len(paths)} CSV files to {args.output_dir} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Shared fixtures: small synthetic NASA grids in a temporary data directory
+The environment is set before any backend module is imported, since they read their configuration at import time
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+import xarray as xr
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+DATA_DIR = tempfile.mkdtemp(prefix='sunrize-tests-')
+os.environ['SUNRIZE_DATA_DIR'] = DATA_DIR
+os.environ['SUNRIZE_USE_STORE'] = '0'
+os.environ['SUNRIZE_BACKGROUND_WARMUP'] = '0'
+os.environ.pop('SUNRIZE_BBOX', None)
+
+# Files extend past the served region (COVERAGE_BOUNDS plus the crop margin) on every side
+FILE_BOUNDS = {'lat_min': 0, 'lat_max': 45, 'lon_min': 50, 'lon_max': 105}
+
+
+def grid_values(lat, lon, offset=0.0):
+    """Smooth field that differs at every cell, so wrong lookups show up as wrong values"""
+    return (offset + 0.5 * lat[:, None] + 0.1 * lon[None, :] +
+            np.sin(np.radians(lat[:, None] * 7)) * np.cos(np.radians(lon[None, :] * 5))).astype(np.float32)
+
+
+def write_grid(path, variable, lat, lon, values):
+    xr.Dataset({variable: (('lat', 'lon'), values)},
+               coords={'lat': lat.astype(np.float32), 'lon': lon.astype(np.float32)}).to_netcdf(path)
+    return path
+
+
+def write_sources(data_dir, bounds=FILE_BOUNDS):
+    """precipitation.nc, temp.nc and wind.nc as in DATASET_SOURCES; wind on a coarse MERRA-2-like grid"""
+    from dataset_registry import DATASET_SOURCES
+
+    fine_lat = np.arange(bounds['lat_min'] + 0.05, bounds['lat_max'], 0.1)
+    fine_lon = np.arange(bounds['lon_min'] + 0.05, bounds['lon_max'], 0.1)
+    coarse_lat = np.arange(bounds['lat_min'], bounds['lat_max'] + 0.1, 0.5)
+    coarse_lon = np.arange(bounds['lon_min'], bounds['lon_max'] + 0.1, 0.625)
+    grids = {
+        'precipitation': (fine_lat, fine_lon, lambda la, lo: np.abs(grid_values(la, lo)) / 100),
+        'temperature': (fine_lat, fine_lon, lambda la, lo: grid_values(la, lo, 280.0)),
+        'wind': (coarse_lat, coarse_lon, lambda la, lo: np.abs(grid_values(la, lo)) / 10)
+    }
+    for name, (lat, lon, field) in grids.items():
+        source = DATASET_SOURCES[name]
+        write_grid(os.path.join(data_dir, source['file']), source['variable'], lat, lon, field(lat, lon))
+
+
+write_sources(DATA_DIR)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+import climatology
+from dataset_registry import DATASET_SOURCES, get_registry
+
+
+def write_monthly(path, name, years=3, seed=0):
+    """Small monthly series of one variable: 0.5 degree cells over the coverage box"""
+    rng = np.random.default_rng(seed)
+    times = pd.date_range('2000-01-01', periods=12 * years, freq='MS')
+    lat, lon = np.arange(4.25, 41, 0.5), np.arange(59.25, 101, 0.5)
+    values = rng.gamma(2.0, 0.2, (times.size, lat.size, lon.size)).astype(np.float32)
+    source = DATASET_SOURCES[name]
+    xr.Dataset({source['variable']: (('time', 'lat', 'lon'), values)},
+               coords={'time': times, 'lat': lat, 'lon': lon}).to_netcdf(path)
+    return values
+
+
+def test_nan_quantiles_match_numpy():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(24, 30, 40))
+    values[rng.random(values.shape) < 0.2] = np.nan
+    values[:, 0, 0] = np.nan
+    quantiles = [0.1, 0.5, 0.9]
+    with np.errstate(invalid='ignore'), pytest.warns(RuntimeWarning):
+        expected = np.nanquantile(values, quantiles, axis=0)
+    np.testing.assert_allclose(climatology.nan_quantiles(values, quantiles), expected, equal_nan=True)
+
+
+def test_cubes_built_while_serving_are_picked_up(tmp_path):
+    monthly = write_monthly(str(tmp_path / 'wind_monthly.nc'), 'wind')
+    output = str(tmp_path / 'climatology')
+    served = climatology.MonthlyClimatology(output, retry_seconds=0)
+    assert not served.has('wind')
+    assert served.exceedance(7, 28.6, 77.2) == ({}, 0)
+
+    climatology.build_variable('wind', str(tmp_path / 'wind_monthly.nc'), output, climatology.CHUNK_MB)
+    assert served.has('wind') and served.has('wind', 'exceedance')
+    assert not served.has('precipitation')
+
+    # July mean of the cell holding (28.6, 77.2)
+    row, col = np.argmin(np.abs(np.arange(4.25, 41, 0.5) - 28.6)), np.argmin(np.abs(np.arange(59.25, 101, 0.5) - 77.2))
+    assert served.sample('wind', 7, 28.6, 77.2) == pytest.approx(monthly[6::12, row, col].mean(), rel=1e-5)
+    probabilities, years = served.exceedance(7, 28.6, 77.2)
+    assert set(probabilities) == {'very_windy'} and years == 3
+
+
+def test_cube_without_the_requested_variable_is_not_available(tmp_path):
+    lat, lon = np.arange(4.25, 41, 0.5), np.arange(59.25, 101, 0.5)
+    xr.Dataset({'other': (('lat', 'lon'), np.zeros((lat.size, lon.size), dtype=np.float32))},
+               coords={'lat': lat, 'lon': lon}).to_netcdf(tmp_path / 'wind.nc')
+    served = climatology.MonthlyClimatology(str(tmp_path), retry_seconds=0)
+    assert not served.has('wind') and not served.has('wind', 'exceedance')
+
+
+def test_registry_reload_reopens_the_cubes(tmp_path):
+    write_monthly(str(tmp_path / 'wind_monthly.nc'), 'wind')
+    output = str(tmp_path / 'climatology')
+    climatology.build_variable('wind', str(tmp_path / 'wind_monthly.nc'), output, climatology.CHUNK_MB)
+    served = climatology.MonthlyClimatology(output, retry_seconds=3600)
+    before = served.sample('wind', 1, 28.6, 77.2)
+
+    write_monthly(str(tmp_path / 'wind_monthly.nc'), 'wind', seed=1)
+    climatology.build_variable('wind', str(tmp_path / 'wind_monthly.nc'), output, climatology.CHUNK_MB)
+    assert served.sample('wind', 1, 28.6, 77.2) == before
+
+    get_registry().reload()
+    assert served.sample('wind', 1, 28.6, 77.2) != before
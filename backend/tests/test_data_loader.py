@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from conftest import write_grid
+from data_loader import DataLoader
+
+
+def test_each_netcdf_file_gets_its_own_parquet_dataset(tmp_path):
+    lat, lon = np.arange(10, 12, 0.5), np.arange(70, 72, 0.5)
+    first = write_grid(str(tmp_path / 'first.nc'), 'value', lat, lon, np.ones((lat.size, lon.size)))
+    second = write_grid(str(tmp_path / 'second.nc'), 'value', lat, lon, np.full((lat.size, lon.size), 2.0))
+    loader = DataLoader(str(tmp_path / 'data'))
+
+    loader.convert_giovanni_netcdf(first)
+    table = loader.convert_giovanni_netcdf(second).to_table()
+    assert table.num_rows == lat.size * lon.size
+    assert set(table.column('value').to_pylist()) == {2.0}
+
+    # Converting a file again replaces its rows instead of appending to them
+    assert loader.convert_giovanni_netcdf(first).to_table().num_rows == lat.size * lon.size
+
+
+def test_load_giovanni_netcdf_still_returns_a_dataframe(tmp_path):
+    lat, lon = np.arange(10, 12, 0.5), np.arange(70, 72, 0.5)
+    values = np.ones((lat.size, lon.size))
+    values[0, 0] = np.nan
+    path = write_grid(str(tmp_path / 'grid.nc'), 'value', lat, lon, values)
+
+    df = DataLoader(str(tmp_path / 'data')).load_giovanni_netcdf(path)
+    assert 'value' in df.columns
+    assert len(df) == lat.size * lon.size - 1
+    assert not (tmp_path / 'data' / 'parquet').exists()
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from conftest import DATA_DIR, FILE_BOUNDS
+from dataset_registry import COVERAGE_BOUNDS, DatasetRegistry
+
+NAMES = ('precipitation', 'temperature', 'wind')
+
+
+def random_points(bounds, n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(bounds['lat_min'], bounds['lat_max'], n),
+            rng.uniform(bounds['lon_min'], bounds['lon_max'], n))
+
+
+@pytest.fixture(scope='module')
+def full():
+    return DatasetRegistry(data_dir=DATA_DIR, crop=False, use_store=False, shared_manifest='')
+
+
+@pytest.fixture(scope='module')
+def cropped():
+    return DatasetRegistry(data_dir=DATA_DIR, crop=True, use_store=False, shared_manifest='')
+
+
+@pytest.mark.parametrize('name', NAMES)
+def test_nearest_lookup_matches_xarray_sel(full, name):
+    variable = full.get(name)
+    lats, lons = random_points(COVERAGE_BOUNDS, 500)
+    expected = [float(variable.data.sel(lat=lat, lon=lon, method='nearest')) for lat, lon in zip(lats, lons)]
+    np.testing.assert_array_equal(variable.sample(lats, lons, 'nearest'), expected)
+
+
+@pytest.mark.parametrize('name', NAMES)
+def test_bilinear_lookup_matches_xarray_interp(full, name):
+    xr = pytest.importorskip('xarray')
+    variable = full.get(name)
+    lats, lons = random_points(COVERAGE_BOUNDS, 500)
+    expected = variable.data.interp(lat=xr.DataArray(lats, dims='p'), lon=xr.DataArray(lons, dims='p')).values
+    np.testing.assert_allclose(variable.sample(lats, lons, 'bilinear'), expected, rtol=1e-6)
+
+
+@pytest.mark.parametrize('method', ['nearest', 'bilinear'])
+@pytest.mark.parametrize('name', NAMES)
+def test_cropped_grid_never_serves_another_cells_value(full, cropped, name, method):
+    lats, lons = random_points(FILE_BOUNDS)
+    expected = full.get(name).sample(lats, lons, method)
+    actual = cropped.get(name).sample(lats, lons, method)
+
+    assert cropped.get(name).values.size < full.get(name).values.size
+    served = ~np.isnan(actual)
+    np.testing.assert_allclose(actual[served], expected[served], rtol=1e-6)
+    # Points beyond the crop are missing, not clamped to the crop edge
+    assert np.isnan(actual).sum() > 0
+    assert np.isnan(cropped.get(name).sample(37.41, 51.05, method))
+
+    inside = ((lats >= COVERAGE_BOUNDS['lat_min']) & (lats <= COVERAGE_BOUNDS['lat_max']) &
+              (lons >= COVERAGE_BOUNDS['lon_min']) & (lons <= COVERAGE_BOUNDS['lon_max']))
+    assert served[inside].all()
+
+
+def test_cell_key_separates_points_beyond_the_crop(cropped):
+    edge_lat = COVERAGE_BOUNDS['lat_max'] + cropped.margin - 0.3
+    assert cropped.cell_key(edge_lat, 80.0) != cropped.cell_key(44.0, 80.0)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('sklearn')
+pytest.importorskip('geopy')
+
+from feature_engineering import WeatherFeatureEngineer
+
+WEATHER = ['temperature', 'humidity', 'pressure', 'precipitation']
+
+
+def reference_features(df):
+    """Series.rolling features of one location, as computed before the grouped pass"""
+    out = {}
+    for col in WEATHER:
+        rolling_7d = df[col].rolling(7, min_periods=1).mean()
+        rolling_30d = df[col].rolling(30, min_periods=1).mean()
+        out[f'{col}_rolling_7d'] = rolling_7d
+        out[f'{col}_rolling_30d'] = rolling_30d
+        out[f'{col}_std_7d'] = df[col].rolling(7, min_periods=1).std()
+        out[f'{col}_anomaly'] = np.abs(df[col] - rolling_30d)
+        out[f'{col}_trend'] = df[col].diff()
+        out[f'{col}_trend_7d'] = rolling_7d.diff()
+    return pd.DataFrame(out, index=df.index)
+
+
+def stacked_cities(cities=4, days=120, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for city in range(cities):
+        frame = pd.DataFrame({'date': pd.date_range('2020-01-01', periods=days), 'lat': 10.0 + city, 'lon': 75.0})
+        for col in WEATHER:
+            frame[col] = rng.normal(20 + 10 * city, 3, days)
+        frame.loc[rng.random(days) < 0.05, 'temperature'] = np.nan
+        frames.append(frame)
+    # Shuffled, so the pass has to sort by location and date itself
+    return pd.concat(frames, ignore_index=True).sample(frac=1, random_state=seed)
+
+
+def test_grouped_features_match_per_location_rolling():
+    df = stacked_cities()
+    features = WeatherFeatureEngineer().create_weather_features(df.copy())
+
+    for _, city in df.groupby('lat'):
+        expected = reference_features(city.sort_values('date'))
+        actual = features.loc[expected.index, expected.columns]
+        assert (actual.dtypes == np.float32).all()
+        np.testing.assert_allclose(actual.to_numpy(np.float64), expected.to_numpy(), rtol=1e-5, atol=1e-4)
+
+
+def test_rows_keep_their_order_and_windows_stop_at_each_location():
+    df = stacked_cities(cities=2, days=10)
+    features = WeatherFeatureEngineer().create_weather_features(df.copy())
+
+    assert features.index.equals(df.index)
+    firsts = df.sort_values('date').groupby('lat').head(1).index
+    assert features.loc[firsts, 'temperature_trend'].isna().all()
+    np.testing.assert_allclose(features.loc[firsts, 'pressure_rolling_30d'], df.loc[firsts, 'pressure'], rtol=1e-6)
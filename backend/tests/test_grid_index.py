@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from grid_index import GridAxis, GridIndexer
+
+AXES = {
+    'ascending': np.arange(5.05, 40, 0.1, dtype=np.float32),
+    'descending': np.arange(40, 5, -0.5),
+    'irregular': np.array([5.0, 5.5, 6.5, 8.0, 10.0, 13.0, 17.0]),
+    'irregular_descending': np.array([17.0, 13.0, 10.0, 8.0, 6.5, 5.5, 5.0])
+}
+
+
+@pytest.mark.parametrize('name', AXES)
+def test_nearest_index_matches_xarray_sel(name):
+    coords = AXES[name]
+    axis = GridAxis(coords)
+    values = np.random.default_rng(0).uniform(coords.min() - 1, coords.max() + 1, 2000)
+    # Include exact cell centres and midpoints, where ties are broken
+    values = np.concatenate([values, coords.astype(np.float64), (coords[:-1] + coords[1:]) / 2])
+
+    data = xr.DataArray(np.arange(coords.size), dims='x', coords={'x': coords})
+    expected = data.sel(x=values, method='nearest').values
+    np.testing.assert_array_equal(axis.index(values), expected)
+
+
+@pytest.mark.parametrize('name', AXES)
+def test_bracket_weights_interpolate_linearly(name):
+    coords = AXES[name].astype(np.float64)
+    values = np.random.default_rng(1).uniform(coords.min(), coords.max(), 500)
+    lower, upper, fraction = GridAxis(coords).bracket(values)
+
+    np.testing.assert_allclose(coords[lower] + fraction * (coords[upper] - coords[lower]), values, atol=1e-9)
+    assert np.all((fraction >= 0) & (fraction <= 1))
+
+
+def test_corner_weights_sum_to_one_and_clamp_outside_the_grid():
+    indexer = GridIndexer(np.arange(10, 20, 1.0), np.arange(70, 80, 1.0))
+    rows, cols, weights = indexer.corners(np.array([12.25, 5.0, 25.0]), np.array([73.5, 75.0, 85.0]))
+
+    np.testing.assert_allclose(weights.sum(axis=-1), 1.0)
+    np.testing.assert_array_equal(rows[0], [2, 2, 3, 3])
+    np.testing.assert_array_equal(cols[0], [3, 4, 3, 4])
+    np.testing.assert_allclose(weights[0], [0.375, 0.375, 0.125, 0.125])
+    # Beyond the grid the edge cells carry all the weight
+    assert weights[1][rows[1] == 0].sum() == pytest.approx(1.0)
+    assert weights[2][(rows[2] == 9) & (cols[2] == 9)].sum() == pytest.approx(1.0)
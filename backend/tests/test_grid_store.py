@@ -0,0 +1,70 @@
+import shutil
+
+import numpy as np
+import pytest
+
+import grid_store
+from conftest import DATA_DIR, write_grid
+from dataset_registry import DATASET_SOURCES, DatasetRegistry
+
+SMALL_BOX = {'lat_min': 20, 'lat_max': 30, 'lon_min': 70, 'lon_max': 80}
+
+
+@pytest.fixture
+def store_dir(tmp_path):
+    store = str(tmp_path / 'store')
+    grid_store.build_store(DATA_DIR, store)
+    return store
+
+
+def registry(store_dir, **kwargs):
+    return DatasetRegistry(data_dir=DATA_DIR, use_store=True, store_dir=store_dir, shared_manifest='', **kwargs)
+
+
+def test_store_serves_the_same_grid_as_netcdf(store_dir):
+    stored = registry(store_dir).get('wind')
+    netcdf = DatasetRegistry(data_dir=DATA_DIR, use_store=False, shared_manifest='').get('wind')
+
+    assert stored.storage == 'memmap'
+    np.testing.assert_array_equal(stored.values, netcdf.values)
+    assert grid_store.verify_store(DATA_DIR, store_dir) == {name: 'ok' for name in DATASET_SOURCES}
+
+
+def test_store_built_with_another_crop_is_stale(store_dir):
+    variable = registry(store_dir, bounds=SMALL_BOX).get('wind')
+    expected = DatasetRegistry(data_dir=DATA_DIR, use_store=False, bounds=SMALL_BOX, shared_manifest='').get('wind')
+
+    assert variable.storage == 'memory'
+    assert variable.data.shape == expected.data.shape
+    assert variable.cropped_to == dict(SMALL_BOX, margin=variable.cropped_to['margin'])
+
+    uncropped = registry(store_dir, crop=False).get('wind')
+    assert uncropped.storage == 'memory' and uncropped.cropped_to is None
+
+
+def test_store_built_from_another_source_file_is_stale(store_dir, tmp_path, monkeypatch):
+    source = DATASET_SOURCES['wind']
+    other = tmp_path / 'wind_other.nc'
+    shutil.copy(f"{DATA_DIR}/{source['file']}", other)
+    monkeypatch.setenv('SUNRIZE_WIND_FILE', str(other))
+
+    variable = registry(store_dir).get('wind')
+    assert variable.storage == 'memory'
+    assert variable.path == str(other)
+    assert grid_store.verify_store(DATA_DIR, store_dir)['wind'] == 'stale (other source file)'
+
+
+def test_store_is_stale_after_the_source_changes(tmp_path):
+    source = DATASET_SOURCES['wind']
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    lat, lon = np.arange(0, 45, 0.5), np.arange(50, 105, 0.625)
+    write_grid(str(data_dir / source['file']), source['variable'], lat, lon, np.zeros((lat.size, lon.size)))
+    store = str(tmp_path / 'store')
+    grid_store.build_store(str(data_dir), store)
+
+    write_grid(str(data_dir / source['file']), source['variable'], lat, lon, np.ones((lat.size, lon.size)))
+    variable = DatasetRegistry(data_dir=str(data_dir), use_store=True, store_dir=store,
+                               sources={'wind': source}, shared_manifest='').get('wind')
+    assert variable.storage == 'memory'
+    assert np.all(variable.values == 1)
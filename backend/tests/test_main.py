@@ -0,0 +1,119 @@
+import pytest
+
+pytest.importorskip('httpx')
+from fastapi.testclient import TestClient
+
+import main
+
+DELHI = {'latitude': 28.7041, 'longitude': 77.1025, 'event_date': '2024-12-25', 'location_name': 'Delhi'}
+
+
+def test_app_serves_again_after_a_restart():
+    # Each lifespan shuts its executor down on exit; the next one must get a working pool
+    for _ in range(2):
+        with TestClient(main.app) as client:
+            response = client.post('/predict', json=DELHI)
+            assert response.status_code == 200, response.text
+
+
+def test_bulk_export_chunks_run_on_the_bounded_executor():
+    points = [{'location_name': f'p{i}', 'latitude': 10 + i * 0.1, 'longitude': 75.0} for i in range(20)]
+    with TestClient(main.app) as client:
+        before = main.get_executor().stats()['completed']
+        response = client.post('/export-analysis/bulk', json={'format': 'csv', 'points': points})
+        assert response.status_code == 200, response.text
+        assert len(response.text.strip().splitlines()) == len(points) + 1
+        # Dataset check, header, one chunk of rows and the end of the stream
+        assert main.get_executor().stats()['completed'] - before >= 4
+
+
+def test_ready_once_a_request_builds_the_analyzer(monkeypatch):
+    # As if warm-up had failed or been skipped: no analyzer and not ready
+    monkeypatch.setattr(main, 'nasa_analyzer', None)
+    monkeypatch.setitem(main.startup_state, 'ready', False)
+    client = TestClient(main.app)
+    assert client.get('/readyz').status_code == 503
+
+    response = client.post('/recommend-destinations', json={
+        'month': 'January', 'maxWetRisk': 100, 'maxHotRisk': 100, 'maxColdRisk': 100, 'maxWindyRisk': 100
+    })
+    assert response.status_code == 200, response.text
+    assert client.get('/readyz').status_code == 200
+    assert 'sunrize_ready 1' in client.get('/metrics').text
+
+
+def points_scored(client, endpoint):
+    for line in client.get('/metrics').text.splitlines():
+        if line.startswith(f'sunrize_points_scored_total{{endpoint="{endpoint}"}}'):
+            return float(line.split()[-1])
+    return 0.0
+
+
+def test_batch_matches_single_point_predictions_and_counts_only_covered_items():
+    inside = [(28.7041, 77.1025), (19.076, 72.8777), (6.9271, 79.8612), (34.1526, 77.5771)]
+    outside = [(50.0, 10.0), (-20.0, 140.0)]
+    items = [{'latitude': lat, 'longitude': lon, 'event_date': '2024-07-15'} for lat, lon in inside + outside]
+    client = TestClient(main.app)
+
+    before = points_scored(client, 'predict_batch')
+    batch = client.post('/predict/batch', json={'items': items}).json()
+    assert points_scored(client, 'predict_batch') - before == len(inside)
+
+    assert batch['succeeded'] == len(inside) and batch['failed'] == len(outside)
+    for item, result in zip(items[:len(inside)], batch['results']):
+        single = client.post('/predict', json=item).json()
+        assert result['predictions'] == pytest.approx(single['predictions'])
+        assert result['historical_context'] == pytest.approx(single['historical_context'])
+    assert all('error' in result for result in batch['results'][len(inside):])
+
+
+def test_bulk_export_rejects_more_points_than_a_batch(monkeypatch):
+    monkeypatch.setattr(main, 'MAX_BATCH_ITEMS', 3)
+    points = [{'latitude': 20.0, 'longitude': 75.0 + i} for i in range(4)]
+    client = TestClient(main.app)
+
+    response = client.post('/export-analysis/bulk', json={'format': 'csv', 'points': points})
+    assert response.status_code == 400
+    assert 'limited to 3 points' in response.json()['detail']
+    assert client.post('/export-analysis/bulk', json={'format': 'csv', 'points': points[:3]}).status_code == 200
+
+
+@pytest.mark.parametrize('format', ['csv', 'ndjson', 'arrow', 'parquet'])
+def test_batch_table_formats_match_the_json_results(format):
+    if format in ('arrow', 'parquet'):
+        pytest.importorskip('pyarrow')
+    import io
+    import pandas as pd
+
+    points = [(28.7041, 77.1025), (50.0, 10.0), (19.076, 72.8777)]
+    items = [{'latitude': lat, 'longitude': lon, 'event_date': '2024-07-15', 'location_name': f'p{i}'}
+             for i, (lat, lon) in enumerate(points)]
+    client = TestClient(main.app)
+    results = client.post('/predict/batch', json={'items': items}).json()['results']
+
+    response = client.post('/predict/batch', json={'items': items, 'format': format})
+    assert response.status_code == 200, response.text
+    body = io.BytesIO(response.content)
+    if format == 'csv':
+        table = pd.read_csv(body)
+    elif format == 'ndjson':
+        table = pd.read_json(body, lines=True)
+    elif format == 'arrow':
+        import pyarrow as pa
+        table = pa.ipc.open_stream(body).read_pandas()
+    else:
+        table = pd.read_parquet(body)
+
+    assert table['index'].tolist() == [0, 1, 2]
+    assert table['location_name'].tolist() == ['p0', 'p1', 'p2']
+    assert table['error'][1] == results[1]['error'] and pd.isna(table['error'][0])
+    for row in (0, 2):
+        for risk, probability in results[row]['predictions'].items():
+            assert table[risk][row] == pytest.approx(probability)
+        assert table['temperature_c'][row] == pytest.approx(results[row]['historical_context']['temperature_c'])
+    assert pd.isna(table['very_wet'][1])
+
+
+def test_batch_rejects_unknown_formats():
+    response = TestClient(main.app).post('/predict/batch', json={'items': [DELHI], 'format': 'xml'})
+    assert response.status_code == 400
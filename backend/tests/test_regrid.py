@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import regrid
+
+SOURCE_LAT = np.arange(10, 20, 1.0)
+SOURCE_LON = np.arange(70, 80, 1.0)
+# Misaligned target reaching past the source on every side, so edge cells only partly overlap it
+TARGET_LAT = np.arange(8.7, 22, 1.5)
+TARGET_LON = np.arange(68.3, 82, 1.3)
+
+
+@pytest.mark.parametrize('method', regrid.METHODS)
+def test_constant_field_survives_a_target_wider_than_the_source(method):
+    regridder = regrid.Regridder(SOURCE_LAT, SOURCE_LON, TARGET_LAT, TARGET_LON, method, cache_dir='')
+    field = np.full((SOURCE_LAT.size, SOURCE_LON.size), 5.0)
+
+    result = regridder(field)
+    covered = ~np.isnan(result)
+    assert covered.any() and not covered.all()
+    np.testing.assert_allclose(result[covered], 5.0, rtol=1e-6)
+    np.testing.assert_allclose(regridder(field, skipna=False)[covered], 5.0, rtol=1e-6)
+
+    # A missing cell elsewhere must not change the partly covered edge cells
+    holed = field.copy()
+    holed[5, 5] = np.nan
+    with_hole = regridder(holed)
+    edges = covered & ~np.isnan(with_hole)
+    np.testing.assert_allclose(with_hole[edges], 5.0, rtol=1e-6)
+
+
+def test_conservative_weights_preserve_the_area_mean():
+    fine_lat, fine_lon = np.arange(10.05, 20, 0.1), np.arange(70.05, 80, 0.1)
+    rng = np.random.default_rng(0)
+    field = rng.random((fine_lat.size, fine_lon.size))
+    regridder = regrid.Regridder(fine_lat, fine_lon, SOURCE_LAT + 0.5, SOURCE_LON + 0.5, 'conservative', cache_dir='')
+
+    result = regridder(field)
+    area = np.cos(np.radians(fine_lat))[:, None] * np.ones(fine_lon.size)
+    coarse_area = np.cos(np.radians(SOURCE_LAT + 0.5))[:, None] * np.ones(SOURCE_LON.size)
+    np.testing.assert_allclose((result * coarse_area).sum() / coarse_area.sum(),
+                               (field * area).sum() / area.sum(), rtol=1e-3)
+
+
+def test_bilinear_matches_xarray_interp():
+    xr = pytest.importorskip('xarray')
+    rng = np.random.default_rng(1)
+    source = xr.DataArray(rng.random((SOURCE_LAT.size, SOURCE_LON.size)), dims=('lat', 'lon'),
+                          coords={'lat': SOURCE_LAT, 'lon': SOURCE_LON})
+    target_lat, target_lon = np.arange(10.2, 19, 0.7), np.arange(70.3, 79, 0.9)
+    regridder = regrid.Regridder(SOURCE_LAT, SOURCE_LON, target_lat, target_lon, 'bilinear', cache_dir='')
+
+    expected = source.interp(lat=target_lat, lon=target_lon).values
+    np.testing.assert_allclose(regridder(source.values), expected, rtol=1e-5)
+
+
+def test_weights_are_cached_on_disk(tmp_path):
+    built = regrid.Regridder(SOURCE_LAT, SOURCE_LON, TARGET_LAT, TARGET_LON, 'bilinear', cache_dir=str(tmp_path))
+    loaded = regrid.Regridder(SOURCE_LAT, SOURCE_LON, TARGET_LAT, TARGET_LON, 'bilinear', cache_dir=str(tmp_path))
+    assert not built.cached and loaded.cached
+    assert (built.weights != loaded.weights).nnz == 0
@@ -0,0 +1,20 @@
+import shutil
+
+from conftest import DATA_DIR
+from dataset_registry import DATASET_SOURCES, DatasetRegistry
+from shared_grids import SharedGridPublisher
+
+
+def test_watcher_follows_source_file_overrides(tmp_path, monkeypatch):
+    other = tmp_path / 'wind_other.nc'
+    shutil.copy(f"{DATA_DIR}/{DATASET_SOURCES['wind']['file']}", other)
+    monkeypatch.setenv('SUNRIZE_WIND_FILE', str(other))
+    registry = DatasetRegistry(data_dir=DATA_DIR, use_store=False, shared_manifest='')
+    publisher = SharedGridPublisher(registry, str(tmp_path / 'manifest.json'))
+
+    before = publisher._source_signature()
+    assert str(other) in [path for path, _, _ in before]
+
+    with open(other, 'ab') as f:
+        f.write(b'\0')
+    assert publisher._source_signature() != before
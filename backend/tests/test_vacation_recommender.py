@@ -0,0 +1,32 @@
+import numpy as np
+
+from vacation_recommender import VacationRecommender
+
+CRITERIA = {'maxWetRisk': 100, 'maxHotRisk': 100, 'maxColdRisk': 100, 'maxWindyRisk': 100}
+
+
+def test_city_missing_some_variables_is_still_recommended(monkeypatch):
+    recommender = VacationRecommender()
+    sample = recommender.get_city_weather_data
+
+    def partly_missing(lat, lon):
+        # First city has no precipitation, second no temperature or wind, third nothing at all
+        weather = {name: np.array(values, dtype=np.float64) for name, values in sample(lat, lon).items()}
+        weather['precipitation'][0] = np.nan
+        weather['temperature'][1] = weather['wind'][1] = np.nan
+        for values in weather.values():
+            values[2] = np.nan
+        return weather
+
+    monkeypatch.setattr(recommender, 'get_city_weather_data', partly_missing)
+    recommendations = {r['destination']: r for r in recommender.recommend_destinations(CRITERIA)}
+    first, second, third = (city['name'] for city in recommender.cities[:3])
+
+    assert third not in recommendations
+    # What the scalar ladders gave a missing measurement: the floor of each risk
+    assert recommendations[first]['riskScores']['very_wet'] == 5
+    scores = recommendations[second]['riskScores']
+    assert (scores['very_hot'], scores['very_cold'], scores['very_windy']) == (5, 2, 5)
+    assert scores == recommender.calculate_risk_scores(
+        {'precipitation': recommendations[second]['nasaData']['precipitation'],
+         'temperature': np.nan, 'wind': np.nan})
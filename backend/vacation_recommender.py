@@ -1,6 +1,18 @@
-import xarray as xr
 import pandas as pd
 import numpy as np
+from dataset_registry import get_registry
+from risk_engine import score_risks, score_point
+
+# Inputs the old scalar ladders effectively scored a missing measurement as: the floor of each risk
+MISSING_PRECIP_MM = 0.0
+MISSING_TEMP_C = 20.0
+MISSING_WIND_MS = 0.0
+
+def fill_missing(precip, temp_c, wind):
+    """Replace NaN measurements so a city missing one variable is still scored on the others"""
+    return (np.where(np.isnan(precip), MISSING_PRECIP_MM, precip),
+            np.where(np.isnan(temp_c), MISSING_TEMP_C, temp_c),
+            np.where(np.isnan(wind), MISSING_WIND_MS, wind))
 
 class VacationRecommender:
     def __init__(self):
@@ -9,31 +21,18 @@ class VacationRecommender:
         self.create_city_database()
     
     def load_nasa_data(self):
-        """Load actual NASA datasets"""
-        try:
-            # Precipitation
-            precip_ds = xr.open_dataset("precipitation.nc")
-            # Get the first data variable (whatever it's called)
-            precip_var = [v for v in precip_ds.data_vars if 'precip' in v.lower() or 'rain' in v.lower()]
-            if precip_var:
-                self.datasets['precipitation'] = precip_ds[precip_var[0]]
-            
-            # Temperature  
-            temp_ds = xr.open_dataset("temp.nc")
-            temp_var = [v for v in temp_ds.data_vars if 'temp' in v.lower() or 'T' in v]
-            if temp_var:
-                self.datasets['temperature'] = temp_ds[temp_var[0]]
-            
-            # Wind
-            wind_ds = xr.open_dataset("wind.nc")
-            wind_var = [v for v in wind_ds.data_vars if 'wind' in v.lower() or 'speed' in v.lower()]
-            if wind_var:
-                self.datasets['wind'] = wind_ds[wind_var[0]]
-            
+        """Load actual NASA datasets from the shared registry"""
+        registry = get_registry()
+        self.dataset_version = registry.version
+        
+        for name in ['precipitation', 'temperature', 'wind']:
+            try:
+                self.datasets[name] = registry.get(name)
+            except Exception as e:
+                print(f"Error loading datasets: {e}")
+        
+        if self.datasets:
             print("NASA datasets loaded successfully")
-            
-        except Exception as e:
-            print(f"Error loading datasets: {e}")
     
     def create_city_database(self):
         """Create database of Southern Asian cities with coordinates"""
@@ -58,17 +57,21 @@ class VacationRecommender:
         ]
     
     def get_city_weather_data(self, lat, lon):
-        """Extract actual NASA data for city coordinates"""
+        """Extract actual NASA data for city coordinates (scalars or arrays)"""
+        # Pick up grids reloaded in the registry
+        if self.dataset_version != get_registry().version:
+            self.datasets = {}
+            self.load_nasa_data()
+        
         city_data = {}
         
         for name, dataset in self.datasets.items():
             try:
                 # Find nearest grid point to city
-                point_data = dataset.sel(lat=lat, lon=lon, method='nearest')
-                city_data[name] = float(point_data.values)
+                city_data[name] = dataset.sample(lat, lon)
             except Exception as e:
                 print(f"Error extracting {name} data for {lat}, {lon}: {e}")
-                city_data[name] = np.nan
+                city_data[name] = np.full(np.shape(lat), np.nan) if np.ndim(lat) else np.nan
         
         return city_data
     
@@ -82,87 +85,52 @@ class VacationRecommender:
         temp_c = temp_k - 273.15
         
         # Calculate risk probabilities based on actual data
-        risks = {}
-        
-        # Very Wet Risk (based on precipitation)
-        if precip > 10:
-            risks['very_wet'] = min(90, 60 + precip * 2)
-        elif precip > 5:
-            risks['very_wet'] = min(60, 30 + precip * 4)
-        else:
-            risks['very_wet'] = max(5, precip * 3)
-        
-        # Very Hot Risk (based on temperature)
-        if temp_c > 35:
-            risks['very_hot'] = min(90, 50 + (temp_c - 35) * 3)
-        elif temp_c > 30:
-            risks['very_hot'] = min(60, 20 + (temp_c - 30) * 6)
-        else:
-            risks['very_hot'] = max(5, max(0, temp_c - 20) * 2)
-        
-        # Very Cold Risk (based on temperature)
-        if temp_c < 0:
-            risks['very_cold'] = min(90, 70 + abs(temp_c) * 2)
-        elif temp_c < 10:
-            risks['very_cold'] = min(60, (10 - temp_c) * 5)
-        else:
-            risks['very_cold'] = max(2, (20 - temp_c) * 1.5) if temp_c < 20 else 2
-        
-        # Very Windy Risk (based on wind speed)
-        if wind > 15:
-            risks['very_windy'] = min(90, 40 + (wind - 15) * 3)
-        elif wind > 10:
-            risks['very_windy'] = min(50, 15 + (wind - 10) * 5)
-        else:
-            risks['very_windy'] = max(5, wind * 2)
-        
-        # Overall discomfort
-        risks['very_uncomfortable'] = (risks['very_hot'] + risks['very_cold'] + 
-                                     risks['very_windy'] * 0.7 + risks['very_wet'] * 0.5) / 3.2
-        
-        return {k: max(1, min(95, v)) for k, v in risks.items()}
+        return score_point(*fill_missing(precip, temp_c, wind), model='comfort')
     
     def recommend_destinations(self, criteria):
         """Find cities that meet risk criteria using actual NASA data"""
         recommendations = []
         
-        for city in self.cities:
-            # Get actual NASA weather data for this city
-            weather_data = self.get_city_weather_data(city['lat'], city['lon'])
-            
-            # Skip if no valid data
-            if all(np.isnan(v) for v in weather_data.values()):
-                continue
-            
-            # Calculate risk scores from actual data
-            risk_scores = self.calculate_risk_scores(weather_data)
-            
-            # Check if city meets criteria
-            meets_criteria = (
-                risk_scores['very_wet'] <= criteria['maxWetRisk'] and
-                risk_scores['very_hot'] <= criteria['maxHotRisk'] and
-                risk_scores['very_cold'] <= criteria['maxColdRisk'] and
-                risk_scores['very_windy'] <= criteria['maxWindyRisk']
-            )
-            
-            if meets_criteria:
-                # Calculate overall risk score
-                overall_risk = (risk_scores['very_wet'] + risk_scores['very_hot'] + 
-                              risk_scores['very_cold'] + risk_scores['very_windy']) / 4
-                
-                temp_c = weather_data.get('temperature', 273.15) - 273.15
-                precip = weather_data.get('precipitation', 0)
-                
-                recommendations.append({
-                    'destination': city['name'],
-                    'country': city['country'],
-                    'coordinates': f"{city['lat']:.1f}°N, {city['lon']:.1f}°E",
-                    'riskScores': risk_scores,
-                    'overallRisk': round(overall_risk, 1),
-                    'avgTemp': f"{temp_c:.1f}°C",
-                    'avgPrecip': f"{precip:.1f}mm",
-                    'nasaData': weather_data
-                })
+        # Get actual NASA weather data for every city in one lookup per dataset
+        lats = np.array([city['lat'] for city in self.cities])
+        lons = np.array([city['lon'] for city in self.cities])
+        weather = self.get_city_weather_data(lats, lons)
+        
+        if not weather:
+            return recommendations
+        
+        # Skip cities with no valid data
+        has_data = ~np.all(np.isnan(np.array(list(weather.values()))), axis=0)
+        
+        # Calculate risk scores for all cities in one vectorized pass
+        precip = weather.get('precipitation', np.zeros(len(lats)))
+        temp_c = weather.get('temperature', np.full(len(lats), 273.15)) - 273.15
+        wind = weather.get('wind', np.zeros(len(lats)))
+        scores = score_risks(*fill_missing(precip, temp_c, wind), model='comfort')
+        
+        # Check which cities meet criteria
+        meets_criteria = has_data & (
+            (scores['very_wet'] <= criteria['maxWetRisk']) &
+            (scores['very_hot'] <= criteria['maxHotRisk']) &
+            (scores['very_cold'] <= criteria['maxColdRisk']) &
+            (scores['very_windy'] <= criteria['maxWindyRisk'])
+        )
+        
+        # Calculate overall risk score
+        overall = (scores['very_wet'] + scores['very_hot'] + scores['very_cold'] + scores['very_windy']) / 4
+        
+        for i in np.flatnonzero(meets_criteria):
+            city = self.cities[i]
+            recommendations.append({
+                'destination': city['name'],
+                'country': city['country'],
+                'coordinates': f"{city['lat']:.1f}°N, {city['lon']:.1f}°E",
+                'riskScores': {k: float(v[i]) for k, v in scores.items()},
+                'overallRisk': round(float(overall[i]), 1),
+                'avgTemp': f"{temp_c[i]:.1f}°C",
+                'avgPrecip': f"{precip[i]:.1f}mm",
+                'nasaData': {name: float(values[i]) for name, values in weather.items()}
+            })
         
         # Sort by overall risk (lowest first)
         recommendations.sort(key=lambda x: x['overallRisk'])